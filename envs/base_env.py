@@ -2,10 +2,15 @@ import numpy as np
 import pygame
 from gymnasium import spaces
 
+from envs.display import DisplayWindow
+from utils.kinematics import clip_rect, move_rect
+from utils.layout_bank import LayoutBank
+from utils.profiling import PhaseProfiler
 from utils.utils import (
-    STATE_WIDTH, STATE_HEIGHT, TILE_SIZE, CAR_HEIGHT, CAR_WIDTH,
+    STATE_WIDTH, STATE_HEIGHT, TILE_SIZE, CAR_HEIGHT, CAR_WIDTH, GRID_WIDTH, GRID_HEIGHT,
     NUMBER_OF_ACTIONS, grid_to_pixels, map_orientation_to_numeric,
-    get_random_orientation, get_random_rect, load_car_images, load_obstacle_image
+    get_random_orientation, get_random_rect, load_car_images, load_obstacle_image, make_prng,
+    rect_tile, sample_free_tiles, tile_rect
 )
 
 class BaseParkingEnv:
@@ -14,27 +19,100 @@ class BaseParkingEnv:
     Inherit from this class in each feature/image env to reduce duplication.
     """
 
+    # Phase name -> method path timed by enable_profiling; each env lists the phases of its step
+    PROFILE_PHASES = {}
+
     def __init__(self):
         self.screen_width = STATE_WIDTH
         self.screen_height = STATE_HEIGHT
         self.car_images = None
         self.obstacle_image = None
+        self.layout_bank = None
+        self.prng = make_prng()
+        self.window = None
+        self.image = None
+        self.off_screen_surface = None
+        self.profiler = None
+
+    def enable_profiling(self, enabled=True):
+        """Start (or stop) accumulating per-phase timings; stats survive until reset_profile."""
+        if enabled:
+            if self.profiler is None:
+                self.profiler = PhaseProfiler()
+            if not self.profiler.patched:
+                self.profiler.instrument(self, self.PROFILE_PHASES)
+        elif self.profiler is not None:
+            self.profiler.uninstrument()
+
+    def profile_stats(self):
+        """{phase: {"calls", "total_ms"}} accumulated while profiling was on."""
+        return self.profiler.stats() if self.profiler is not None else {}
+
+    def reset_profile(self):
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    def move_car(self, action):
+        self.car_orientation = move_rect(self.car_rect, self.car_orientation, action)
+
+    def clip_car(self):
+        clip_rect(self.car_rect, self.screen_width, self.screen_height)
 
-    def spawn_car(self, occupied=[]):
-        return get_random_rect(occupied_rects=occupied)
+    def seed_prng(self, seed=None):
+        """Restart this instance's stream from `seed`; unseeded resets keep drawing from the current one."""
+        if seed is not None:
+            self.prng = make_prng(seed)
 
-    def spawn_parking(self, car_rect, occupied=[]):
-        while True:
-            rect = get_random_rect(occupied_rects=occupied)
-            if not rect.colliderect(car_rect):
-                return rect
+    def set_layout_bank(self, bank, layout_range=None, expected_dtype=None):
+        """Serve resets from a pre-generated bank (path or array); None goes back to sampling."""
+        self.layout_bank = None if bank is None else LayoutBank(
+            bank, layout_range, expected_dtype, getattr(self, "grid_width", GRID_WIDTH),
+            getattr(self, "grid_height", GRID_HEIGHT)
+        )
 
-    def spawn_obstacles(self, car_rect, parking_rect, n=4, occupied=[]):
-        obstacle_rects = []
-        while len(obstacle_rects) < n:
-            ob_rect = get_random_rect(occupied_rects=[car_rect, parking_rect] + obstacle_rects + occupied)
-            obstacle_rects.append(ob_rect)
-        return obstacle_rects
+    def render_frame(self):
+        """rgb_array: (height, width, rgb) copy of the off-screen canvas. human: hand it to the display."""
+        if self.render_mode == "rgb_array":
+            return self.image.transpose(1, 0, 2).copy()
+        if self.render_mode == "human":
+            if self.window is None:
+                self.window = DisplayWindow(self.screen_width, self.screen_height, fps=self.metadata["render_fps"])
+            frame = self.image if self.off_screen_surface is None else self.off_screen_surface
+            self.window.show(frame)
+
+    def close_window(self):
+        if self.window is not None:
+            self.window.close()
+            self.window = None
+
+    def spawn_car(self, occupied=[], prng=None):
+        return get_random_rect(prng=prng, occupied_rects=occupied)
+
+    def spawn_parking(self, car_rect, occupied=[], prng=None):
+        return get_random_rect(prng=prng, occupied_rects=[car_rect] + occupied)
+
+    def spawn_obstacles(self, car_rect, parking_rect, n=4, occupied=[], prng=None):
+        occupied_tiles = [rect_tile(rect) for rect in [car_rect, parking_rect] + occupied]
+        return [tile_rect(*tile) for tile in sample_free_tiles(n, occupied_tiles, prng=prng)]
 
     def get_orientation(self, prng=None):
-        return get_random_orientation(prng=prng)
+        return map_orientation_to_numeric(get_random_orientation(prng=prng))
+
+    def spawn_layout(self, n_obstacles=4, prng=None):
+        """
+        Draw a single-car layout: car rect, orientation index, parking rect and obstacles.
+        The draw order is fixed so every env consuming the same prng gets the same layout.
+        """
+        car_tile, parking_tile, *obstacle_tiles = sample_free_tiles(2 + n_obstacles, prng=prng)
+        car_orientation = self.get_orientation(prng=prng)
+        obstacle_rects = [tile_rect(*tile) for tile in obstacle_tiles]
+        return tile_rect(*car_tile), car_orientation, tile_rect(*parking_tile), obstacle_rects
+
+    def layout_from_bank(self, options=None, prng=None):
+        """Same layout tuple as spawn_layout, read from the bank row given by options["layout_index"] or prng."""
+        row = self.layout_bank.draw((options or {}).get("layout_index"), prng=prng)
+        obstacle_rects = [tile_rect(*tile) for tile in row["obstacles"].tolist()]
+        return (
+            tile_rect(*row["car"].tolist()), int(row["orientation"]),
+            tile_rect(*row["lot"].tolist()), obstacle_rects
+        )
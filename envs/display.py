@@ -0,0 +1,43 @@
+import time
+
+import pygame
+
+
+class DisplayWindow:
+    """
+    Human-mode window that never holds up the env.
+
+    `show` presents the latest frame at most `fps` times a second; frames that
+    arrive in between are dropped instead of waited for, so stepping runs at
+    simulation speed and the window just samples it.
+    """
+
+    def __init__(self, width, height, fps=60, caption="Car Parking Game"):
+        self.size = (width, height)
+        self.interval = 1.0 / fps if fps else 0.0
+        self.caption = caption
+        self.window = None
+        self.last_flip = None
+
+    def show(self, frame, force=False):
+        """Present `frame` (a Surface or an (x, y, rgb) array) unless the last flip was too recent."""
+        now = time.perf_counter()
+        if not force and self.last_flip is not None and now - self.last_flip < self.interval:
+            return False
+        if self.window is None:
+            pygame.display.init()
+            pygame.display.set_caption(self.caption)
+            self.window = pygame.display.set_mode(self.size)
+        if isinstance(frame, pygame.Surface):
+            self.window.blit(frame, (0, 0))
+        else:
+            pygame.surfarray.blit_array(self.window, frame)
+        pygame.event.get()
+        pygame.display.flip()
+        self.last_flip = now
+        return True
+
+    def close(self):
+        if self.window is not None:
+            pygame.display.quit()
+            self.window = None
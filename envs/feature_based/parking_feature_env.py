@@ -5,21 +5,30 @@ import pygame
 from gymnasium import spaces
 
 from envs.base_env import BaseParkingEnv
+from envs.renderer import make_renderer
+from utils.layout_bank import single_layout_dtype
 from utils.utils import (
-    STATE_WIDTH, STATE_HEIGHT, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES, grid_to_pixels, map_orientation_to_numeric,
+    STATE_WIDTH, STATE_HEIGHT, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES, grid_to_pixels,
     CAR_WIDTH, CAR_HEIGHT, WHITE, CAR_SPEED
 )
 
 class ParkingFeature(gym.Env, BaseParkingEnv):
-    metadata = {"render_modes": ["human"], "render_fps": 200}
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 200}
+    PROFILE_PHASES = {
+        "step": "step", "reset": "reset", "move": "move_car", "clip": "clip_car",
+        "collide": "check_collisions", "render": "fill_surface", "copy": "renderer.copy_dirty", "obs": "get_obs",
+    }
 
-    def __init__(self, render_mode: Optional[str] = None):
+    def __init__(
+        self, render_mode: Optional[str] = None, layout_bank=None, layout_range=None, reuse_obs_buffer: bool = False
+    ):
         gym.Env.__init__(self)
         BaseParkingEnv.__init__(self)
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self.render_mode = render_mode
-        self.window = None
-        self.clock = None
+        self.set_layout_bank(layout_bank, layout_range, single_layout_dtype(NO_OF_OBSTACLES))
+        # Only drawn to when rendering; observations never need pixels
+        self.renderer = make_renderer(background=WHITE)
         self.car_images = None
         self.obstacle_image = None
 
@@ -30,73 +39,45 @@ class ParkingFeature(gym.Env, BaseParkingEnv):
 
         # Environment state
         self.car_rect = None
-        self.car_orientation = ""
+        self.car_orientation = 0
         self.parking_rect = None
         self.obstacle_rects = []
-        self.obstacle_positions = np.array([])
+        # Car x, y, offset to the lot, orientation, then obstacle xs and ys; obstacles are written once per reset.
+        # With reuse_obs_buffer, reset and step hand out this buffer itself, overwritten by the next call,
+        # so callers that keep an observation must copy it (DummyVecEnv's terminal_observation does not).
+        self.obs = np.zeros(self.observation_space.shape, dtype=self.observation_space.dtype)
+        self.reuse_obs_buffer = reuse_obs_buffer
         self.is_visited = set()
         self.reward = 0
 
     def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
         super().reset(seed=seed)
-        self.car_rect = self.spawn_car()
-        self.car_orientation = self.get_orientation()
-        self.parking_rect = self.spawn_parking(self.car_rect)
-        self.obstacle_rects = self.spawn_obstacles(self.car_rect, self.parking_rect, n=NO_OF_OBSTACLES)
-        self.current = (self.car_rect.x, self.car_rect.y)
-        self.lot = (self.parking_rect.x, self.parking_rect.y)
-        self.orientation = map_orientation_to_numeric(self.car_orientation)
-        self.delta = (self.car_rect.x - self.parking_rect.x, self.car_rect.y - self.parking_rect.y)
-        self.obstacle_positions = np.array([rect.x for rect in self.obstacle_rects] + [rect.y for rect in self.obstacle_rects])
+        self.seed_prng(seed)
+        if self.layout_bank is not None:
+            layout = self.layout_from_bank(options, prng=self.prng)
+        else:
+            layout = self.spawn_layout(n_obstacles=NO_OF_OBSTACLES, prng=self.prng)
+        self.car_rect, self.car_orientation, self.parking_rect, self.obstacle_rects = layout
+        self.obs[5:5 + NO_OF_OBSTACLES] = [rect.x for rect in self.obstacle_rects]
+        self.obs[5 + NO_OF_OBSTACLES:] = [rect.y for rect in self.obstacle_rects]
+        if self.render_mode is not None:
+            self.fill_surface(bake=True)
         if self.render_mode == "human":
             self.render()
-        return np.array([self.current[0], self.current[1], self.delta[0], self.delta[1], self.orientation] + self.obstacle_positions.tolist()), {}
+        return self.get_obs(), {}
 
     def step(self, action):
-        if action == 3:  # straight
-            if self.car_orientation == "up":
-                self.car_rect.y -= CAR_SPEED
-            elif self.car_orientation == "down":
-                self.car_rect.y += CAR_SPEED
-            elif self.car_orientation == "left":
-                self.car_rect.x -= CAR_SPEED
-            elif self.car_orientation == "right":
-                self.car_rect.x += CAR_SPEED
-        elif action == 4:  # backwards
-            if self.car_orientation == "up":
-                self.car_rect.y += CAR_SPEED
-            elif self.car_orientation == "down":
-                self.car_rect.y -= CAR_SPEED
-            elif self.car_orientation == "left":
-                self.car_rect.x += CAR_SPEED
-            elif self.car_orientation == "right":
-                self.car_rect.x -= CAR_SPEED
-        elif action == 1:  # turn left
-            if self.car_orientation == "up":
-                self.car_orientation = "left"
-            elif self.car_orientation == "down":
-                self.car_orientation = "right"
-            elif self.car_orientation == "left":
-                self.car_orientation = "down"
-            elif self.car_orientation == "right":
-                self.car_orientation = "up"
-        elif action == 2:  # turn right
-            if self.car_orientation == "up":
-                self.car_orientation = "right"
-            elif self.car_orientation == "down":
-                self.car_orientation = "left"
-            elif self.car_orientation == "left":
-                self.car_orientation = "up"
-            elif self.car_orientation == "right":
-                self.car_orientation = "down"
+        self.move_car(action)
+        self.clip_car()
+        terminated = self.check_collisions()
 
-        # Clip to board
-        self.car_rect.left = max(0, self.car_rect.left)
-        self.car_rect.right = min(STATE_WIDTH, self.car_rect.right)
-        self.car_rect.top = max(0, self.car_rect.top)
-        self.car_rect.bottom = min(STATE_HEIGHT, self.car_rect.bottom)
+        if self.render_mode is not None:
+            self.fill_surface()
+        if self.render_mode == "human":
+            self.render()
+        return self.get_obs(), self.reward, terminated, False, {}
 
-        self.current = (self.car_rect.x, self.car_rect.y)
+    def check_collisions(self):
         terminated = False
         if self.parking_rect.colliderect(self.car_rect):
             self.reward = 2000
@@ -109,47 +90,34 @@ class ParkingFeature(gym.Env, BaseParkingEnv):
                     break
             else:
                 self.reward = -1
+        return terminated
 
-        if self.render_mode == "human":
-            self.render()
+    def get_obs(self):
+        obs = self.obs
+        obs[0] = self.car_rect.x
+        obs[1] = self.car_rect.y
+        obs[2] = self.car_rect.x - self.parking_rect.x
+        obs[3] = self.car_rect.y - self.parking_rect.y
+        obs[4] = self.car_orientation
+        return obs if self.reuse_obs_buffer else obs.copy()
 
-        self.orientation = map_orientation_to_numeric(self.car_orientation)
-        self.delta = (self.car_rect.x - self.parking_rect.x, self.car_rect.y - self.parking_rect.y)
-        self.obstacle_positions = np.array([rect.x for rect in self.obstacle_rects] + [rect.y for rect in self.obstacle_rects])
-        obs = np.array([self.current[0], self.current[1], self.delta[0], self.delta[1], self.orientation] + self.obstacle_positions.tolist())
-        return obs, self.reward, terminated, False, {}
+    def fill_surface(self, bake=False):
+        if self.car_images is None or self.obstacle_image is None:
+            self.renderer.load_sprites()
+            self.car_images = self.renderer.car_images
+            self.obstacle_image = self.renderer.obstacle_image
+        sprites = [(self.car_images[self.car_orientation], self.car_rect)]
+        if bake:
+            # Obstacles and the lot are drawn over the car
+            over = [(self.obstacle_image, rect) for rect in self.obstacle_rects]
+            over.append(((0, 255, 0), self.parking_rect))
+            self.image = self.renderer.bake(sprites, over=over)
+        else:
+            self.image = self.renderer.update(sprites)
+        self.off_screen_surface = self.renderer.surface
 
     def render(self):
-        if self.window is None:
-            pygame.init()
-            pygame.display.init()
-            pygame.display.set_caption("Car Parking Game")
-            self.window = pygame.display.set_mode((STATE_WIDTH, STATE_HEIGHT))
-        if self.clock is None:
-            self.clock = pygame.time.Clock()
-        if self.car_images is None:
-            self.car_images = [
-                pygame.image.load("assets/car-up.png"),
-                pygame.image.load("assets/car-down.png"),
-                pygame.image.load("assets/car-left.png"),
-                pygame.image.load("assets/car-right.png")
-            ]
-        if self.obstacle_image is None:
-            self.obstacle_image = pygame.image.load("assets/obstacle.png")
-        self.window.fill(WHITE)
-        car_sprite = None
-        if self.car_orientation == "up":
-            car_sprite = self.car_images[0]
-        elif self.car_orientation == "down":
-            car_sprite = self.car_images[1]
-        elif self.car_orientation == "left":
-            car_sprite = self.car_images[2]
-        elif self.car_orientation == "right":
-            car_sprite = self.car_images[3]
-        self.window.blit(car_sprite, self.car_rect)
-        for obstacle_rect in self.obstacle_rects:
-            self.window.blit(self.obstacle_image, obstacle_rect)
-        pygame.draw.rect(self.window, (0, 255, 0), self.parking_rect)
-        pygame.event.get()
-        pygame.display.flip()
-        self.clock.tick(200)
\ No newline at end of file
+        return self.render_frame()
+
+    def close(self):
+        self.close_window()
@@ -0,0 +1,161 @@
+from typing import Optional
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from envs.base_env import BaseParkingEnv
+from utils.kinematics import clip_arrays, move_arrays
+from utils.layout_bank import single_layout_dtype
+from utils.utils import (
+    STATE_WIDTH, STATE_HEIGHT, TILE_SIZE, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES, make_prng
+)
+
+# Every rect in the feature env is TILE_SIZE x TILE_SIZE
+RECT_SIZE = TILE_SIZE
+
+
+class ParkingFeatureVec(VecEnv, BaseParkingEnv):
+    """
+    Batched ParkingFeature: N lots stored as NumPy arrays and stepped in one call.
+    Gives the same observations and rewards as N ParkingFeature envs fed the same
+    layouts and actions, and auto-resets finished lots like any SB3 VecEnv.
+    """
+
+    PROFILE_PHASES = {"step": "step_wait", "reset": "_reset_env", "obs": "_get_obs"}
+    # Per-lot state exposed through get_attr/set_attr one env at a time; "prng" reads self.prngs
+    PER_ENV_ATTRS = {
+        "car_x": "car_x", "car_y": "car_y", "orientation": "orientation", "lot_x": "lot_x", "lot_y": "lot_y",
+        "obstacle_x": "obstacle_x", "obstacle_y": "obstacle_y", "episode_steps": "episode_steps", "prng": "prngs",
+    }
+    # Methods env_method calls once per selected lot, with indices=[lot]
+    PER_ENV_METHODS = ("seed_prng",)
+
+    def __init__(
+        self, num_envs: int, n_obstacles: int = NO_OF_OBSTACLES, max_episode_steps: Optional[int] = None,
+        layout_bank=None, layout_range=None
+    ):
+        BaseParkingEnv.__init__(self)
+        self.set_layout_bank(layout_bank, layout_range, single_layout_dtype(n_obstacles))
+        self.render_mode = None
+        self.n_obstacles = n_obstacles
+        self.max_episode_steps = max_episode_steps
+
+        action_space = spaces.Discrete(NUMBER_OF_ACTIONS)
+        low_values = np.array([0, 0, -STATE_WIDTH, -STATE_HEIGHT, 0] + [0] * 2 * n_obstacles)
+        high_values = np.array([STATE_WIDTH, STATE_HEIGHT, STATE_WIDTH, STATE_HEIGHT, 3] + [STATE_WIDTH] * 2 * n_obstacles)
+        observation_space = spaces.Box(low=low_values, high=high_values, dtype=np.int32)
+        VecEnv.__init__(self, num_envs, observation_space, action_space)
+
+        # Struct-of-arrays state, one row per lot
+        self.car_x = np.zeros(num_envs, dtype=np.int32)
+        self.car_y = np.zeros(num_envs, dtype=np.int32)
+        self.orientation = np.zeros(num_envs, dtype=np.int32)
+        self.lot_x = np.zeros(num_envs, dtype=np.int32)
+        self.lot_y = np.zeros(num_envs, dtype=np.int32)
+        self.obstacle_x = np.zeros((num_envs, n_obstacles), dtype=np.int32)
+        self.obstacle_y = np.zeros((num_envs, n_obstacles), dtype=np.int32)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.prngs = [make_prng() for _ in range(num_envs)]
+        self.actions = np.zeros(num_envs, dtype=np.int64)
+
+    def _reset_env(self, idx, options=None):
+        if self.layout_bank is not None:
+            layout = self.layout_from_bank(options, prng=self.prngs[idx])
+        else:
+            layout = self.spawn_layout(n_obstacles=self.n_obstacles, prng=self.prngs[idx])
+        car_rect, car_orientation, parking_rect, obstacle_rects = layout
+        self.car_x[idx], self.car_y[idx] = car_rect.x, car_rect.y
+        self.orientation[idx] = car_orientation
+        self.lot_x[idx], self.lot_y[idx] = parking_rect.x, parking_rect.y
+        self.obstacle_x[idx] = [rect.x for rect in obstacle_rects]
+        self.obstacle_y[idx] = [rect.y for rect in obstacle_rects]
+        self.episode_steps[idx] = 0
+
+    def _get_obs(self):
+        return np.concatenate([
+            self.car_x[:, None], self.car_y[:, None],
+            (self.car_x - self.lot_x)[:, None], (self.car_y - self.lot_y)[:, None],
+            self.orientation[:, None], self.obstacle_x, self.obstacle_y
+        ], axis=1)
+
+    def reset(self):
+        for idx in range(self.num_envs):
+            if self._seeds[idx] is not None:
+                # VecEnv.seed already offset these by the env index
+                self.prngs[idx] = make_prng(self._seeds[idx])
+            self._reset_env(idx, self._options[idx])
+        self._reset_seeds()
+        self._reset_options()
+        return self._get_obs()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        move_arrays(self.car_x, self.car_y, self.orientation, self.actions)
+        clip_arrays(self.car_x, self.car_y, STATE_WIDTH, STATE_HEIGHT, RECT_SIZE)
+
+        # Equal-sized rects collide when they overlap on both axes
+        parked = (np.abs(self.car_x - self.lot_x) < RECT_SIZE) & (np.abs(self.car_y - self.lot_y) < RECT_SIZE)
+        crashed = (
+            (np.abs(self.car_x[:, None] - self.obstacle_x) < RECT_SIZE)
+            & (np.abs(self.car_y[:, None] - self.obstacle_y) < RECT_SIZE)
+        ).any(axis=1) & ~parked
+        rewards = np.where(parked, 2000, np.where(crashed, -1000, -1)).astype(np.float32)
+        terminated = parked | crashed
+
+        self.episode_steps += 1
+        if self.max_episode_steps is not None:
+            truncated = ~terminated & (self.episode_steps >= self.max_episode_steps)
+        else:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+        dones = terminated | truncated
+
+        obs = self._get_obs()
+        infos = [{} for _ in range(self.num_envs)]
+        for idx in np.flatnonzero(dones):
+            infos[idx]["terminal_observation"] = obs[idx].copy()
+            infos[idx]["TimeLimit.truncated"] = bool(truncated[idx])
+            self._reset_env(idx)
+        if dones.any():
+            obs = self._get_obs()
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def seed_prng(self, seed=None, indices=None):
+        """Restart the streams of the selected lots from `seed`, offset by lot index like VecEnv.seed."""
+        if seed is not None:
+            for idx in self._get_indices(indices):
+                self.prngs[idx] = make_prng(seed + idx)
+
+    def get_attr(self, attr_name, indices=None):
+        indices = list(self._get_indices(indices))
+        if attr_name in self.PER_ENV_ATTRS:
+            values = getattr(self, self.PER_ENV_ATTRS[attr_name])
+            return [values[idx] for idx in indices]
+        # Everything else is shared by the whole batch
+        return [getattr(self, attr_name)] * len(indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        if attr_name in self.PER_ENV_ATTRS:
+            values = getattr(self, self.PER_ENV_ATTRS[attr_name])
+            for idx in self._get_indices(indices):
+                values[idx] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Lot-aware methods (those taking `indices`) get the selection; batch-wide ones run once."""
+        indices = list(self._get_indices(indices))
+        if not indices:
+            return []
+        method = getattr(self, method_name)
+        if method_name in self.PER_ENV_METHODS:
+            return [method(*method_args, indices=[idx], **method_kwargs) for idx in indices]
+        return [method(*method_args, **method_kwargs)] * len(indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,47 @@
+import numpy as np
+from gymnasium import spaces
+
+from utils.utils import TILE_SIZE, GRID_WIDTH, GRID_HEIGHT, ORIENTATIONS
+
+OBS_MODES = ["pixels", "grid"]
+
+# One plane per car orientation, then the static layout and everyone else on the lot
+GRID_CHANNELS = [f"car_{orientation}" for orientation in ORIENTATIONS] + ["lot", "obstacle", "other_cars"]
+CH_LOT = 4
+CH_OBSTACLE = 5
+CH_OTHER = 6
+
+
+def grid_observation_space(grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """(row, col, channel) occupancy tensor at tile resolution."""
+    return spaces.Box(low=0, high=1, shape=(grid_height, grid_width, len(GRID_CHANNELS)), dtype=np.uint8)
+
+
+def rect_to_tile(rect, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """Tile (row, col) holding the centre of `rect`; cars sit 10px off the tile grid."""
+    x, y, w, h = tuple(rect)
+    row = min(max((y + h // 2) // TILE_SIZE, 0), grid_height - 1)
+    col = min(max((x + w // 2) // TILE_SIZE, 0), grid_width - 1)
+    return row, col
+
+
+def static_grid(lot_rects, obstacle_rects, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """Grid with the lot and obstacle planes filled in; build once per reset and copy per step."""
+    grid = np.zeros((grid_height, grid_width, len(GRID_CHANNELS)), dtype=np.uint8)
+    for rect in lot_rects:
+        grid[rect_to_tile(rect, grid_width, grid_height) + (CH_LOT,)] = 1
+    for rect in obstacle_rects:
+        grid[rect_to_tile(rect, grid_width, grid_height) + (CH_OBSTACLE,)] = 1
+    return grid
+
+
+def car_grid(static, car_rect, orientation, other_tiles=None):
+    """
+    Copy of `static` with the car's orientation plane set and, given per-tile car counts
+    `other_tiles`, the other-cars plane marking every tile where the count is positive.
+    """
+    grid = static.copy()
+    grid[rect_to_tile(car_rect, grid.shape[1], grid.shape[0]) + (orientation,)] = 1
+    if other_tiles is not None:
+        grid[:, :, CH_OTHER] = other_tiles > 0
+    return grid
@@ -5,95 +5,124 @@ import pygame
 from gymnasium import spaces
 
 from envs.base_env import BaseParkingEnv
+from utils.layout_bank import single_layout_dtype
+from envs.grid_obs import OBS_MODES, grid_observation_space, static_grid, car_grid
+from envs.pixel_obs import FrameCache, PixelObservation
+from envs.renderer import make_renderer
 from utils.utils import (
-    STATE_WIDTH, STATE_HEIGHT, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES, 
-    grid_to_pixels, map_orientation_to_numeric, CAR_WIDTH, CAR_HEIGHT, 
+    STATE_WIDTH, STATE_HEIGHT, TILE_SIZE, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES, 
+    grid_to_pixels, CAR_WIDTH, CAR_HEIGHT, 
     WHITE, GRAY, CAR_SPEED
 )
 
+# Pixel coordinates are below 720, so a state fits in int16
+STATE_DTYPE = np.int16
+STATE_SIZE = 5 + 2 * NO_OF_OBSTACLES
+
 class ParkingImage(gym.Env, BaseParkingEnv):
-    metadata = {"render_modes": ["human"], "render_fps": 200}
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 200}
+    PROFILE_PHASES = {
+        "step": "step", "reset": "reset", "move": "move_car", "clip": "clip_car",
+        "collide": "check_collisions", "render": "fill_surface", "copy": "renderer.copy_dirty",
+        "downsample": "pixel_obs.update", "obs": "get_obs",
+    }
 
-    def __init__(self, render_mode: Optional[str] = None):
+    def __init__(
+        self, render_mode: Optional[str] = None, render_backend: str = "pygame", obs_mode: str = "pixels",
+        resolution: Optional[int] = None, grayscale: bool = False, channel_first: bool = False,
+        layout_bank=None, layout_range=None, record_states: bool = False, frame_cache_size: int = 0,
+        reuse_obs_buffer: bool = False
+    ):
         gym.Env.__init__(self)
         BaseParkingEnv.__init__(self)
         assert render_mode is None or render_mode in self.metadata["render_modes"]
+        assert obs_mode in OBS_MODES
         self.render_mode = render_mode
-        self.window = None
-        self.off_screen_surface = None
-        self.clock = None
+        self.obs_mode = obs_mode
+        self.set_layout_bank(layout_bank, layout_range, single_layout_dtype(NO_OF_OBSTACLES))
+        self.renderer = make_renderer(render_backend, background=GRAY)
         self.car_images = None
         self.obstacle_image = None
 
+        # Downsampled / grayscale / CHW frames; None keeps the full-size (x, y, rgb) canvas
+        self.pixel_obs = None
+        if obs_mode == "pixels" and (resolution is not None or grayscale or channel_first):
+            self.pixel_obs = PixelObservation(resolution or STATE_WIDTH, grayscale, channel_first)
+        self.frame = None
+        # With reuse_obs_buffer, pixel observations are the renderer's own buffer, overwritten by the next
+        # step, so callers that keep an observation must copy it. Frame cache hits are immutable either way.
+        self.reuse_obs_buffer = reuse_obs_buffer
+
+        # Pixel observations memoized by (layout, car x, y, orientation). Hits skip drawing
+        # entirely, so the renderer may lag behind and is rebaked on the next miss if needed.
+        self.frame_cache = None
+        if frame_cache_size:
+            if obs_mode != "pixels" or render_mode is not None:
+                raise ValueError("frame_cache_size needs obs_mode='pixels' and no render_mode")
+            self.frame_cache = FrameCache(frame_cache_size)
+        self.layout_key = None
+        self.layout_stale = True
+        self.cached_frame = None
+
         self.action_space = spaces.Discrete(NUMBER_OF_ACTIONS)
-        self.observation_space = spaces.Box(
-            low=0, high=255, shape=(STATE_HEIGHT, STATE_WIDTH, 3), dtype=np.uint8
-        )
+        if obs_mode == "grid":
+            self.observation_space = grid_observation_space()
+        elif self.pixel_obs is not None:
+            self.observation_space = self.pixel_obs.observation_space()
+        else:
+            self.observation_space = spaces.Box(
+                low=0, high=255, shape=(STATE_HEIGHT, STATE_WIDTH, 3), dtype=np.uint8
+            )
         self.car_rect = None
-        self.car_orientation = ""
+        self.car_orientation = 0
         self.parking_rect = None
         self.obstacle_rects = []
         self.is_visited = set()
         self.reward = 0
         self.image = None
+        self.static_grid = None
+        # With record_states, step infos carry the compact state before and after the step
+        self.record_states = record_states
+        self.last_state = None
 
     def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
         super().reset(seed=seed)
-        self.car_rect = self.spawn_car()
-        self.car_orientation = self.get_orientation()
-        self.parking_rect = self.spawn_parking(self.car_rect)
-        self.obstacle_rects = self.spawn_obstacles(self.car_rect, self.parking_rect, n=NO_OF_OBSTACLES)
-        self.fill_surface()
+        self.seed_prng(seed)
+        if self.layout_bank is not None:
+            layout = self.layout_from_bank(options, prng=self.prng)
+        else:
+            layout = self.spawn_layout(n_obstacles=NO_OF_OBSTACLES, prng=self.prng)
+        self.car_rect, self.car_orientation, self.parking_rect, self.obstacle_rects = layout
+        # New-tile bonuses are per episode, so a seeded episode replays the same on a reused env
+        self.is_visited = set()
+        if self.obs_mode == "grid":
+            self.static_grid = static_grid([self.parking_rect], self.obstacle_rects)
+        if self.needs_pixels():
+            self.update_pixels(bake=True)
         self.current = (self.car_rect.x, self.car_rect.y)
+        if self.record_states:
+            self.last_state = self.get_state()
         if self.render_mode == "human":
             self.render()
-        return self.image, {}
+        return self.get_obs(), {}
 
     def step(self, action):
-        # Move car similarly to feature env
-        if action == 3:  # straight
-            if self.car_orientation == "up":
-                self.car_rect.y -= CAR_SPEED
-            elif self.car_orientation == "down":
-                self.car_rect.y += CAR_SPEED
-            elif self.car_orientation == "left":
-                self.car_rect.x -= CAR_SPEED
-            elif self.car_orientation == "right":
-                self.car_rect.x += CAR_SPEED
-        elif action == 4:  # backwards
-            if self.car_orientation == "up":
-                self.car_rect.y += CAR_SPEED
-            elif self.car_orientation == "down":
-                self.car_rect.y -= CAR_SPEED
-            elif self.car_orientation == "left":
-                self.car_rect.x += CAR_SPEED
-            elif self.car_orientation == "right":
-                self.car_rect.x -= CAR_SPEED
-        elif action == 1:  # turn left
-            if self.car_orientation == "up":
-                self.car_orientation = "left"
-            elif self.car_orientation == "down":
-                self.car_orientation = "right"
-            elif self.car_orientation == "left":
-                self.car_orientation = "down"
-            elif self.car_orientation == "right":
-                self.car_orientation = "up"
-        elif action == 2:  # turn right
-            if self.car_orientation == "up":
-                self.car_orientation = "right"
-            elif self.car_orientation == "down":
-                self.car_orientation = "left"
-            elif self.car_orientation == "left":
-                self.car_orientation = "up"
-            elif self.car_orientation == "right":
-                self.car_orientation = "down"
-
-        # Clip to board size
-        self.car_rect.left = max(0, self.car_rect.left)
-        self.car_rect.right = min(STATE_WIDTH, self.car_rect.right)
-        self.car_rect.top = max(0, self.car_rect.top)
-        self.car_rect.bottom = min(STATE_HEIGHT, self.car_rect.bottom)
+        self.move_car(action)
+        self.clip_car()
+        terminated = self.check_collisions()
+
+        if self.needs_pixels():
+            self.update_pixels()
+        if self.render_mode == "human":
+            self.render()
+        info = {}
+        if self.record_states:
+            state = self.get_state()
+            info = {"state": self.last_state, "next_state": state}
+            self.last_state = state
+        return self.get_obs(), self.reward, terminated, False, info
 
+    def check_collisions(self):
         self.current = (self.car_rect.x, self.car_rect.y)
         terminated = False
         if self.parking_rect.colliderect(self.car_rect):
@@ -111,46 +140,90 @@ class ParkingImage(gym.Env, BaseParkingEnv):
                 else:
                     self.is_visited.add(self.current)
                     self.reward = 10
+        return terminated
 
-        self.fill_surface()
-        if self.render_mode == "human":
-            self.render()
-        return self.image, self.reward, terminated, False, {}
-
-    def fill_surface(self):
-        if self.car_images is None:
-            self.car_images = [
-                pygame.image.load("assets/car-up.png"),
-                pygame.image.load("assets/car-down.png"),
-                pygame.image.load("assets/car-left.png"),
-                pygame.image.load("assets/car-right.png")
+    def get_state(self):
+        """Everything an observation depends on: car x, y, orientation, lot x, y, then obstacle xs and ys."""
+        return np.array(
+            [self.car_rect.x, self.car_rect.y, self.car_orientation, self.parking_rect.x, self.parking_rect.y]
+            + [rect.x for rect in self.obstacle_rects] + [rect.y for rect in self.obstacle_rects],
+            dtype=STATE_DTYPE
+        )
+
+    def set_state(self, state, bake=True):
+        """
+        Restore a state from get_state and redraw the observation. With bake=False the
+        layout is kept and only the car moves, which redraws just the dirty areas.
+        """
+        x, y, orientation, lot_x, lot_y, *obstacles = np.asarray(state).tolist()
+        self.car_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+        self.car_orientation = orientation
+        if bake:
+            self.parking_rect = pygame.Rect(lot_x, lot_y, TILE_SIZE, TILE_SIZE)
+            n = len(obstacles) // 2
+            self.obstacle_rects = [
+                pygame.Rect(ox, oy, TILE_SIZE, TILE_SIZE) for ox, oy in zip(obstacles[:n], obstacles[n:])
             ]
-        if self.obstacle_image is None:
-            self.obstacle_image = pygame.image.load("assets/obstacle.png")
-        pygame.init()
-        pygame.display.init()
-        self.off_screen_surface = pygame.Surface((STATE_WIDTH, STATE_HEIGHT))
-        self.off_screen_surface.fill(GRAY)
-        if self.car_orientation == "up":
-            car_sprite = self.car_images[0]
-        elif self.car_orientation == "down":
-            car_sprite = self.car_images[1]
-        elif self.car_orientation == "left":
-            car_sprite = self.car_images[2]
+            if self.obs_mode == "grid":
+                self.static_grid = static_grid([self.parking_rect], self.obstacle_rects)
+        if self.needs_pixels():
+            self.update_pixels(bake=bake)
+        return self.get_obs()
+
+    def needs_pixels(self):
+        return self.obs_mode == "pixels" or self.render_mode is not None
+
+    def get_obs(self):
+        if self.obs_mode == "grid":
+            return car_grid(self.static_grid, self.car_rect, self.car_orientation)
+        if self.frame_cache is not None:
+            return self.cached_frame
+        frame = self.frame if self.pixel_obs is not None else self.image
+        return frame if self.reuse_obs_buffer else frame.copy()
+
+    def update_pixels(self, bake=False):
+        """Redraw the observation for the current state, or fetch it from the frame cache."""
+        if self.frame_cache is None:
+            self.fill_surface(bake=bake)
+            return
+        if bake:
+            self.layout_key = (self.parking_rect.x, self.parking_rect.y) + tuple(
+                coord for rect in self.obstacle_rects for coord in (rect.x, rect.y)
+            )
+            self.layout_stale = True
+        key = (self.layout_key, self.car_rect.x, self.car_rect.y, self.car_orientation)
+        frame = self.frame_cache.get(key)
+        if frame is None:
+            self.fill_surface(bake=self.layout_stale)
+            self.layout_stale = False
+            frame = self.frame_cache.put(key, self.frame if self.pixel_obs is not None else self.image)
+        self.cached_frame = frame
+
+    def frame_cache_stats(self):
+        """{"hits", "misses", "frames"} of the frame cache, or {} when it is off."""
+        return self.frame_cache.stats() if self.frame_cache is not None else {}
+
+    def fill_surface(self, bake=False):
+        if self.car_images is None or self.obstacle_image is None:
+            self.renderer.load_sprites()
+            self.car_images = self.renderer.car_images
+            self.obstacle_image = self.renderer.obstacle_image
+        sprites = [(self.car_images[self.car_orientation], self.car_rect)]
+        if bake:
+            # Obstacles and the lot are drawn over the car
+            over = [(self.obstacle_image, rect) for rect in self.obstacle_rects]
+            over.append(((100, 100, 100), self.parking_rect))
+            self.image = self.renderer.bake(sprites, over=over)
+            if self.pixel_obs is not None:
+                self.frame = self.pixel_obs.reset(self.image)
         else:
-            car_sprite = self.car_images[3]
-        self.off_screen_surface.blit(car_sprite, self.car_rect)
-        for obstacle_rect in self.obstacle_rects:
-            self.off_screen_surface.blit(self.obstacle_image, obstacle_rect)
-        pygame.draw.rect(self.off_screen_surface, (100, 100, 100), self.parking_rect)
-        self.image = pygame.surfarray.array3d(self.off_screen_surface)
-        pygame.event.get()
+            self.image = self.renderer.update(sprites)
+            if self.pixel_obs is not None:
+                self.frame = self.pixel_obs.update(self.image, self.renderer.dirty)
+        self.off_screen_surface = self.renderer.surface
 
     def render(self):
-        if self.window is None:
-            self.window = pygame.display.set_mode((STATE_WIDTH, STATE_HEIGHT))
-        if self.clock is None:
-            self.clock = pygame.time.Clock()
-        self.window.blit(self.off_screen_surface, (0, 0))
-        pygame.display.flip()
-        self.clock.tick(200)
\ No newline at end of file
+        return self.render_frame()
+
+    def close(self):
+        self.close_window()
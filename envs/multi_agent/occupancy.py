@@ -0,0 +1,58 @@
+from utils.utils import TILE_SIZE
+
+
+def tile_of(rect):
+    """(col, row) of a tile-aligned rect."""
+    return rect.x // TILE_SIZE, rect.y // TILE_SIZE
+
+
+class OccupancyGrid:
+    """
+    Tile-indexed occupancy for ParkingMultiEnv.
+
+    Every rect in the multi-agent lot covers exactly one tile, so two rects collide
+    exactly when they share a tile. Collision, obstacle-hit and lot-arrival queries
+    become dict lookups instead of colliderect scans, and cars are re-indexed
+    incrementally as they move.
+    """
+
+    def __init__(self):
+        self.lots = {}
+        self.obstacles = set()
+        self.cars = {}
+        self.car_tiles = {}
+
+    def add_lot(self, rect, index):
+        self.lots[tile_of(rect)] = index
+
+    def add_obstacle(self, rect):
+        self.obstacles.add(tile_of(rect))
+
+    def place(self, agent, rect):
+        tile = tile_of(rect)
+        self.car_tiles[agent] = tile
+        self.cars.setdefault(tile, []).append(agent)
+
+    def move(self, agent, rect):
+        tile = tile_of(rect)
+        old_tile = self.car_tiles[agent]
+        if tile != old_tile:
+            self.remove(agent)
+            self.place(agent, rect)
+
+    def remove(self, agent):
+        tile = self.car_tiles.pop(agent)
+        occupants = self.cars[tile]
+        occupants.remove(agent)
+        if not occupants:
+            del self.cars[tile]
+
+    def cars_at(self, rect):
+        return self.cars.get(tile_of(rect), [])
+
+    def obstacle_at(self, rect):
+        return tile_of(rect) in self.obstacles
+
+    def lot_at(self, rect):
+        """Index of the parking rect on this tile, or None."""
+        return self.lots.get(tile_of(rect))
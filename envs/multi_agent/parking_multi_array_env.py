@@ -0,0 +1,177 @@
+import numpy as np
+import pygame
+
+from envs.grid_obs import GRID_CHANNELS, CH_LOT, CH_OBSTACLE, CH_OTHER
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv, MAX_EPISODE_LENGTH
+from utils.kinematics import clip_arrays, move_arrays
+from utils.utils import TILE_SIZE
+
+
+class ParkingMultiArrayEnv(ParkingMultiEnv):
+    """
+    ParkingMultiEnv for large fleets: agent state lives in NumPy arrays and every
+    agent moves, clips and resolves collisions in one vectorized pass.
+
+    Moves are simultaneous: agents sharing a tile after the move collide (-500 for
+    each other car on the tile), as do pairs that swap tiles. Obstacle hits and lot
+    arrivals are scored as in ParkingMultiEnv. The PettingZoo dict API (`reset`, `step`)
+    is a thin adapter over the array API (`reset_array`, `step_array`), which takes and
+    returns stacked per-agent arrays indexed like `possible_agents`.
+    """
+
+    metadata = {"render_modes": ["human", "rgb_array"], "name": "parking_multi_array_v0", "render_fps": 30}
+    PROFILE_PHASES = {
+        "step": "step_array", "reset": "reset_array", "render": "fill_surface",
+        "copy": "renderer.copy_dirty", "obs": "get_array_obs",
+    }
+
+    def __init__(self, render_mode=None, render_backend="pygame", obs_mode="grid", **kwargs):
+        super().__init__(render_mode=render_mode, render_backend=render_backend, obs_mode=obs_mode, **kwargs)
+        n = self.n_agents
+        self.agent_index = {agent: i for i, agent in enumerate(self.possible_agents)}
+        self.car_x = np.zeros(n, dtype=np.int32)
+        self.car_y = np.zeros(n, dtype=np.int32)
+        self.orientation = np.zeros(n, dtype=np.int32)
+        self.alive = np.zeros(n, dtype=bool)
+        # Agents that parked this step: alive for its observations, but already in parked_tiles
+        self.parked_now = np.zeros(n, dtype=bool)
+        self.lot_grid = None
+        self.obstacle_grid = None
+        self.parked_tiles = []
+
+    def tiles(self):
+        return (self.car_y // TILE_SIZE) * self.grid_width + self.car_x // TILE_SIZE
+
+    def reset_array(self, seed=None, options=None):
+        self.draw_layout(seed, options)
+        self.parked_tiles = []
+        for i, agent in enumerate(self.possible_agents):
+            rect = self.agent_rects[agent]
+            self.car_x[i], self.car_y[i] = rect.x, rect.y
+            self.orientation[i] = self.agent_orientations[agent]
+        self.alive[:] = True
+        self.parked_now[:] = False
+        self.lot_grid = np.full(self.grid_width * self.grid_height, -1, dtype=np.int32)
+        for index, rect in enumerate(self.parking_rects):
+            self.lot_grid[(rect.y // TILE_SIZE) * self.grid_width + rect.x // TILE_SIZE] = index
+        self.obstacle_grid = np.zeros(self.grid_width * self.grid_height, dtype=bool)
+        for rect in self.obstacle_rects:
+            self.obstacle_grid[(rect.y // TILE_SIZE) * self.grid_width + rect.x // TILE_SIZE] = True
+        if self.obs_mode == "grid":
+            self.static_grid = self.build_static_grid()
+        if self.needs_pixels():
+            self.fill_surface(bake=True)
+        if self.render_mode == "human":
+            self.render()
+        return self.get_array_obs()
+
+    def step_array(self, actions):
+        """
+        Advance every live agent at once. `actions` has one entry per possible agent;
+        negative entries (and dead agents) are skipped. Returns stacked observations
+        plus per-agent rewards, terminated and truncated arrays.
+        """
+        actions = np.asarray(actions)
+        acting = self.alive & (actions >= 0)
+        self.time_step += 1
+
+        old_tiles = self.tiles()
+        # Skipped agents stay put (action 0)
+        move_arrays(self.car_x, self.car_y, self.orientation, np.where(acting, actions, 0))
+        clip_arrays(self.car_x, self.car_y, self.screen_width, self.screen_height, TILE_SIZE)
+        tiles = self.tiles()
+
+        rewards = np.zeros(self.n_agents, dtype=np.float32)
+        # Cars sharing a tile: each pays 500 per other car there
+        counts = np.bincount(tiles[self.alive], minlength=self.grid_width * self.grid_height)
+        crowded = self.alive & (counts[tiles] > 1)
+        rewards -= 500 * np.where(crowded, counts[tiles] - 1, 0)
+        # Cars that swapped tiles passed through each other
+        moved = acting & (tiles != old_tiles)
+        size = self.grid_width * self.grid_height
+        swapped = moved & np.isin(tiles * size + old_tiles, (old_tiles * size + tiles)[moved])
+        rewards -= 500 * swapped
+        hit_obstacle = acting & self.obstacle_grid[tiles]
+        rewards -= 500 * hit_obstacle
+        lots = self.lot_grid[tiles]
+        parked = acting & (lots >= 0)
+        self.parked_now[:] = parked
+        rewards += 2000 * parked
+        rewards -= acting
+
+        terminated = crowded | swapped | hit_obstacle | parked
+        truncated = np.zeros(self.n_agents, dtype=bool)
+        if self.time_step >= MAX_EPISODE_LENGTH:
+            truncated = self.alive & ~terminated
+        for i in np.flatnonzero(parked):
+            self.parked_tiles.append((lots[i], self.orientation[i]))
+            self.successfully_parked.append([self.parking_rects[lots[i]], int(self.orientation[i])])
+
+        if self.needs_pixels():
+            self.sync_agent_dicts()
+            self.fill_surface()
+        obs = self.get_array_obs()
+        self.alive &= ~(terminated | truncated)
+        if self.render_mode == "human":
+            self.render()
+        return obs, rewards, terminated, truncated
+
+    def reset(self, seed=None, options=None):
+        obs = self.reset_array(seed=seed, options=options)
+        self.agents = list(self.possible_agents)
+        return {agent: obs[i] for i, agent in enumerate(self.possible_agents)}, {agent: {} for agent in self.agents}
+
+    def step(self, actions):
+        agents = self.agents
+        action_array = np.full(self.n_agents, -1, dtype=np.int64)
+        for agent, action in actions.items():
+            action_array[self.agent_index[agent]] = action
+        obs, rewards, terminated, truncated = self.step_array(action_array)
+        index = [self.agent_index[agent] for agent in agents]
+        self.agents = [self.possible_agents[i] for i in np.flatnonzero(self.alive)]
+        return (
+            {agent: obs[i] for agent, i in zip(agents, index)},
+            {agent: float(rewards[i]) for agent, i in zip(agents, index)},
+            {agent: bool(terminated[i]) for agent, i in zip(agents, index)},
+            {agent: bool(truncated[i]) for agent, i in zip(agents, index)},
+            {agent: {} for agent in agents},
+        )
+
+    def sync_agent_dicts(self):
+        """Mirror the arrays into the rect/orientation dicts the renderer draws from."""
+        self.agents = [self.possible_agents[i] for i in np.flatnonzero(self.alive)]
+        self.agent_rects = {
+            agent: pygame.Rect(int(self.car_x[i]), int(self.car_y[i]), TILE_SIZE, TILE_SIZE)
+            for i, agent in enumerate(self.possible_agents) if self.alive[i]
+        }
+        self.agent_orientations = {
+            agent: int(self.orientation[self.agent_index[agent]]) for agent in self.agents
+        }
+
+    def build_static_grid(self):
+        grid = np.zeros((self.grid_height, self.grid_width, len(GRID_CHANNELS)), dtype=np.uint8)
+        grid[:, :, CH_LOT] = (self.lot_grid >= 0).reshape(self.grid_height, self.grid_width)
+        grid[:, :, CH_OBSTACLE] = self.obstacle_grid.reshape(self.grid_height, self.grid_width)
+        return grid
+
+    def get_array_obs(self):
+        if self.obs_mode != "grid":
+            # Every agent sees the same frame: broadcast one copy of it (or, with reuse_obs_buffer, the canvas)
+            image = self.image if self.reuse_obs_buffer else self.image.copy()
+            return np.broadcast_to(image, (self.n_agents,) + image.shape)
+        size = self.grid_width * self.grid_height
+        tiles = self.tiles()
+        # Agents that just parked are counted through parked_tiles only
+        counts = np.bincount(tiles[self.alive & ~self.parked_now], minlength=size)
+        for lot, _ in self.parked_tiles:
+            rect = self.parking_rects[lot]
+            counts[(rect.y // TILE_SIZE) * self.grid_width + rect.x // TILE_SIZE] += 1
+        obs = np.empty((self.n_agents,) + self.static_grid.shape, dtype=np.uint8)
+        obs[:] = self.static_grid
+        flat = obs.reshape(self.n_agents, size, len(GRID_CHANNELS))
+        flat[:, :, CH_OTHER] = counts > 0
+        # An agent does not count itself on its own tile
+        agents = np.arange(self.n_agents)
+        flat[agents, tiles, CH_OTHER] = (counts[tiles] - self.alive) > 0
+        flat[agents, tiles, self.orientation] = 1
+        return obs
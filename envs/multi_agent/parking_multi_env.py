@@ -1,5 +1,4 @@
 import copy
-import random
 import numpy as np
 import pygame
 from gymnasium import spaces
@@ -7,10 +6,16 @@ from pettingzoo import ParallelEnv
 from pettingzoo.utils import parallel_to_aec, wrappers
 
 from envs.base_env import BaseParkingEnv
+from envs.grid_obs import OBS_MODES, CH_OTHER, grid_observation_space, rect_to_tile, static_grid, car_grid
+from envs.multi_agent.occupancy import OccupancyGrid, tile_of
+from envs.renderer import make_renderer
+from utils.kinematics import clip_rect, move_rect
+from utils.layout_bank import multi_layout_dtype
 from utils.utils import (
     STATE_WIDTH, STATE_HEIGHT, TILE_SIZE,
     CAR_WIDTH, CAR_HEIGHT, NUMBER_OF_ACTIONS, NO_OF_OBSTACLES,
-    grid_to_pixels, GRAY, YELLOW, CAR_SPEED
+    GRID_WIDTH, GRID_HEIGHT, ORIENTATIONS, grid_to_pixels, sample_free_tiles,
+    GRAY, YELLOW
 )
 
 NO_OF_AGENTS = 4
@@ -30,123 +35,208 @@ def raw_env(render_mode=None):
     return environment
 
 class ParkingMultiEnv(ParallelEnv, BaseParkingEnv):
-    metadata = {"render_modes": ["human"], "name": "parking_multi_v0"}
+    metadata = {"render_modes": ["human", "rgb_array"], "name": "parking_multi_v0", "render_fps": 30}
+    PROFILE_PHASES = {
+        "step": "step", "reset": "reset", "move": "move_agent", "collide": "resolve_agent",
+        "render": "fill_surface", "copy": "renderer.copy_dirty", "obs": "get_observations",
+    }
 
-    def __init__(self, render_mode=None):
+    def __init__(
+        self, render_mode=None, render_backend="pygame", obs_mode="pixels", n_agents=NO_OF_AGENTS,
+        n_lots=NO_OF_LOTS, n_obstacles=NO_OF_OBSTACLES, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT,
+        layout_bank=None, layout_range=None, reuse_obs_buffer=False
+    ):
         ParallelEnv.__init__(self)
         BaseParkingEnv.__init__(self)
-        self.agents = [f"player_{r}" for r in range(NO_OF_AGENTS)]
+        if n_agents + n_lots + n_obstacles > grid_width * grid_height:
+            raise ValueError(
+                f"{n_agents} agents, {n_lots} lots and {n_obstacles} obstacles do not fit on a "
+                f"{grid_width}x{grid_height} grid"
+            )
+        self.n_agents = n_agents
+        self.n_lots = n_lots
+        self.n_obstacles = n_obstacles
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.screen_width = grid_width * TILE_SIZE
+        self.screen_height = grid_height * TILE_SIZE
+        self.occupancy = OccupancyGrid()
+        self.set_layout_bank(layout_bank, layout_range, multi_layout_dtype(n_agents, n_lots, n_obstacles))
+        self.agents = [f"player_{r}" for r in range(n_agents)]
         self.agent_rects = {}
         self.agent_orientations = {}
         self.parking_rects = []
         self.obstacle_rects = []
         self.possible_agents = self.agents[:]
         self.successfully_parked = []
+        # Agents that parked this step: still live for its observations, but already in successfully_parked
+        self.parked_agents = set()
+        assert obs_mode in OBS_MODES
         self.render_mode = render_mode
-        self.window = None
-        self.off_screen_surface = None
-        self.image = None
-        self.clock = None
+        self.obs_mode = obs_mode
+        # With reuse_obs_buffer, pixel observations are the renderer's canvas, redrawn by the next step
+        self.reuse_obs_buffer = reuse_obs_buffer
+        self.static_grid = None
+        self.renderer = make_renderer(
+            render_backend, width=self.screen_width, height=self.screen_height, background=GRAY
+        )
         self.isopen = True
         self.time_step = 0
-        self.prng = None
         self.car_images = None
         self.obstacle_image = None
 
     def get_random_orientation(self, no_of_agents):
-        orientations = []
-        while len(orientations) < no_of_agents:
-            orientations.append(self.prng.choice(["up", "down", "left", "right"]))
-        return orientations
+        return [self.prng.randrange(len(ORIENTATIONS)) for _ in range(no_of_agents)]
 
     def get_random_positions(self, num_rectangles, occupied_rects):
-        generated_rects = []
-        while len(generated_rects) < num_rectangles:
-            new_rect = self.get_random_position(occupied_rects + generated_rects)
-            generated_rects.append(new_rect)
-        return generated_rects
+        # Rects are whole tiles; draw distinct free tiles in one pass instead of retrying on overlap
+        occupied_tiles = [tile_of(rect) for rect in occupied_rects]
+        tiles = sample_free_tiles(num_rectangles, occupied_tiles, self.prng, self.grid_width, self.grid_height)
+        return [pygame.Rect(grid_to_pixels(*tile), (TILE_SIZE, TILE_SIZE)) for tile in tiles]
 
     def get_random_position(self, occupied_rects):
-        while True:
-            tile = (
-                self.prng.randint(0, STATE_WIDTH // TILE_SIZE - 1),
-                self.prng.randint(0, STATE_HEIGHT // TILE_SIZE - 1)
-            )
-            rect = pygame.Rect(grid_to_pixels(*tile), (TILE_SIZE, TILE_SIZE))
-            overlap = any(rect.colliderect(existing) for existing in occupied_rects)
-            if not overlap:
-                return rect
+        return self.get_random_positions(1, occupied_rects)[0]
 
     def action_space(self, agent):
         return spaces.Discrete(NUMBER_OF_ACTIONS)
 
     def observation_space(self, agent):
-        return spaces.Box(low=0, high=255, shape=(STATE_WIDTH, STATE_HEIGHT, 3), dtype=np.uint8)
+        if self.obs_mode == "grid":
+            return grid_observation_space(self.grid_width, self.grid_height)
+        return spaces.Box(low=0, high=255, shape=(self.screen_width, self.screen_height, 3), dtype=np.uint8)
 
     def state(self):
+        if self.obs_mode == "grid":
+            grid = self.static_grid.copy()
+            grid[:, :, CH_OTHER] = self.car_counts() > 0
+            return grid
         return self.image
 
-    def fill_surface(self):
-        if self.car_images is None:
-            self.car_images = [
-                pygame.image.load("assets/car-up.png"),
-                pygame.image.load("assets/car-down.png"),
-                pygame.image.load("assets/car-left.png"),
-                pygame.image.load("assets/car-right.png")
-            ]
-        if self.obstacle_image is None:
-            self.obstacle_image = pygame.image.load("assets/obstacle.png")
-        pygame.init()
-        pygame.display.init()
-        self.off_screen_surface = pygame.Surface((STATE_WIDTH, STATE_HEIGHT))
-        self.off_screen_surface.fill(GRAY)
-        for rect in self.parking_rects:
-            pygame.draw.rect(self.off_screen_surface, YELLOW, rect)
-        for rect in self.obstacle_rects:
-            self.off_screen_surface.blit(self.obstacle_image, rect)
-        # render agents
+    def needs_pixels(self):
+        return self.obs_mode == "pixels" or self.render_mode is not None
+
+    def car_counts(self):
+        """Number of cars, moving or parked, on each tile; an agent that just parked counts once."""
+        counts = np.zeros((self.grid_height, self.grid_width), dtype=np.int32)
         for agent in self.agents:
-            orientation = self.agent_orientations[agent]
-            idx = ["up", "down", "left", "right"].index(orientation)
-            car_sprite = self.car_images[idx]
-            self.off_screen_surface.blit(car_sprite, self.agent_rects[agent])
-        for parked_rect, orientation in self.successfully_parked:
-            idx = ["up", "down", "left", "right"].index(orientation)
-            car_sprite = self.car_images[idx]
-            self.off_screen_surface.blit(car_sprite, parked_rect)
-        self.image = pygame.surfarray.array3d(self.off_screen_surface)
-        pygame.event.get()
+            if agent in self.parked_agents:
+                continue
+            counts[rect_to_tile(self.agent_rects[agent], self.grid_width, self.grid_height)] += 1
+        for parked_rect, _ in self.successfully_parked:
+            counts[rect_to_tile(parked_rect, self.grid_width, self.grid_height)] += 1
+        return counts
 
-    def render(self):
-        if self.window is None:
-            self.window = pygame.display.set_mode((STATE_WIDTH, STATE_HEIGHT))
-        if self.clock is None:
-            self.clock = pygame.time.Clock()
-        self.window.blit(self.off_screen_surface, (0, 0))
-        pygame.time.delay(150)
-        pygame.display.flip()
-        self.clock.tick(200)
+    def get_observations(self):
+        if self.obs_mode == "grid":
+            counts = self.car_counts()
+            observations = {}
+            for agent in self.agents:
+                tile = rect_to_tile(self.agent_rects[agent], self.grid_width, self.grid_height)
+                counts[tile] -= 1
+                observations[agent] = car_grid(self.static_grid, self.agent_rects[agent], self.agent_orientations[agent], counts)
+                counts[tile] += 1
+            return observations
+        # One copy shared by every agent; the env never writes to it
+        image = self.image if self.reuse_obs_buffer else self.image.copy()
+        return {i: image for i in self.agents}
 
-    def reset(self, seed=None, options=None):
-        self.prng = random.Random()
-        if seed is not None:
-            self.prng.seed(seed)
+    def fill_surface(self, bake=False):
+        if self.car_images is None or self.obstacle_image is None:
+            self.renderer.load_sprites()
+            self.car_images = self.renderer.car_images
+            self.obstacle_image = self.renderer.obstacle_image
+        # render agents, then cars already parked
+        sprites = [(self.car_images[self.agent_orientations[agent]], self.agent_rects[agent]) for agent in self.agents]
+        sprites += [
+            (self.car_images[orientation], parked_rect)
+            for parked_rect, orientation in self.successfully_parked
+        ]
+        if bake:
+            under = [(YELLOW, rect) for rect in self.parking_rects]
+            under += [(self.obstacle_image, rect) for rect in self.obstacle_rects]
+            self.image = self.renderer.bake(sprites, under=under)
         else:
-            self.prng.seed()
+            self.image = self.renderer.update(sprites)
+        self.off_screen_surface = self.renderer.surface
+
+    def render(self):
+        return self.render_frame()
+
+    def close(self):
+        self.close_window()
+
+    def draw_layout(self, seed=None, options=None):
+        self.seed_prng(seed)
         self.successfully_parked = []
+        self.parked_agents = set()
         self.time_step = 0
         self.agents = copy.copy(self.possible_agents)
-        self.agent_orientations = dict(zip(self.agents, self.get_random_orientation(NO_OF_AGENTS)))
-        self.parking_rects = self.get_random_positions(NO_OF_LOTS, [])
-        self.obstacle_rects = self.get_random_positions(NO_OF_OBSTACLES, self.parking_rects)
-        self.agent_rects = dict(zip(self.agents, self.get_random_positions(NO_OF_AGENTS, self.parking_rects + self.obstacle_rects)))
+        if self.layout_bank is not None:
+            self.apply_bank_layout(options)
+            return
+        self.agent_orientations = dict(zip(self.agents, self.get_random_orientation(self.n_agents)))
+        self.parking_rects = self.get_random_positions(self.n_lots, [])
+        self.obstacle_rects = self.get_random_positions(self.n_obstacles, self.parking_rects)
+        self.agent_rects = dict(zip(self.agents, self.get_random_positions(self.n_agents, self.parking_rects + self.obstacle_rects)))
+
+    def apply_bank_layout(self, options=None):
+        row = self.layout_bank.draw((options or {}).get("layout_index"), prng=self.prng)
+        tile_rects = lambda tiles: [pygame.Rect(grid_to_pixels(*tile), (TILE_SIZE, TILE_SIZE)) for tile in tiles.tolist()]
+        self.parking_rects = tile_rects(row["lots"])
+        self.obstacle_rects = tile_rects(row["obstacles"])
+        self.agent_rects = dict(zip(self.agents, tile_rects(row["agents"])))
+        self.agent_orientations = dict(zip(self.agents, row["orientations"].tolist()))
+
+    def reset(self, seed=None, options=None):
+        self.draw_layout(seed, options)
+        self.occupancy = OccupancyGrid()
+        for index, rect in enumerate(self.parking_rects):
+            self.occupancy.add_lot(rect, index)
+        for rect in self.obstacle_rects:
+            self.occupancy.add_obstacle(rect)
+        for agent, rect in self.agent_rects.items():
+            self.occupancy.place(agent, rect)
         infos = {i: {} for i in self.agents}
-        self.fill_surface()
-        observations = {i: self.image for i in self.agents}
+        if self.obs_mode == "grid":
+            self.static_grid = static_grid(self.parking_rects, self.obstacle_rects, self.grid_width, self.grid_height)
+        if self.needs_pixels():
+            self.fill_surface(bake=True)
+        observations = self.get_observations()
         if self.render_mode == "human":
             self.render()
         return observations, infos
 
+    def move_agent(self, agent, action):
+        """Apply one agent's action, clip it to the board and update the occupancy index."""
+        rect = self.agent_rects[agent]
+        self.agent_orientations[agent] = move_rect(rect, self.agent_orientations[agent], action)
+        clip_rect(rect, self.screen_width, self.screen_height)
+        self.occupancy.move(agent, rect)
+        return rect
+
+    def resolve_agent(self, agent, rect, live_agents, rewards, terminated, agents_to_remove):
+        # Check collisions against whoever shares the tile
+        for other_agent in self.occupancy.cars_at(rect):
+            if agent != other_agent and other_agent in live_agents:
+                rewards[agent] -= 500
+                rewards[other_agent] -= 500
+                terminated[agent] = True
+                terminated[other_agent] = True
+                agents_to_remove.add(agent)
+                agents_to_remove.add(other_agent)
+        if self.occupancy.obstacle_at(rect):
+            rewards[agent] -= 500
+            terminated[agent] = True
+            agents_to_remove.add(agent)
+        lot = self.occupancy.lot_at(rect)
+        if lot is not None:
+            rewards[agent] += 2000
+            terminated[agent] = True
+            agents_to_remove.add(agent)
+            self.successfully_parked.append([self.parking_rects[lot], self.agent_orientations[agent]])
+            self.parked_agents.add(agent)
+        rewards[agent] -= 1
+
     def step(self, actions):
         rewards = {i: 0 for i in self.agents}
         terminated = {i: False for i in self.agents}
@@ -156,69 +246,20 @@ class ParkingMultiEnv(ParallelEnv, BaseParkingEnv):
         if self.time_step >= MAX_EPISODE_LENGTH:
             self.agents = []
         agents_to_remove = set()
+        self.parked_agents = set()
+        live_agents = set(self.agents)
         for agent in actions.keys():
-            action = actions[agent]
-            # Move logic as above (see feature env for reference)
-            if action == 3:  # straight
-                orientation = self.agent_orientations[agent]
-                if orientation == "up":
-                    self.agent_rects[agent].y -= CAR_SPEED
-                elif orientation == "down":
-                    self.agent_rects[agent].y += CAR_SPEED
-                elif orientation == "left":
-                    self.agent_rects[agent].x -= CAR_SPEED
-                elif orientation == "right":
-                    self.agent_rects[agent].x += CAR_SPEED
-            elif action == 4:  # backwards
-                orientation = self.agent_orientations[agent]
-                if orientation == "up":
-                    self.agent_rects[agent].y += CAR_SPEED
-                elif orientation == "down":
-                    self.agent_rects[agent].y -= CAR_SPEED
-                elif orientation == "left":
-                    self.agent_rects[agent].x += CAR_SPEED
-                elif orientation == "right":
-                    self.agent_rects[agent].x -= CAR_SPEED
-            elif action == 1:  # turn left
-                cur = self.agent_orientations[agent]
-                turns = {"up": "left", "down": "right", "left": "down", "right": "up"}
-                self.agent_orientations[agent] = turns[cur]
-            elif action == 2:  # turn right
-                cur = self.agent_orientations[agent]
-                turns = {"up": "right", "down": "left", "left": "up", "right": "down"}
-                self.agent_orientations[agent] = turns[cur]
-            # Clip to board
-            self.agent_rects[agent].left = max(0, self.agent_rects[agent].left)
-            self.agent_rects[agent].right = min(STATE_WIDTH, self.agent_rects[agent].right)
-            self.agent_rects[agent].top = max(0, self.agent_rects[agent].top)
-            self.agent_rects[agent].bottom = min(STATE_HEIGHT, self.agent_rects[agent].bottom)
-            # Check collisions
-            for other_agent in self.agents:
-                if agent != other_agent and self.agent_rects[agent].colliderect(self.agent_rects[other_agent]):
-                    rewards[agent] -= 500
-                    rewards[other_agent] -= 500
-                    terminated[agent] = True
-                    terminated[other_agent] = True
-                    agents_to_remove.add(agent)
-                    agents_to_remove.add(other_agent)
-            for obstacle_rect in self.obstacle_rects:
-                if self.agent_rects[agent].colliderect(obstacle_rect):
-                    rewards[agent] -= 500
-                    terminated[agent] = True
-                    agents_to_remove.add(agent)
-            for parking_rect in self.parking_rects:
-                if self.agent_rects[agent].colliderect(parking_rect):
-                    rewards[agent] += 2000
-                    terminated[agent] = True
-                    agents_to_remove.add(agent)
-                    self.successfully_parked.append([parking_rect, self.agent_orientations[agent]])
-            rewards[agent] -= 1
-        self.fill_surface()
-        observations = {i: self.image for i in self.agents}
+            rect = self.move_agent(agent, actions[agent])
+            self.resolve_agent(agent, rect, live_agents, rewards, terminated, agents_to_remove)
+        if self.needs_pixels():
+            self.fill_surface()
+        observations = self.get_observations()
         for agent in agents_to_remove:
             del self.agent_rects[agent]
             del self.agent_orientations[agent]
-            self.agents.remove(agent)
+            self.occupancy.remove(agent)
+            if agent in self.agents:
+                self.agents.remove(agent)
         if self.render_mode == "human":
             self.render()
         return observations, rewards, terminated, truncated, infos
\ No newline at end of file
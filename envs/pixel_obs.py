@@ -0,0 +1,149 @@
+from collections import OrderedDict
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from utils.utils import STATE_WIDTH, STATE_HEIGHT
+
+# Same luminance weights as gymnasium's GrayscaleObservation
+GRAY_WEIGHTS = np.array([0.2125, 0.7154, 0.0721])
+
+
+class PixelObservation:
+    """
+    Turns the renderer's full-size (x, y, rgb) canvas into a downsampled,
+    optionally grayscale, HWC or CHW observation.
+
+    Each output pixel is the mean of a `scale` x `scale` block of the canvas.
+    After a reset only the blocks under the renderer's dirty areas are
+    recomputed, so a step costs a few small blocks rather than a full resize.
+    The returned buffer is updated in place until the next reset.
+    """
+
+    def __init__(self, resolution=STATE_WIDTH, grayscale=False, channel_first=False):
+        if STATE_WIDTH % resolution or STATE_HEIGHT % resolution:
+            raise ValueError(f"resolution must divide the {STATE_WIDTH}x{STATE_HEIGHT} board, got {resolution}")
+        self.resolution = resolution
+        self.scale = STATE_WIDTH // resolution
+        self.grayscale = grayscale
+        self.channel_first = channel_first
+        self.channels = 1 if grayscale else 3
+        self.buffer = None
+
+    @property
+    def shape(self):
+        if self.channel_first:
+            return (self.channels, self.resolution, self.resolution)
+        return (self.resolution, self.resolution, self.channels)
+
+    def observation_space(self):
+        return spaces.Box(low=0, high=255, shape=self.shape, dtype=np.uint8)
+
+    def reset(self, image):
+        self.buffer = np.empty(self.shape, dtype=np.uint8)
+        self.update(image, [(0, 0, STATE_WIDTH, STATE_HEIGHT)])
+        return self.buffer
+
+    def update(self, image, dirty):
+        # (y, x, c) view of the buffer so block writes don't care about the output layout
+        rows_cols = self.buffer.transpose(1, 2, 0) if self.channel_first else self.buffer
+        scale = self.scale
+        for area in dirty:
+            x, y, w, h = tuple(area)
+            # Grow the area to whole blocks
+            bx0, by0 = x // scale, y // scale
+            bx1, by1 = -(-(x + w) // scale), -(-(y + h) // scale)
+            block = image[bx0 * scale:bx1 * scale, by0 * scale:by1 * scale].astype(np.float32)
+            if self.grayscale:
+                block = block @ GRAY_WEIGHTS.astype(np.float32)
+                block = block[..., None]
+            block = block.reshape(bx1 - bx0, scale, by1 - by0, scale, self.channels).mean(axis=(1, 3))
+            rows_cols[by0:by1, bx0:bx1] = block.transpose(1, 0, 2).astype(np.uint8)
+        return self.buffer
+
+
+class FrameCache:
+    """
+    Bounded LRU of observations keyed by the state that produced them.
+
+    Stored frames are read-only copies and hits return the stored array itself,
+    so every holder shares one copy. `max_frames` bounds the count, not the
+    bytes; size it for the observation (a 90x90 gray frame is 8 KB, a full
+    720x720 RGB one 1.5 MB).
+    """
+
+    def __init__(self, max_frames):
+        self.max_frames = max_frames
+        self.frames = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        frame = self.frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.frames.move_to_end(key)
+        self.hits += 1
+        return frame
+
+    def put(self, key, frame):
+        frame = frame.copy()
+        frame.flags.writeable = False
+        self.frames[key] = frame
+        if len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+        return frame
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "frames": len(self.frames)}
+
+
+class SharedFrameStack(gym.Wrapper):
+    """
+    Stacks the last `n_stack` observations along the channel axis without copying
+    the whole stack every step.
+
+    Frames live in a ring buffer of 2 * n_stack slots; each new frame is written
+    twice (at i and i + n_stack) so the stack is always the contiguous slice
+    [i + 1, i + 1 + n_stack) and can be returned as a view. The view is valid until
+    the next step; reset allocates a fresh ring so terminal observations survive auto-resets.
+    """
+
+    def __init__(self, env, n_stack=4, channel_first=True):
+        super().__init__(env)
+        self.n_stack = n_stack
+        self.channel_first = channel_first
+        space = env.observation_space
+        axis = 0 if channel_first else -1
+        low = np.repeat(space.low, n_stack, axis=axis)
+        high = np.repeat(space.high, n_stack, axis=axis)
+        self.observation_space = spaces.Box(low=low, high=high, dtype=space.dtype)
+        self.frame_shape = space.shape
+        self.ring = None
+        self.index = 0
+
+    def _stacked(self):
+        frames = self.ring[self.index + 1:self.index + 1 + self.n_stack]
+        if self.channel_first:
+            return frames.reshape(self.observation_space.shape)
+        # (n, h, w, c) -> (h, w, n * c); moving the stack axis needs a copy for channel-last
+        return np.concatenate(frames, axis=-1)
+
+    def _push(self, frame):
+        self.index = (self.index + 1) % self.n_stack
+        self.ring[self.index] = frame
+        self.ring[self.index + self.n_stack] = frame
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self.ring = np.empty((2 * self.n_stack,) + self.frame_shape, dtype=self.observation_space.dtype)
+        self.ring[:] = obs
+        self.index = 0
+        return self._stacked(), info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._push(obs)
+        return self._stacked(), reward, terminated, truncated, info
@@ -0,0 +1,140 @@
+import os
+from collections import Counter
+
+import numpy as np
+
+from utils.utils import STATE_WIDTH, STATE_HEIGHT, GRAY, ORIENTATIONS, ASSETS_DIR
+
+
+class Sprite:
+    """
+    A decoded RGBA sprite in pygame.surfarray layout (x, y, channel).
+    Blending reproduces pygame's per-pixel alpha blit bit for bit:
+    out = (((src - dst) * a + src) >> 8) + dst
+    """
+
+    def __init__(self, rgba):
+        rgba = np.asarray(rgba, dtype=np.int32)
+        self.width, self.height = rgba.shape[:2]
+        self.rgb = rgba[:, :, :3]
+        self.alpha = rgba[:, :, 3:]
+        # Precompute src * (a + 1) so blending is a multiply, a shift and two adds
+        self.weighted = self.rgb * (self.alpha + 1)
+        self.opaque = bool((self.alpha == 255).all())
+
+    def blend_into(self, dst, sx, sy):
+        w, h = dst.shape[:2]
+        if self.opaque:
+            dst[:] = self.rgb[sx:sx + w, sy:sy + h]
+            return
+        d = dst.astype(np.int32)
+        dst[:] = ((self.weighted[sx:sx + w, sy:sy + h] - d * self.alpha[sx:sx + w, sy:sy + h]) >> 8) + d
+
+
+def load_sprite(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        rgba = np.asarray(image.convert("RGBA"))
+    return Sprite(rgba.transpose(1, 0, 2))
+
+
+def load_car_sprites(asset_folder=ASSETS_DIR):
+    return [load_sprite(os.path.join(asset_folder, f"car-{orientation}.png")) for orientation in ORIENTATIONS]
+
+
+def load_obstacle_sprite(asset_folder=ASSETS_DIR):
+    return load_sprite(os.path.join(asset_folder, "obstacle.png"))
+
+
+def footprint(source, rect):
+    """(x, y, w, h) touched when drawing `source` (a Sprite or a fill color) at `rect`."""
+    x, y, w, h = tuple(rect)
+    if isinstance(source, Sprite):
+        return x, y, source.width, source.height
+    return x, y, w, h
+
+
+def intersect(a, b):
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def draw_item(canvas, source, rect, area):
+    box = footprint(source, rect)
+    clipped = intersect(box, area)
+    if clipped is None:
+        return
+    x0, y0, w, h = clipped
+    dst = canvas[x0:x0 + w, y0:y0 + h]
+    if isinstance(source, Sprite):
+        source.blend_into(dst, x0 - box[0], y0 - box[1])
+    else:
+        dst[:] = source
+
+
+class NumpyRenderer:
+    """
+    Drop-in for ParkingRenderer that composites frames with NumPy slicing and
+    alpha masks instead of pygame surfaces, so no SDL subsystem is touched.
+    Sprites are decoded once from the assets folder; frames match the pygame path byte for byte.
+    """
+
+    def __init__(self, width=STATE_WIDTH, height=STATE_HEIGHT, background=GRAY, asset_folder=ASSETS_DIR):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.bounds = (0, 0, width, height)
+        self.asset_folder = asset_folder
+        self.car_images = None
+        self.obstacle_image = None
+        self.surface = None
+        self.static_layer = None
+        self.image = None
+        self.under = []
+        self.over = []
+        self.sprites = []
+        self.dirty = []
+
+    def load_sprites(self):
+        if self.car_images is None:
+            self.car_images = load_car_sprites(self.asset_folder)
+        if self.obstacle_image is None:
+            self.obstacle_image = load_obstacle_sprite(self.asset_folder)
+
+    def bake(self, sprites, under=(), over=()):
+        """Draw a new layout from scratch and allocate a fresh observation buffer."""
+        self.under = [(source, tuple(rect)) for source, rect in under]
+        self.over = [(source, tuple(rect)) for source, rect in over]
+        self.static_layer = np.empty((self.width, self.height, 3), dtype=np.uint8)
+        self.static_layer[:] = self.background
+        for source, rect in self.under:
+            draw_item(self.static_layer, source, rect, self.bounds)
+        self.image = self.static_layer.copy()
+        self.sprites = [(source, tuple(rect)) for source, rect in sprites]
+        for source, rect in self.sprites + self.over:
+            draw_item(self.image, source, rect, self.bounds)
+        self.dirty = [self.bounds]
+        return self.image
+
+    def update(self, sprites):
+        """Move sprites to their new rects, repainting only what changed."""
+        sprites = [(source, tuple(rect)) for source, rect in sprites]
+        # Compare as multisets: a sprite drawn twice at the same spot blends differently than once
+        old = Counter(self.sprites)
+        new = Counter(sprites)
+        self.sprites = sprites
+        changed = list((old - new) + (new - old))
+        dirty = [intersect(footprint(source, rect), self.bounds) for source, rect in changed]
+        self.dirty = [area for area in dirty if area is not None]
+        for area in self.dirty:
+            self.repaint(area)
+        return self.image
+
+    def repaint(self, area):
+        x0, y0, w, h = area
+        self.image[x0:x0 + w, y0:y0 + h] = self.static_layer[x0:x0 + w, y0:y0 + h]
+        for source, rect in self.sprites + self.over:
+            draw_item(self.image, source, rect, area)
@@ -0,0 +1,119 @@
+from collections import Counter
+
+import pygame
+
+from utils.utils import (
+    STATE_WIDTH, STATE_HEIGHT, GRAY, ASSETS_DIR, load_car_images, load_obstacle_image
+)
+
+
+def footprint(source, rect):
+    """Pixel area touched when drawing `source` (a Surface or a fill color) at `rect`."""
+    if isinstance(source, pygame.Surface):
+        return source.get_rect(topleft=rect.topleft)
+    return pygame.Rect(rect)
+
+
+def draw_item(surface, source, rect):
+    if isinstance(source, pygame.Surface):
+        surface.blit(source, rect)
+    else:
+        pygame.draw.rect(surface, source, rect)
+
+
+class ParkingRenderer:
+    """
+    Off-screen renderer shared by the pixel envs.
+
+    A frame is drawn as: background, `under` items, moving sprites, `over` items.
+    The static part (background + under) is baked once per layout; after that each
+    frame only repaints the areas sprites left or entered, and copies just those
+    pixels into the preallocated observation buffer.
+
+    Items are `(source, rect)` pairs where source is a Surface to blit or an RGB
+    color to fill. The observation buffer is updated in place between bakes, so
+    copy it if a frame has to outlive the next update.
+    """
+
+    def __init__(self, width=STATE_WIDTH, height=STATE_HEIGHT, background=GRAY, asset_folder=ASSETS_DIR):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.bounds = pygame.Rect(0, 0, width, height)
+        self.asset_folder = asset_folder
+        self.car_images = None
+        self.obstacle_image = None
+        self.surface = None
+        self.static_layer = None
+        self.image = None
+        self.under = []
+        self.over = []
+        self.sprites = []
+        self.dirty = []
+
+    def load_sprites(self):
+        if self.car_images is None:
+            self.car_images = load_car_images(self.asset_folder)
+        if self.obstacle_image is None:
+            self.obstacle_image = load_obstacle_image(self.asset_folder)
+
+    def bake(self, sprites, under=(), over=()):
+        """Draw a new layout from scratch and allocate a fresh observation buffer."""
+        self.under = [(source, pygame.Rect(rect)) for source, rect in under]
+        self.over = [(source, pygame.Rect(rect)) for source, rect in over]
+        self.static_layer = pygame.Surface((self.width, self.height))
+        self.static_layer.fill(self.background)
+        for source, rect in self.under:
+            draw_item(self.static_layer, source, rect)
+        self.surface = self.static_layer.copy()
+        self.sprites = [(source, pygame.Rect(rect)) for source, rect in sprites]
+        for source, rect in self.sprites + self.over:
+            draw_item(self.surface, source, rect)
+        self.image = pygame.surfarray.array3d(self.surface)
+        self.dirty = [pygame.Rect(self.bounds)]
+        return self.image
+
+    def update(self, sprites):
+        """Move sprites to their new rects, repainting only what changed."""
+        sprites = [(source, pygame.Rect(rect)) for source, rect in sprites]
+        # Compare as multisets: a sprite drawn twice at the same spot blends differently than once
+        old = Counter((source, tuple(rect)) for source, rect in self.sprites)
+        new = Counter((source, tuple(rect)) for source, rect in sprites)
+        self.sprites = sprites
+        changed = list((old - new) + (new - old))
+        dirty = [footprint(source, pygame.Rect(rect)).clip(self.bounds) for source, rect in changed]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        self.dirty = dirty
+        for area in dirty:
+            self.repaint(area)
+        if dirty:
+            self.copy_dirty(dirty)
+        return self.image
+
+    def copy_dirty(self, dirty):
+        """Copy the repainted areas from the surface into the observation buffer."""
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        for area in dirty:
+            self.image[area.left:area.right, area.top:area.bottom] = pixels[area.left:area.right, area.top:area.bottom]
+        del pixels
+
+    def repaint(self, area):
+        self.surface.blit(self.static_layer, area, area)
+        self.surface.set_clip(area)
+        for source, rect in self.sprites + self.over:
+            if footprint(source, rect).colliderect(area):
+                draw_item(self.surface, source, rect)
+        self.surface.set_clip(None)
+
+
+RENDER_BACKENDS = ["pygame", "numpy"]
+
+
+def make_renderer(backend="pygame", **kwargs):
+    """Build the renderer for `backend`: "pygame" surfaces or the SDL-free "numpy" rasterizer."""
+    if backend == "pygame":
+        return ParkingRenderer(**kwargs)
+    if backend == "numpy":
+        from envs.raster import NumpyRenderer
+        return NumpyRenderer(**kwargs)
+    raise ValueError(f"Unknown render backend {backend!r}, expected one of {RENDER_BACKENDS}")
@@ -0,0 +1,188 @@
+import multiprocessing as mp
+import os
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+from stable_baselines3.common.vec_env.patch_gym import _patch_env
+
+# Slots of the shared observation block: latest observation, and the terminal one of a finished episode
+OBS_SLOT = 0
+TERMINAL_SLOT = 1
+
+
+def available_cpus():
+    """Cores this process may run on (respects taskset/cgroup affinity where the OS reports it)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _attach_shared_memory(name):
+    """
+    Open the parent's segment without taking ownership; the parent alone unlinks it. Before
+    3.13 attaching always registers the name, which lands in the parent's resource tracker
+    (workers share it, see `SharedMemoryVecEnv.__init__`) as a duplicate of its own entry.
+    Unregistering here would drop the parent's entry too, so only `track=False` opts out.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+def _shm_worker(remote, parent_remote, env_fn_wrapper, index, cpus):
+    """SubprocVecEnv's worker loop, except observations go into shared memory instead of the pipe."""
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    env = _patch_env(env_fn_wrapper.var())
+    shm = obs_view = terminal_view = None
+    reset_info = {}
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                observation, reward, terminated, truncated, info = env.step(data)
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                if done:
+                    terminal_view[...] = observation
+                    observation, reset_info = env.reset()
+                obs_view[...] = observation
+                remote.send((reward, done, info, reset_info))
+            elif cmd == "reset":
+                maybe_options = {"options": data[1]} if data[1] else {}
+                observation, reset_info = env.reset(seed=data[0], **maybe_options)
+                obs_view[...] = observation
+                remote.send(reset_info)
+            elif cmd == "attach":
+                name, shape, dtype = data
+                shm = _attach_shared_memory(name)
+                block = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                obs_view, terminal_view = block[OBS_SLOT, index], block[TERMINAL_SLOT, index]
+                del block
+                remote.send(None)
+            elif cmd == "render":
+                remote.send(env.render())
+            elif cmd == "close":
+                env.close()
+                obs_view = terminal_view = None
+                if shm is not None:
+                    shm.close()
+                remote.close()
+                break
+            elif cmd == "get_spaces":
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == "env_method":
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == "has_attr":
+                try:
+                    env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class SharedMemoryVecEnv(SubprocVecEnv):
+    """
+    SubprocVecEnv whose workers write observations straight into one shared-memory
+    block of preallocated (2, n_envs, *obs_shape) arrays: the latest observation of
+    every env, plus the terminal observation of any episode that just ended. Only
+    actions, rewards, dones and infos cross the pipes, so a step no longer pickles
+    a full frame per env.
+
+    `cpu_affinity` pins workers to cores: "auto" spreads them round-robin over
+    `available_cpus()`, a list gives each worker's core set, None leaves scheduling
+    to the OS. Observations must be a single Box.
+    """
+
+    def __init__(self, env_fns, start_method=None, cpu_affinity=None):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+        if cpu_affinity == "auto":
+            cpus = available_cpus()
+            cpu_affinity = [[cpus[i % len(cpus)]] for i in range(n_envs)]
+        elif cpu_affinity is None:
+            cpu_affinity = [None] * n_envs
+
+        # Start the tracker before the workers: forked ones would otherwise each start their own,
+        # which then reports the parent's segment as leaked and unlinks it a second time
+        resource_tracker.ensure_running()
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(self.work_remotes, self.remotes, env_fns)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), index, cpu_affinity[index])
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_shm_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space = self.remotes[0].recv()
+        if not isinstance(observation_space, spaces.Box):
+            self._stop_workers()
+            raise ValueError(f"SharedMemoryVecEnv needs a Box observation space, got {observation_space}")
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+
+        shape = (2, n_envs) + observation_space.shape
+        dtype = np.dtype(observation_space.dtype)
+        self.shm = SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self.buffers = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        for remote in self.remotes:
+            remote.send(("attach", (self.shm.name, shape, dtype.str)))
+        for remote in self.remotes:
+            remote.recv()
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rewards, dones, infos, self.reset_infos = zip(*results)
+        for index, done in enumerate(dones):
+            if done:
+                infos[index]["terminal_observation"] = self.buffers[TERMINAL_SLOT, index].copy()
+        # Copy out: the workers overwrite the block on the next step while callers may still hold this batch
+        return self.buffers[OBS_SLOT].copy(), np.stack(rewards), np.stack(dones), infos
+
+    def reset(self):
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(("reset", (self._seeds[env_idx], self._options[env_idx])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self._reset_seeds()
+        self._reset_options()
+        return self.buffers[OBS_SLOT].copy()
+
+    def _stop_workers(self):
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        self.buffers = None
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,99 @@
+import numpy as np
+from stable_baselines3.common.buffers import BaseBuffer, ReplayBuffer
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+
+from envs.image_based.parking_image_env import ParkingImage, STATE_DTYPE, STATE_SIZE
+
+# Car x, y and orientation come first; everything after is the layout
+LAYOUT_START = 3
+
+
+class StateReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer for ParkingImage that stores each transition's compact state
+    (a few int16s) instead of its frames, and re-renders the observations when a
+    batch is sampled. Buffer RAM and `save_replay_buffer` checkpoints shrink from
+    frame size to STATE_SIZE integers per transition.
+
+    The envs must be built with `record_states=True` so every step info carries
+    "state" and "next_state", and without frame stacking. `env_kwargs` are the
+    ParkingImage arguments that shape observations (resolution, grayscale, ...);
+    a private env built from them does the rendering.
+    """
+
+    def __init__(
+        self, buffer_size, observation_space, action_space, device="auto", n_envs=1,
+        optimize_memory_usage=False, handle_timeout_termination=True, env_kwargs=None
+    ):
+        # Skip ReplayBuffer.__init__, which would allocate the frame arrays this buffer avoids
+        BaseBuffer.__init__(self, buffer_size, observation_space, action_space, device, n_envs=n_envs)
+        if optimize_memory_usage:
+            raise ValueError("StateReplayBuffer already stores transitions compactly; use optimize_memory_usage=False")
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+        self.states = np.zeros((self.buffer_size, self.n_envs, STATE_SIZE), dtype=STATE_DTYPE)
+        self.next_states = np.zeros((self.buffer_size, self.n_envs, STATE_SIZE), dtype=STATE_DTYPE)
+        self.actions = np.zeros(
+            (self.buffer_size, self.n_envs, self.action_dim), dtype=self._maybe_cast_dtype(action_space.dtype)
+        )
+        self.rewards = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.dones = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.timeouts = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.env_kwargs = env_kwargs or {}
+        self.render_env = None
+
+    def __getstate__(self):
+        # The render env holds pygame surfaces; it is rebuilt on the first sample after loading
+        state = self.__dict__.copy()
+        state["render_env"] = None
+        return state
+
+    def add(self, obs, next_obs, action, reward, done, infos):
+        self.states[self.pos] = [info["state"] for info in infos]
+        self.next_states[self.pos] = [info["next_state"] for info in infos]
+        self.actions[self.pos] = np.array(action).reshape((self.n_envs, self.action_dim))
+        self.rewards[self.pos] = np.array(reward)
+        self.dones[self.pos] = np.array(done)
+        if self.handle_timeout_termination:
+            self.timeouts[self.pos] = np.array([info.get("TimeLimit.truncated", False) for info in infos])
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def render_transitions(self, states, next_states):
+        """Observations for each (state, next_state) pair, drawn in layout order so shared layouts bake once."""
+        if self.render_env is None:
+            # Rendered frames are copied into the batch straight away
+            self.render_env = ParkingImage(**{**self.env_kwargs, "reuse_obs_buffer": True})
+            if self.render_env.observation_space.shape != self.obs_shape:
+                raise ValueError(
+                    f"env_kwargs give {self.render_env.observation_space.shape} observations, "
+                    f"the buffer expects {self.obs_shape}"
+                )
+        obs = np.empty((len(states),) + self.obs_shape, dtype=self.observation_space.dtype)
+        next_obs = np.empty_like(obs)
+        layouts = states[:, LAYOUT_START:]
+        previous = None
+        for i in np.lexsort(layouts.T[::-1]):
+            layout = layouts[i].tobytes()
+            obs[i] = self.render_env.set_state(states[i], bake=layout != previous)
+            # A transition never leaves its layout: the next state is pre-reset
+            next_obs[i] = self.render_env.set_state(next_states[i], bake=False)
+            previous = layout
+        return obs, next_obs
+
+    def _get_samples(self, batch_inds, env=None):
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        obs, next_obs = self.render_transitions(
+            self.states[batch_inds, env_indices], self.next_states[batch_inds, env_indices]
+        )
+        data = (
+            self._normalize_obs(obs, env),
+            self.actions[batch_inds, env_indices, :],
+            self._normalize_obs(next_obs, env),
+            (self.dones[batch_inds, env_indices] * (1 - self.timeouts[batch_inds, env_indices])).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
@@ -1,9 +1,10 @@
 import pygame
 import sys
 import random
+from utils.kinematics import clip_rect, move_rect
 from utils.utils import (
     STATE_WIDTH, STATE_HEIGHT, TILE_SIZE, CAR_WIDTH, CAR_HEIGHT,
-    BACKGROUND_COLOR, CAR_SPEED
+    BACKGROUND_COLOR, ORIENTATIONS
 )
 
 pygame.init()
@@ -20,6 +21,9 @@ car_images = [
 ]
 obstacle_image = pygame.image.load("assets/obstacle.png")
 
+# Number keys map to the env action ids
+KEY_ACTIONS = {pygame.K_1: 1, pygame.K_2: 2, pygame.K_3: 3, pygame.K_4: 4}
+
 def grid_to_pixels(x, y):
     return x * TILE_SIZE, y * TILE_SIZE
 
@@ -31,7 +35,7 @@ def get_random_car_position():
     return car_rect
 
 def get_random_orientation():
-    return random.choice(["up", "down", "left", "right"])
+    return random.randrange(len(ORIENTATIONS))
 
 def get_random_obstacle_positions():
     obstacle_rects = []
@@ -58,30 +62,8 @@ while True:
             pygame.quit()
             sys.exit()
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_3:
-                if car_orientation == "up":
-                    car_rect.y -= CAR_SPEED
-                elif car_orientation == "down":
-                    car_rect.y += CAR_SPEED
-                elif car_orientation == "left":
-                    car_rect.x -= CAR_SPEED
-                elif car_orientation == "right":
-                    car_rect.x += CAR_SPEED
-            elif event.key == pygame.K_4:
-                if car_orientation == "up":
-                    car_rect.y += CAR_SPEED
-                elif car_orientation == "down":
-                    car_rect.y -= CAR_SPEED
-                elif car_orientation == "left":
-                    car_rect.x += CAR_SPEED
-                elif car_orientation == "right":
-                    car_rect.x -= CAR_SPEED
-            elif event.key == pygame.K_1:
-                mapping = {"up": "left", "down": "right", "left": "down", "right": "up"}
-                car_orientation = mapping[car_orientation]
-            elif event.key == pygame.K_2:
-                mapping = {"up": "right", "down": "left", "left": "up", "right": "down"}
-                car_orientation = mapping[car_orientation]
+            if event.key in KEY_ACTIONS:
+                car_orientation = move_rect(car_rect, car_orientation, KEY_ACTIONS[event.key])
 
             if parking_rect.colliderect(car_rect):
                 print("Game Over - You parked the car!")
@@ -93,15 +75,11 @@ while True:
                     pygame.quit()
                     sys.exit()
 
-            car_rect.left = max(0, car_rect.left)
-            car_rect.right = min(STATE_WIDTH, car_rect.right)
-            car_rect.top = max(0, car_rect.top)
-            car_rect.bottom = min(STATE_HEIGHT, car_rect.bottom)
+            clip_rect(car_rect, STATE_WIDTH, STATE_HEIGHT)
 
     screen.fill(BACKGROUND_COLOR)
     # Draw car
-    idx = ["up", "down", "left", "right"].index(car_orientation)
-    car_sprite = car_images[idx]
+    car_sprite = car_images[car_orientation]
     screen.blit(car_sprite, car_rect)
     # Draw obstacles
     for obstacle_rect in obstacles_rect:
@@ -2,6 +2,9 @@ import pygame
 import sys
 import random
 
+from utils.kinematics import clip_rect, move_rect
+from utils.utils import ORIENTATIONS
+
 # Initialize Pygame
 pygame.init()
 
@@ -14,7 +17,6 @@ CAR_HEIGHT = 60
 CAR_WIDTH = 40
 FPS = 60
 WHITE = (255, 255, 255)
-CAR_SPEED = 60
 NO_OF_OBSTACLES = 6
 
 screen = pygame.display.set_mode((STATE_WIDTH, STATE_HEIGHT))
@@ -28,6 +30,9 @@ car_images = [pygame.image.load("assets/car-up.png"),
 
 obstacle_image = pygame.image.load("assets/obstacle.png")
 
+# Number keys map to the env action ids
+KEY_ACTIONS = {pygame.K_1: 1, pygame.K_2: 2, pygame.K_3: 3, pygame.K_4: 4}
+
 def grid_to_pixels(x, y):
     return x * TILE_SIZE, y * TILE_SIZE
 
@@ -40,7 +45,7 @@ def get_random_car_position():
     return car_rect
 
 def get_random_orientation():
-    return random.choice(["up", "down", "left", "right"])
+    return random.randrange(len(ORIENTATIONS))
 
 def get_random_parking_position(car_position):
     while True:
@@ -85,45 +90,8 @@ while True:
             sys.exit()
 
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_3: # 3 to go straight
-                if car_orientation == "up":
-                    car_rect.y -= CAR_SPEED
-                elif car_orientation == "down":
-                    car_rect.y += CAR_SPEED
-                elif car_orientation == "left":
-                    car_rect.x -= CAR_SPEED
-                elif car_orientation == "right":
-                    car_rect.x += CAR_SPEED
-
-            elif event.key == pygame.K_4: # 4 to go backwards
-                if car_orientation == "up":
-                    car_rect.y += CAR_SPEED
-                elif car_orientation == "down":
-                    car_rect.y -= CAR_SPEED
-                elif car_orientation == "left":
-                    car_rect.x += CAR_SPEED
-                elif car_orientation == "right":
-                    car_rect.x -= CAR_SPEED
-
-            elif event.key == pygame.K_1: # 1 for turning left
-                if car_orientation == "up":
-                    car_orientation = "left"
-                elif car_orientation == "down":
-                    car_orientation = "right"
-                elif car_orientation == "left":
-                    car_orientation = "down"
-                elif car_orientation == "right":
-                    car_orientation = "up"
-
-            elif event.key == pygame.K_2:  # 2 for turning right
-                if car_orientation == "up":
-                    car_orientation = "right"
-                elif car_orientation == "down":
-                    car_orientation = "left"
-                elif car_orientation == "left":
-                    car_orientation = "up"
-                elif car_orientation == "right":
-                    car_orientation = "down"
+            if event.key in KEY_ACTIONS:
+                car_orientation = move_rect(car_rect, car_orientation, KEY_ACTIONS[event.key])
 
 
     # Check if the car is inside the parking lot
@@ -139,28 +107,13 @@ while True:
             sys.exit()
 
 
-    if car_rect.left < 0:
-        car_rect.left = 0
-    elif car_rect.right > STATE_WIDTH:
-        car_rect.right = STATE_WIDTH
-    if car_rect.top < 0:
-        car_rect.top = 0
-    elif car_rect.bottom > STATE_HEIGHT:
-        car_rect.bottom = STATE_HEIGHT
+    clip_rect(car_rect, STATE_WIDTH, STATE_HEIGHT)
 
 
 
     # Update the display
     screen.fill((100, 100, 100))
-    car_sprite = None
-    if car_orientation == "up":
-        car_sprite = car_images[0]
-    elif car_orientation == "down":
-        car_sprite = car_images[1]
-    elif car_orientation == "left":
-        car_sprite = car_images[2]
-    elif car_orientation == "right":
-        car_sprite = car_images[3]
+    car_sprite = car_images[car_orientation]
 
 
 
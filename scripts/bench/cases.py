@@ -0,0 +1,207 @@
+"""
+Benchmark cases and the measurements run for each.
+
+Every case reports a flat dict of metrics. Names ending in `_per_s` are
+throughputs (higher is better); `_ms` and `_mb` are costs (lower is better).
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from gymnasium.wrappers import TimeLimit
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.feature_based.parking_feature_vec_env import ParkingFeatureVec
+from envs.image_based.parking_image_env import ParkingImage
+from envs.multi_agent.parking_multi_array_env import ParkingMultiArrayEnv
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from envs.shm_vec_env import SharedMemoryVecEnv
+from utils.utils import NUMBER_OF_ACTIONS, ORIENTATIONS
+
+VEC_ENV_CLASSES = {"dummy": DummyVecEnv, "subproc": SubprocVecEnv, "shm": SharedMemoryVecEnv}
+
+
+def per_second(count, start):
+    return count / max(time.perf_counter() - start, 1e-9)
+
+
+def mean_ms(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def peak_mb(fn):
+    """Peak Python/NumPy allocation while running `fn`, in MB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def run_single(env, actions):
+    env.reset(seed=0)
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(int(action))
+        if terminated or truncated:
+            env.reset()
+
+
+def run_multi(env, actions):
+    env.reset(seed=0)
+    for row in actions:
+        if not env.agents:
+            env.reset()
+        env.step({agent: int(row[i]) for i, agent in enumerate(env.agents)})
+
+
+def bench_single(make_env, obs_builder, steps, resets):
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, NUMBER_OF_ACTIONS, size=steps)
+    env = make_env()
+    start = time.perf_counter()
+    run_single(env, actions)
+    results = {"step_per_s": per_second(steps, start)}
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset()
+    results["reset_per_s"] = per_second(resets, start)
+    if obs_builder is not None:
+        results["obs_ms"] = mean_ms(lambda: obs_builder(env), steps // 10 or 1)
+    results["peak_mb"] = peak_mb(lambda: run_single(make_env(), actions[:steps // 10]))
+
+    # Render cost: what an rgb_array frame adds to every step
+    render_env = make_env(render_mode="rgb_array")
+    render_env.reset(seed=0)
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = render_env.step(int(action))
+        render_env.render()
+        if terminated or truncated:
+            render_env.reset()
+    render_step_ms = 1000 / per_second(steps, start)
+    results["render_ms"] = max(render_step_ms - 1000 / results["step_per_s"], 0.0)
+    return results
+
+
+def bench_multi(make_env, steps, resets):
+    env = make_env()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, NUMBER_OF_ACTIONS, size=(steps, env.n_agents))
+    start = time.perf_counter()
+    run_multi(env, actions)
+    results = {"step_per_s": per_second(steps, start)}
+    results["agent_step_per_s"] = results["step_per_s"] * env.n_agents
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset()
+    results["reset_per_s"] = per_second(resets, start)
+    results["obs_ms"] = mean_ms(env.get_observations, steps // 10 or 1)
+    results["peak_mb"] = peak_mb(lambda: run_multi(make_env(), actions[:steps // 10]))
+
+    render_env = make_env(render_mode="rgb_array")
+    render_env.reset(seed=0)
+    start = time.perf_counter()
+    for row in actions:
+        if not render_env.agents:
+            render_env.reset()
+        render_env.step({agent: int(row[i]) for i, agent in enumerate(render_env.agents)})
+        render_env.render()
+    render_step_ms = 1000 / per_second(steps, start)
+    results["render_ms"] = max(render_step_ms - 1000 / results["step_per_s"], 0.0)
+    return results
+
+
+def bench_vec(make_vec, steps):
+    vec_env = make_vec()
+    try:
+        rng = np.random.default_rng(0)
+        vec_env.seed(0)
+        vec_env.reset()
+        iterations = max(steps // vec_env.num_envs, 1)
+        actions = rng.integers(0, NUMBER_OF_ACTIONS, size=(iterations, vec_env.num_envs))
+        start = time.perf_counter()
+        for row in actions:
+            vec_env.step(row)
+        return {"step_per_s": per_second(iterations * vec_env.num_envs, start)}
+    finally:
+        vec_env.close()
+
+
+def single_case(env_class, obs_builder=None, **kwargs):
+    # The frame cache only serves headless envs, so the render pass runs without it
+    render_kwargs = {key: value for key, value in kwargs.items() if key != "frame_cache_size"}
+
+    def make_env(render_mode=None):
+        return TimeLimit(env_class(render_mode=render_mode, **(kwargs if render_mode is None else render_kwargs)), 150)
+    return lambda steps, resets: bench_single(make_env, obs_builder, steps, resets)
+
+
+def multi_case(env_class, **kwargs):
+    def make_env(render_mode=None):
+        return env_class(render_mode=render_mode, **kwargs)
+    return lambda steps, resets: bench_multi(make_env, steps, resets)
+
+
+def vec_case(env_class, vec_env_cls, n_envs, **kwargs):
+    def make_vec():
+        return make_vec_env(
+            lambda: TimeLimit(env_class(**kwargs), 150), n_envs=n_envs, vec_env_cls=VEC_ENV_CLASSES[vec_env_cls]
+        )
+    return lambda steps, resets: bench_vec(make_vec, steps)
+
+
+def batched_case(n_envs):
+    return lambda steps, resets: bench_vec(lambda: ParkingFeatureVec(n_envs, max_episode_steps=150), steps)
+
+
+def feature_obs(env):
+    return env.unwrapped.get_obs()
+
+
+def image_obs(env):
+    """One observation after a state change, as a step makes it: turn the car, redraw, then copy out."""
+    env = env.unwrapped
+    env.car_orientation = (env.car_orientation + 1) % len(ORIENTATIONS)
+    if env.needs_pixels():
+        env.update_pixels()
+    return env.get_obs()
+
+
+CASES = {
+    "feature": single_case(ParkingFeature, feature_obs),
+    "feature_reuse_obs": single_case(ParkingFeature, feature_obs, reuse_obs_buffer=True),
+    "image": single_case(ParkingImage, image_obs),
+    "image_numpy": single_case(ParkingImage, image_obs, render_backend="numpy"),
+    "image_90_gray_chw": single_case(ParkingImage, image_obs, resolution=90, grayscale=True, channel_first=True),
+    "image_90_gray_chw_cached": single_case(
+        ParkingImage, image_obs, resolution=90, grayscale=True, channel_first=True, frame_cache_size=4096
+    ),
+    "image_grid": single_case(ParkingImage, image_obs, obs_mode="grid"),
+    "multi_4a_4o_pixels": multi_case(ParkingMultiEnv),
+    "multi_4a_4o_grid": multi_case(ParkingMultiEnv, obs_mode="grid"),
+    "multi_16a_8o_grid": multi_case(ParkingMultiEnv, obs_mode="grid", n_agents=16, n_lots=8, n_obstacles=8),
+    "multi_64a_16o_grid": multi_case(ParkingMultiEnv, obs_mode="grid", n_agents=64, n_lots=16, n_obstacles=16),
+    "multi_array_64a_16o_grid": multi_case(
+        ParkingMultiArrayEnv, n_agents=64, n_lots=16, n_obstacles=16
+    ),
+    "multi_array_400a_30x30_grid": multi_case(
+        ParkingMultiArrayEnv, n_agents=400, n_lots=100, n_obstacles=100, grid_width=30, grid_height=30
+    ),
+    "vec_feature_dummy_8": vec_case(ParkingFeature, "dummy", 8),
+    "vec_feature_subproc_8": vec_case(ParkingFeature, "subproc", 8),
+    "vec_feature_batched_8": batched_case(8),
+    "vec_feature_batched_1024": batched_case(1024),
+    "vec_image_90_dummy_4": vec_case(ParkingImage, "dummy", 4, resolution=90, grayscale=True, channel_first=True),
+    "vec_image_90_subproc_4": vec_case(ParkingImage, "subproc", 4, resolution=90, grayscale=True, channel_first=True),
+    "vec_image_90_shm_4": vec_case(ParkingImage, "shm", 4, resolution=90, grayscale=True, channel_first=True),
+    "vec_image_full_subproc_4": vec_case(ParkingImage, "subproc", 4),
+    "vec_image_full_shm_4": vec_case(ParkingImage, "shm", 4),
+}
@@ -0,0 +1,111 @@
+"""
+python -m scripts.bench.run_bench --out bench.json
+python -m scripts.bench.run_bench --quick --cases feature image --baseline scripts/bench/baseline.json
+python -m scripts.bench.run_bench --repeats 5 --update_baseline scripts/bench/baseline.json
+
+Each case runs --repeats times and reports the median of every metric, since a
+single run on a shared or single-core machine can be off by a third. The committed
+baseline is a median of 5 repeats. --tolerance (default 20%) is the slowdown a
+metric may show against it before counting as a regression: wider than the spread
+left between medians on one machine, narrower than the gains the baseline records.
+Compare only against a baseline recorded on the same machine.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from scripts.bench.cases import CASES
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def compare(report, baseline, tolerance):
+    """
+    Metrics worse than the baseline by more than `tolerance` (a fraction), as
+    (case, metric, baseline_value, value, change) tuples. Cases or metrics
+    missing from either side are skipped.
+    """
+    regressions = []
+    for case, metrics in report["results"].items():
+        for metric, value in metrics.items():
+            reference = baseline.get("results", {}).get(case, {}).get(metric)
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            if (-change if higher_is_better(metric) else change) > tolerance:
+                regressions.append((case, metric, reference, value, change))
+    return regressions
+
+
+def median_metrics(runs):
+    """Per-metric median over repeated runs of one case."""
+    return {metric: float(np.median([run[metric] for run in runs])) for metric in runs[0]}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), default=None, help="Default: all cases")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--resets", type=int, default=500)
+    parser.add_argument("--quick", action="store_true", help="One tenth of the steps and resets, for smoke runs")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case; every metric is their median")
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="Compare against this report and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--update_baseline", default=None, help="Also write the report here as the new baseline")
+    args = parser.parse_args()
+
+    steps, resets = (args.steps // 10, args.resets // 10) if args.quick else (args.steps, args.resets)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+            "python": platform.python_version(), "numpy": np.__version__, "machine": platform.platform(),
+            "steps": steps, "resets": resets, "repeats": args.repeats,
+        },
+        "results": {},
+    }
+    names = args.cases or list(CASES)
+    runs, seconds = {name: [] for name in names}, dict.fromkeys(names, 0.0)
+    # Round-robin over the cases, so a slow spell on the machine lands on every case alike
+    for repeat in range(args.repeats):
+        for name in names:
+            start = time.perf_counter()
+            runs[name].append(CASES[name](steps, resets))
+            seconds[name] += time.perf_counter() - start
+    for name in names:
+        report["results"][name] = metrics = median_metrics(runs[name])
+        summary = ", ".join(f"{metric}={value:.4g}" for metric, value in metrics.items())
+        print(f"{name:<32} {summary}  ({seconds[name]:.1f}s)")
+
+    for path in filter(None, [args.out, args.update_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for case, metric, reference, value, change in regressions:
+            print(f"REGRESSION {case}.{metric}: {reference:.4g} -> {value:.4g} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
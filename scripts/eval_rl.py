@@ -1,39 +1,56 @@
+"""
+python eval_rl.py --env feature --algo PPO --model_path models/PPO_feature/final_model --episodes 10
+python eval_rl.py --env feature --algo PPO --model_path models/PPO_feature/final_model --headless --episodes 1000 --processes 4 --output eval.json
+python eval_rl.py --env image --algo DQN --model_path models/DQN_image/final_model --headless --resolution 90
+"""
 import argparse
-from stable_baselines3 import PPO, DQN
-from envs.feature_based.parking_feature_env import ParkingFeature
-from envs.image_based.parking_image_env import ParkingImage
-from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+import json
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--env", choices=["feature", "image", "multi"], required=True)
-parser.add_argument("--algo", choices=["PPO", "DQN"], required=True)
-parser.add_argument("--model_path", type=str, required=True)
-parser.add_argument("--episodes", type=int, default=10)
-args = parser.parse_args()
+from utils.evaluation import (
+    DEFAULT_MAX_STEPS, add_image_env_args, evaluate, image_env_kwargs, load_policy, make_eval_env, run_episodes,
+    summarize
+)
 
-if args.env == "feature":
-    env = ParkingFeature(render_mode="human")
-elif args.env == "image":
-    env = ParkingImage(render_mode="human")
-elif args.env == "multi":
-    env = ParkingMultiEnv(render_mode="human")
 
-if args.algo == "PPO":
-    model = PPO.load(args.model_path, env=env)
-elif args.algo == "DQN":
-    model = DQN.load(args.model_path, env=env)
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--env", choices=["feature", "image", "multi"], required=True)
+    parser.add_argument("--algo", choices=["PPO", "DQN"], required=True)
+    parser.add_argument("--model_path", type=str, required=True)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="Episodes are reset with seeds seed, seed + 1, ...")
+    parser.add_argument("--max_steps", type=int, default=None, help="Step limit per episode (default: the training one)")
+    parser.add_argument("--headless", action="store_true", help="No window: run at full speed and print JSON results")
+    parser.add_argument("--n_envs", type=int, default=8, help="Headless envs per process, batched through the policy")
+    parser.add_argument("--processes", type=int, default=1, help="Headless worker processes to split the seeds over")
+    parser.add_argument("--output", default=None, help="Write the headless JSON here instead of stdout")
+    add_image_env_args(parser)
+    args = parser.parse_args()
 
-for ep in range(args.episodes):
-    obs, info = env.reset()
-    done = False
-    step_count = 0
-    while not done and step_count < 1000:  # Prevent infinite loops
-        if args.env == "multi":
-            actions = {agent: env.action_space(agent).sample() for agent in env.agents}
-            obs, rewards, terminations, truncations, infos = env.step(actions)
-            done = not env.agents
+    env_kwargs = image_env_kwargs(args) if args.env == "image" else {}
+
+    if args.headless:
+        results = evaluate(
+            args.env, args.algo, args.model_path, n_episodes=args.episodes, seed=args.seed, n_envs=args.n_envs,
+            processes=args.processes, max_steps=args.max_steps, env_kwargs=env_kwargs
+        )
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+            print(json.dumps(results["summary"], indent=2))
         else:
-            action, _states = model.predict(obs)
-            obs, reward, terminated, truncated, info = env.step(action)
-            done = terminated or truncated
-        step_count += 1
+            print(text)
+    else:
+        env = make_eval_env(args.env, render_mode="human", **env_kwargs)
+        predict = load_policy(args.algo, args.model_path)
+        episodes = run_episodes(
+            [env], predict, range(args.seed, args.seed + args.episodes),
+            args.max_steps or DEFAULT_MAX_STEPS[args.env], multi_agent=args.env == "multi"
+        )
+        env.close()
+        print(json.dumps(summarize(episodes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
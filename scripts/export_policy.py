@@ -0,0 +1,37 @@
+"""
+python export_policy.py --model_path models/best_model.zip --output models/best_model.npz
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+from stable_baselines3 import PPO
+
+from utils.numpy_policy import NumpyPolicy, export_policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a PPO MlpPolicy to an .npz that runs without torch")
+    parser.add_argument("--model_path", required=True)
+    parser.add_argument("--output", default=None, help="Defaults to the model path with an .npz extension")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model_path)[0] + ".npz"
+    model = PPO.load(args.model_path, device="cpu")
+    export_policy(model, output)
+
+    # Check the export against the original on random observations from the model's space
+    model.observation_space.seed(0)
+    obs = np.stack([model.observation_space.sample() for _ in range(1024)])
+    expected, _ = model.predict(obs, deterministic=True)
+    actions, _ = NumpyPolicy.load(output).predict(obs)
+    agreement = (actions == expected).mean()
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes); matches PPO on {agreement:.1%} of 1024 observations")
+    if agreement < 1:
+        print("The export disagrees with the original model; do not use it in its place")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+python make_layout_bank.py --env single --count 1000000 --out layouts/single.npy
+python make_layout_bank.py --env multi --count 100000 --n_agents 4 --n_lots 4 --out layouts/multi.npy
+"""
+import argparse
+import os
+
+from utils.layout_bank import single_layout_dtype, multi_layout_dtype, write_layout_bank
+from utils.utils import NO_OF_OBSTACLES, GRID_WIDTH, GRID_HEIGHT
+from envs.multi_agent.parking_multi_env import NO_OF_AGENTS, NO_OF_LOTS
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--env", choices=["single", "multi"], required=True)
+parser.add_argument("--count", type=int, default=1000000)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--out", required=True)
+parser.add_argument("--n_obstacles", type=int, default=NO_OF_OBSTACLES)
+parser.add_argument("--n_agents", type=int, default=NO_OF_AGENTS)
+parser.add_argument("--n_lots", type=int, default=NO_OF_LOTS)
+parser.add_argument("--grid_width", type=int, default=GRID_WIDTH)
+parser.add_argument("--grid_height", type=int, default=GRID_HEIGHT)
+args = parser.parse_args()
+
+if args.env == "single":
+    dtype = single_layout_dtype(args.n_obstacles)
+else:
+    dtype = multi_layout_dtype(args.n_agents, args.n_lots, args.n_obstacles)
+
+os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+write_layout_bank(args.out, dtype, args.count, args.seed, args.grid_width, args.grid_height)
+print(f"Wrote {args.count} {args.env} layouts to {args.out}")
@@ -0,0 +1,85 @@
+"""
+python rank_checkpoints.py --env feature --algo PPO models/PPO_feature/checkpoint --episodes 200 --processes 4
+python rank_checkpoints.py --env image --algo DQN models/DQN_image/checkpoint models/DQN_image/best --resolution 90
+"""
+import argparse
+import glob
+import json
+import os
+import re
+
+from utils.evaluation import add_image_env_args, evaluate_checkpoints, image_env_kwargs
+from utils.rollout_cache import RolloutCache
+
+# Far from the seeds training resets draw from, so the ranking is on held-out layouts
+HELD_OUT_SEED = 1_000_000
+
+
+def find_checkpoints(locations):
+    """Model zips in the given directories (or the files themselves), in training-step order."""
+    paths = []
+    for location in locations:
+        paths.extend(sorted(glob.glob(os.path.join(location, "*.zip"))) if os.path.isdir(location) else [location])
+
+    def steps(path):
+        match = re.search(r"_(\d+)_steps\.zip$", path)
+        return (0, int(match.group(1)), path) if match else (1, 0, path)
+    return sorted(dict.fromkeys(paths), key=steps)
+
+
+def ranked(results):
+    """Best first: highest success rate, then fewest collisions, then highest mean reward."""
+    def score(item):
+        summary = item[1]["summary"]
+        return (-summary["success_rate"], summary["collision_rate"], -summary["episode_reward"].get("mean", 0.0))
+    return sorted(results.items(), key=score)
+
+
+def format_table(rows):
+    header = ("rank", "checkpoint", "success", "collision", "timeout", "reward", "length", "cached")
+    lines = [header]
+    for rank, (path, result) in enumerate(rows, 1):
+        summary = result["summary"]
+        lines.append((
+            str(rank), os.path.relpath(path), f"{summary['success_rate']:.3f}", f"{summary['collision_rate']:.3f}",
+            f"{summary['timeout_rate']:.3f}", f"{summary['episode_reward'].get('mean', 0.0):.1f}",
+            f"{summary['episode_length'].get('mean', 0.0):.1f}", "yes" if result["cached"] else "no",
+        ))
+    widths = [max(len(line[column]) for line in lines) for column in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate every checkpoint on the same held-out seeds and rank them")
+    parser.add_argument("checkpoints", nargs="+", help="Checkpoint directories or model zips")
+    parser.add_argument("--env", choices=["feature", "image", "multi"], required=True)
+    parser.add_argument("--algo", choices=["PPO", "DQN"], required=True)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=HELD_OUT_SEED, help="Episodes are reset with seeds seed, seed + 1, ...")
+    parser.add_argument("--max_steps", type=int, default=None, help="Step limit per episode (default: the training one)")
+    parser.add_argument("--n_envs", type=int, default=8, help="Envs per checkpoint, batched through the policy")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Checkpoints evaluated at once")
+    parser.add_argument("--cache_dir", default="./models/.eval_cache", help="Results keyed by checkpoint file hash")
+    parser.add_argument("--no_cache", action="store_true")
+    parser.add_argument("--output", default=None, help="Also write the ranking as JSON")
+    add_image_env_args(parser)
+    args = parser.parse_args()
+
+    paths = find_checkpoints(args.checkpoints)
+    if not paths:
+        parser.error("no checkpoints found")
+    env_kwargs = image_env_kwargs(args) if args.env == "image" else {}
+    cache = None if args.no_cache else RolloutCache(args.cache_dir)
+    results = evaluate_checkpoints(
+        paths, args.env, args.algo, n_episodes=args.episodes, seed=args.seed, n_envs=args.n_envs,
+        processes=args.processes, max_steps=args.max_steps, env_kwargs=env_kwargs, cache=cache
+    )
+    rows = ranked(results)
+    print(format_table(rows))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([{"rank": rank, "path": path, **result} for rank, (path, result) in enumerate(rows, 1)], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,136 @@
 """
 python train_rl.py --env feature --algo PPO --timesteps 100000
 python train_rl.py --env multi --algo DQN --timesteps 1000000
+python train_rl.py --env image --algo PPO --policy CnnPolicy --resolution 90 --frame_stack 4
+python train_rl.py --env feature --algo PPO --layout_bank layouts/single.npy --layout_range 0 900000
+python train_rl.py --env image --algo DQN --policy CnnPolicy --state_replay
+python train_rl.py --env image --algo PPO --policy CnnPolicy --vec_env shm --n_envs 0 --pin_cpus
+python train_rl.py --env image --algo DQN --policy CnnPolicy --checkpoint_seconds 600 --keep_last 2 --keep_best 1
 """
 import argparse
-from gymnasium.wrappers import TimeLimit, GrayScaleObservation
+from gymnasium.wrappers import TimeLimit
 from stable_baselines3 import PPO, DQN
-from stable_baselines3.common.callbacks import CheckpointCallback, EvalCallback
+from stable_baselines3.common.callbacks import EvalCallback
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.logger import configure
 from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
 
 from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.feature_based.parking_feature_vec_env import ParkingFeatureVec
 from envs.image_based.parking_image_env import ParkingImage
+from envs.pixel_obs import SharedFrameStack
+from envs.shm_vec_env import SharedMemoryVecEnv, available_cpus
+from envs.state_replay import StateReplayBuffer
 from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from utils.checkpointing import AsyncCheckpointCallback, BackgroundLogger, BackgroundWriter
+from utils.evaluation import DEFAULT_RESOLUTION
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--env", choices=["feature", "image", "multi"], required=True)
 parser.add_argument("--algo", choices=["PPO", "DQN"], required=True)
 parser.add_argument("--timesteps", type=int, default=100000)
-parser.add_argument("--n_envs", type=int, default=4)
+parser.add_argument("--n_envs", type=int, default=4, help="0 runs one env per available core")
+parser.add_argument(
+    "--vec_env", choices=["dummy", "subproc", "shm"], default="dummy",
+    help="dummy steps envs in-process; subproc and shm run one worker process each, shm passing frames through shared memory"
+)
+parser.add_argument("--pin_cpus", action="store_true", help="Pin each shm worker to its own core")
+parser.add_argument("--batched", action="store_true", help="Step all feature envs in one NumPy call")
+parser.add_argument("--policy", choices=["MlpPolicy", "CnnPolicy"], default="MlpPolicy")
+parser.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION, help="Side of the image env observation, must divide 720")
+parser.add_argument("--color", action="store_true", help="Keep RGB image observations instead of grayscale")
+parser.add_argument("--frame_stack", type=int, default=1)
+parser.add_argument("--seed", type=int, default=None, help="Env i of the fleet is seeded with seed + i")
+parser.add_argument("--layout_bank", default=None, help=".npy bank from make_layout_bank.py to draw resets from")
+parser.add_argument("--layout_range", type=int, nargs=2, default=None, help="Rows [start, stop) of the bank to train on")
+parser.add_argument(
+    "--state_replay", action="store_true",
+    help="DQN on the image env: keep env states in the replay buffer and re-render frames when sampling"
+)
+parser.add_argument(
+    "--checkpoint_steps", type=int, default=None,
+    help="Checkpoint every this many total env steps (default 1000 per env); 0 disables step-based checkpoints"
+)
+parser.add_argument("--checkpoint_seconds", type=float, default=None, help="Also checkpoint every this many seconds")
+parser.add_argument("--keep_last", type=int, default=3, help="Newest checkpoints to keep on disk")
+parser.add_argument("--keep_best", type=int, default=1, help="Checkpoints with the best mean episode reward to keep")
 args = parser.parse_args()
+if args.pin_cpus and args.vec_env != "shm":
+    parser.error("--pin_cpus needs --vec_env shm")
+if args.state_replay and (args.env != "image" or args.algo != "DQN" or args.frame_stack > 1):
+    parser.error("--state_replay needs --env image --algo DQN and no --frame_stack")
+n_envs = args.n_envs or len(available_cpus())
+# Arguments that shape image observations; the state replay buffer renders with the same ones
+image_kwargs = dict(resolution=args.resolution, grayscale=not args.color, channel_first=True)
 
 name = f"{args.algo}_{args.env}"
 tmp_path = f"./logs/{name}"
-new_logger = configure(tmp_path, ["csv", "tensorboard", "log"])
-checkpoint_callback = CheckpointCallback(
-    save_freq=1000, save_path=f"./models/{name}/checkpoint",
-    name_prefix=f"{name}", save_replay_buffer=True, save_vecnormalize=True
+checkpoint_steps = 1000 * n_envs if args.checkpoint_steps is None else args.checkpoint_steps or None
+if checkpoint_steps is None and args.checkpoint_seconds is None:
+    parser.error("--checkpoint_steps 0 needs --checkpoint_seconds")
+# Log dumps and checkpoints are serialized on this thread, off the training loop
+writer = BackgroundWriter()
+new_logger = BackgroundLogger.wrap(configure(tmp_path, ["csv", "tensorboard", "log"]), writer)
+checkpoint_callback = AsyncCheckpointCallback(
+    writer, save_path=f"./models/{name}/checkpoint", name_prefix=f"{name}",
+    save_every_steps=checkpoint_steps, save_every_seconds=args.checkpoint_seconds,
+    keep_last=args.keep_last, keep_best=args.keep_best, save_replay_buffer=True, save_vecnormalize=True
 )
 
-def make_gym_env():
+def make_gym_env(monitor_file=f"./logs/{name}/monitor"):
     if args.env == "feature":
-        env = ParkingFeature()
+        env = ParkingFeature(layout_bank=args.layout_bank, layout_range=args.layout_range)
         env = TimeLimit(env, 150)
     elif args.env == "image":
-        env = ParkingImage()
+        env = ParkingImage(**image_kwargs, layout_bank=args.layout_bank, layout_range=args.layout_range,
+                         record_states=args.state_replay)
         env = TimeLimit(env, 400)
-        env = GrayScaleObservation(env, keep_dim=True)
+        if args.frame_stack > 1:
+            env = SharedFrameStack(env, n_stack=args.frame_stack)
     elif args.env == "multi":
-        env = ParkingMultiEnv()
+        env = ParkingMultiEnv(layout_bank=args.layout_bank, layout_range=args.layout_range)
         env = TimeLimit(env, 150)
-    env = Monitor(env, f"./logs/{name}/monitor")
+    env = Monitor(env, monitor_file)
     return env
 
-vec_env = make_vec_env(make_gym_env, n_envs=args.n_envs)
-eval_callback = EvalCallback(vec_env, best_model_save_path=f"./models/{name}/best/",
+if args.batched and args.env == "feature":
+    vec_env = VecMonitor(ParkingFeatureVec(
+        n_envs, max_episode_steps=150, layout_bank=args.layout_bank, layout_range=args.layout_range
+    ), f"./logs/{name}/monitor")
+    vec_env.seed(args.seed)
+elif args.vec_env == "dummy":
+    vec_env = make_vec_env(make_gym_env, n_envs=n_envs, seed=args.seed, vec_env_cls=DummyVecEnv)
+else:
+    # Fork: this script has no __main__ guard for spawned workers to import it under,
+    # and no torch threads exist yet at this point
+    vec_env_kwargs = {"start_method": "fork"}
+    if args.pin_cpus:
+        vec_env_kwargs["cpu_affinity"] = "auto"
+    vec_env_cls = SharedMemoryVecEnv if args.vec_env == "shm" else SubprocVecEnv
+    vec_env = make_vec_env(
+        make_gym_env, n_envs=n_envs, seed=args.seed, vec_env_cls=vec_env_cls, vec_env_kwargs=vec_env_kwargs
+    )
+# Evaluate on an env of its own: EvalCallback resets its env, which would cut the training episodes short.
+# Its seeds continue after the training fleet's; scripts/eval_rl.py --headless runs larger evaluations
+eval_env = make_vec_env(
+    lambda: make_gym_env(monitor_file=None), n_envs=1, vec_env_cls=DummyVecEnv,
+    seed=None if args.seed is None else args.seed + n_envs
+)
+eval_callback = EvalCallback(eval_env, best_model_save_path=f"./models/{name}/best/",
     log_path=f"./models/{name}/best/", eval_freq=3000,
     deterministic=True, render=False)
 
 if args.algo == "PPO":
-    model = PPO("MlpPolicy", vec_env, verbose=1)
+    model = PPO(args.policy, vec_env, verbose=1)
+elif args.algo == "DQN" and args.state_replay:
+    model = DQN(args.policy, vec_env, verbose=1, replay_buffer_class=StateReplayBuffer,
+                replay_buffer_kwargs={"env_kwargs": image_kwargs})
 elif args.algo == "DQN":
-    model = DQN("MlpPolicy", vec_env, verbose=1)
+    model = DQN(args.policy, vec_env, verbose=1)
 
 model.set_logger(new_logger)
 model.learn(total_timesteps=args.timesteps, callback=[checkpoint_callback, eval_callback], progress_bar=True)
-model.save(f"./models/{name}/final_model")
\ No newline at end of file
+model.save(f"./models/{name}/final_model")
+new_logger.close()
+writer.close()
\ No newline at end of file
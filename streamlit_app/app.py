@@ -1,16 +1,63 @@
 import streamlit as st
+import importlib.util
 import sys
 import os
+import queue
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from envs.feature_based.parking_feature_env import ParkingFeature
 from envs.image_based.parking_image_env import ParkingImage
 from envs.multi_agent.parking_multi_env import ParkingMultiEnv
-import pygame
+from utils.gif_writer import open_demo_writer
+from utils.resource_pool import EnvPool, ModelCache
+from utils.rollout_cache import RolloutCache, file_digest, rollout_key
+from utils.utils import NUMBER_OF_ACTIONS
+from utils.numpy_policy import NumpyPolicy
 import numpy as np
-from PIL import Image
-import imageio
-from stable_baselines3 import PPO
+
+ENV_FACTORIES = {
+    "feature-based": lambda: ParkingFeature(render_mode="rgb_array"),
+    "image-based": lambda: ParkingImage(render_mode="rgb_array", render_backend="numpy"),
+    "multi-agent": lambda: ParkingMultiEnv(render_mode="rgb_array", render_backend="numpy"),
+}
+ROLLOUT_WORKERS = 4
+ROLLOUT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "parking_demo_cache")
+ROLLOUT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+# Shared by every session in this server process
+@st.cache_resource
+def get_env_pool():
+    pool = EnvPool(ENV_FACTORIES, max_idle=2 * ROLLOUT_WORKERS)
+    for key in ENV_FACTORIES:
+        pool.warm(key)
+    return pool
+
+
+def load_demo_policy(path):
+    """Exported .npz policies run on NumPy alone; torch and stable-baselines3 load only for a .zip."""
+    if path.endswith(".npz"):
+        return NumpyPolicy.load(path)
+    from stable_baselines3 import PPO
+    return PPO.load(path)
+
+
+@st.cache_resource
+def get_model_cache():
+    return ModelCache(load_demo_policy)
+
+
+@st.cache_resource
+def get_rollout_cache():
+    return RolloutCache(ROLLOUT_CACHE_DIR, max_bytes=ROLLOUT_CACHE_BYTES)
+
+
+@st.cache_resource
+def get_rollout_executor():
+    return ThreadPoolExecutor(max_workers=ROLLOUT_WORKERS, thread_name_prefix="rollout")
+
 
 st.set_page_config(page_title="Parking RL Project Demo", layout="wide")
 st.title("🚗 Parking Management RL Demo")
@@ -19,6 +66,13 @@ st.sidebar.title("Project & Demo Controls")
 env_type = st.sidebar.selectbox("Environment", ["feature-based", "image-based", "multi-agent"])
 episodes = st.sidebar.slider("Episodes", 1, 5, 1)
 steps_per_episode = st.sidebar.slider("Max steps/ep", 10, 60, 30)
+# MP4 needs the imageio-ffmpeg plugin; GIFs are always available
+video_formats = ["GIF", "MP4"] if importlib.util.find_spec("imageio_ffmpeg") else ["GIF"]
+video_format = st.sidebar.selectbox("Recording format", video_formats)
+optimize_gif = st.sidebar.checkbox("Frame-diff GIF encoding", value=True)
+preview_every = 5
+
+seed = int(st.sidebar.number_input("Seed", min_value=0, value=0, step=1))
 
 # Only show agent policy selection for feature-based environment!
 if env_type == "feature-based":
@@ -27,22 +81,74 @@ else:
     policy = "Random Policy"
     st.sidebar.warning("Only 'Random Policy' available.")
 
-ppo_model_path = os.path.join("models", "best_model.zip")
+# Prefer the torch-free export from scripts/export_policy.py when it exists
+ppo_model_path = os.path.join("models", "best_model.npz")
+if not os.path.exists(ppo_model_path):
+    ppo_model_path = os.path.join("models", "best_model.zip")
 model = None
 if policy == "Trained PPO Agent" and env_type == "feature-based":
     if os.path.exists(ppo_model_path):
         try:
-            model = PPO.load(ppo_model_path)
+            model = get_model_cache().get(ppo_model_path)
             st.sidebar.success("Loaded PPO agent for feature-based env!")
         except Exception as e:
             st.sidebar.error(f"Agent load error: {e}")
     else:
         st.sidebar.warning("Trained PPO model not found. Using random actions.")
 
-def get_frame(surface):
-    arr = pygame.surfarray.array3d(surface)
-    arr = np.transpose(arr, (1, 0, 2))
-    return Image.fromarray(arr)
+def run_demo(env_pool, env_type, model, episodes, steps_per_episode, seed, video_path, optimize_gif, preview):
+    """
+    Roll out on an env leased from `env_pool`, streaming the recording to `video_path`; runs on the
+    rollout pool, so everything Streamlit-cached is fetched on the script thread and passed in.
+    Layouts and random actions all come from `seed`, so the returned record replays exactly.
+    """
+    all_rewards, all_actions = [], []
+    success_count, crash_count = 0, 0
+    action_rng = np.random.default_rng(seed)
+    with env_pool.lease(env_type) as env, open_demo_writer(video_path, optimize=optimize_gif) as writer:
+        for ep in range(episodes):
+            # Later episodes continue the env's stream started by this seed
+            obs, info = env.reset(seed=seed if ep == 0 else None)
+            rewards, actions = [], []
+            terminated, truncated = False, False
+            for step in range(steps_per_episode):
+                if model is not None:
+                    agent_obs = obs["obs"] if isinstance(obs, dict) and "obs" in obs else obs
+                    action, _ = model.predict(agent_obs, deterministic=True)
+                    action = int(action)
+                else:
+                    if env_type == "multi-agent" and hasattr(env, "agents"):
+                        action = {agent: int(action_rng.integers(NUMBER_OF_ACTIONS)) for agent in env.agents}
+                    else:
+                        action = int(action_rng.integers(NUMBER_OF_ACTIONS))
+                actions.append(action)
+                result = env.step(action)
+                if env_type == "multi-agent":
+                    obs, rewards_dict, terminated, truncated, info = result
+                    reward = sum(rewards_dict.values()) if isinstance(rewards_dict, dict) else rewards_dict
+                    rewards.append(reward)
+                    if not env.agents:
+                        break
+                else:
+                    obs, reward, terminated, truncated, info = result
+                    rewards.append(reward)
+                    if hasattr(env, "parked_successfully") and env.parked_successfully:
+                        success_count += 1
+                    if hasattr(env, "collision") and env.collision:
+                        crash_count += 1
+                    if terminated or truncated:
+                        break
+                frame = env.render()
+                writer.append_data(frame)
+                if step % preview_every == 0 and not preview.full():
+                    preview.put((f"Episode {ep + 1}, step {step + 1}", frame.copy()))
+            all_rewards.append(float(sum(rewards)))
+            all_actions.append(actions)
+    return {
+        "rewards": all_rewards, "actions": all_actions,
+        "success_count": success_count, "crash_count": crash_count,
+        "video": os.path.basename(video_path),
+    }
 
 st.markdown("""
 ### 🚩 Demo Instructions
@@ -56,49 +162,39 @@ st.markdown("""
 """)
 
 if st.button("Run Demo and Show GIF"):
-    EnvClass = ParkingFeature if env_type == "feature-based" else (
-        ParkingImage if env_type == "image-based" else ParkingMultiEnv
+    cache = get_rollout_cache()
+    key = rollout_key(
+        env=env_type, policy=file_digest(ppo_model_path) if model is not None else "random", seed=seed,
+        episodes=episodes, steps=steps_per_episode, format=video_format, optimize=optimize_gif,
     )
-
-    env = EnvClass(render_mode="human")
-    all_frames, all_rewards = [], []
-    success_count, crash_count = 0, 0
-    for ep in range(episodes):
-        obs, info = env.reset()
-        frames, rewards = [], []
-        terminated, truncated = False, False
-        for step in range(steps_per_episode):
-            if policy == "Trained PPO Agent" and env_type == "feature-based" and model:
-                agent_obs = obs["obs"] if isinstance(obs, dict) and "obs" in obs else obs
-                action, _ = model.predict(agent_obs, deterministic=True)
-            else:
-                if env_type == "multi-agent" and hasattr(env, "agents"):
-                    action = {agent: env.action_space(agent).sample() for agent in env.agents}
-                else:
-                    action = env.action_space.sample()
-            result = env.step(action)
-            if env_type == "multi-agent":
-                obs, rewards_dict, terminated, truncated, info = result
-                reward = sum(rewards_dict.values()) if isinstance(rewards_dict, dict) else rewards_dict
-                rewards.append(reward)
-                if not env.agents:
-                    break
-            else:
-                obs, reward, terminated, truncated, info = result
-                rewards.append(reward)
-                if hasattr(env, "parked_successfully") and env.parked_successfully:
-                    success_count += 1
-                if hasattr(env, "collision") and env.collision:
-                    crash_count += 1
-                if terminated or truncated:
-                    break
-            frame = get_frame(env.window)
-            frames.append(np.array(frame))
-        all_frames.extend(frames)
-        all_rewards.append(sum(rewards))
-    gif_path = f"demos/{env_type}_parking_demo.gif"
-    imageio.mimsave(gif_path, all_frames, duration=0.15)
-    st.image(gif_path, caption=f"{env_type.capitalize()} Simulation | {policy}")
+    record = cache.get(key)
+    if record is None:
+        with cache.staged() as staged:
+            video_path = os.path.join(staged, f"{env_type}_parking_demo.{video_format.lower()}")
+            # Preview frames flow back through a small queue; Streamlit calls must stay on this thread
+            frames = queue.Queue(maxsize=2)
+            future = get_rollout_executor().submit(
+                run_demo, get_env_pool(), env_type, model, episodes, steps_per_episode, seed, video_path,
+                optimize_gif, frames
+            )
+            preview = st.empty()
+            while not future.done() or not frames.empty():
+                try:
+                    label, frame = frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                preview.image(frame, caption=label)
+            record = cache.put(key, future.result(), staged)
+            preview.empty()
+    else:
+        st.info("Replaying a cached rollout for these settings.")
+    video_path = os.path.join(record["dir"], record["video"])
+    all_rewards, success_count, crash_count = record["rewards"], record["success_count"], record["crash_count"]
+    caption = f"{env_type.capitalize()} Simulation | {policy}"
+    if video_format == "MP4":
+        st.video(video_path)
+    else:
+        st.image(video_path, caption=caption)
     st.success(f"Total Rewards per Episode: {all_rewards}")
     st.progress(success_count / episodes if episodes else 0)
     st.write(f"🙌 Successful Parks: {success_count} / {episodes} episodes")
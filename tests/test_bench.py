@@ -0,0 +1,26 @@
+from scripts.bench.cases import CASES
+from scripts.bench.run_bench import compare, median_metrics
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"results": {"feature": {"step_per_s": 1000.0, "render_ms": 2.0, "peak_mb": 1.0}}}
+    report = {"results": {
+        "feature": {"step_per_s": 850.0, "render_ms": 2.6, "peak_mb": 0.5},
+        "image": {"step_per_s": 1.0},
+    }}
+    regressions = compare(report, baseline, tolerance=0.2)
+    assert [(case, metric) for case, metric, *_ in regressions] == [("feature", "render_ms")]
+
+
+def test_median_metrics_ignore_one_noisy_run():
+    runs = [
+        {"step_per_s": 1000.0, "obs_ms": 0.2}, {"step_per_s": 400.0, "obs_ms": 0.9}, {"step_per_s": 1100.0, "obs_ms": 0.3}
+    ]
+    assert median_metrics(runs) == {"step_per_s": 1000.0, "obs_ms": 0.3}
+
+
+def test_cases_report_expected_metrics():
+    metrics = CASES["feature"](50, 5)
+    assert {"step_per_s", "reset_per_s", "obs_ms", "peak_mb", "render_ms"} <= set(metrics)
+    metrics = CASES["multi_4a_4o_grid"](20, 2)
+    assert metrics["agent_step_per_s"] == metrics["step_per_s"] * 4
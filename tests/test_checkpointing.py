@@ -0,0 +1,115 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import torch as th
+from gymnasium.wrappers import TimeLimit
+from stable_baselines3 import DQN, PPO
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.logger import DISABLED, configure
+from stable_baselines3.common.save_util import load_from_pkl
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from utils.checkpointing import AsyncCheckpointCallback, BackgroundLogger, BackgroundWriter
+
+def make_vec(n_envs=2):
+    return make_vec_env(lambda: TimeLimit(ParkingFeature(), 20), n_envs=n_envs, seed=0)
+
+def test_checkpoints_load_and_respect_retention(tmp_path):
+    writer = BackgroundWriter()
+    model = DQN("MlpPolicy", make_vec(), learning_starts=16, buffer_size=500, seed=0)
+    callback = AsyncCheckpointCallback(
+        writer, str(tmp_path), name_prefix="dqn", save_every_steps=64, keep_last=2, keep_best=1,
+        save_replay_buffer=True
+    )
+    model.learn(256, callback=callback)
+    writer.close()
+
+    kept = sorted(step for step, _, _ in callback.checkpoints)
+    assert 2 <= len(kept) <= 3
+    assert kept[-2:] == [192, 256]
+    expected = {f"dqn_{step}_steps.zip" for step in kept} | {f"dqn_replay_buffer_{step}_steps.pkl" for step in kept}
+    assert set(os.listdir(tmp_path)) == expected
+
+    # The callback runs before the last transition is stored and trained on
+    restored = DQN.load(tmp_path / "dqn_256_steps.zip")
+    assert restored.num_timesteps == 256
+    buffer = load_from_pkl(tmp_path / "dqn_replay_buffer_256_steps.pkl")
+    assert buffer.pos == model.replay_buffer.pos - 1
+    assert (buffer.observations[:buffer.pos] == model.replay_buffer.observations[:buffer.pos]).all()
+
+class HeldCheckpointCallback(AsyncCheckpointCallback):
+    """
+    Holds the writer until training ends and keeps the policy parameters as they were
+    at each save, so a checkpoint serialized late would not match them.
+    """
+
+    def _init_callback(self):
+        super()._init_callback()
+        self.saved_states = {}
+        self.release = threading.Event()
+        self.writer.submit(self.release.wait)
+
+    def save(self):
+        super().save()
+        self.saved_states[self.num_timesteps] = {
+            name: t.detach().clone() for name, t in self.model.policy.state_dict().items()
+        }
+
+    def _on_training_end(self):
+        self.written_before_end = os.listdir(self.save_path)
+        self.release.set()
+        super()._on_training_end()
+
+def test_snapshot_is_taken_at_save_time(tmp_path):
+    writer = BackgroundWriter()
+    model = PPO("MlpPolicy", make_vec(), n_steps=32, batch_size=32, n_epochs=1, seed=0)
+    callback = HeldCheckpointCallback(writer, str(tmp_path), name_prefix="ppo", save_every_steps=64, keep_last=None)
+    model.learn(192, callback=callback)
+    writer.close()
+    assert callback.written_before_end == []
+    assert sorted(callback.saved_states) == [64, 128, 192]
+    for step, expected in callback.saved_states.items():
+        saved = PPO.load(tmp_path / f"ppo_{step}_steps.zip").policy.state_dict()
+        assert saved.keys() == expected.keys()
+        assert all(th.equal(saved[name], expected[name]) for name in expected)
+    # Training kept updating the policy after the last save
+    live = model.policy.state_dict()
+    assert any(not th.equal(live[name], t) for name, t in callback.saved_states[192].items())
+
+def test_background_logger_writes_on_flush(tmp_path):
+    writer = BackgroundWriter()
+    logger = BackgroundLogger.wrap(configure(str(tmp_path), ["csv"]), writer)
+    for step in range(3):
+        logger.record("train/value", step)
+        logger.dump(step)
+    logger.close()
+    writer.close()
+    lines = (tmp_path / "progress.csv").read_text().split()
+    assert lines == ["train/value", "0", "1", "2"]
+
+def test_background_logger_writes_only_from_the_writer(tmp_path):
+    writer = BackgroundWriter()
+    release = threading.Event()
+    writer.submit(release.wait)
+    logger = BackgroundLogger.wrap(configure(str(tmp_path), ["log"]), writer)
+    header = (tmp_path / "log.txt").read_text()
+    logger.log("queued message")
+    assert (tmp_path / "log.txt").read_text() == header
+    logger.set_level(DISABLED)
+    logger.record("train/value", 1)
+    logger.dump(0)
+    release.set()
+    logger.close()
+    writer.close()
+    assert (tmp_path / "log.txt").read_text() == header + "queued message\n"
+
+def test_writer_surfaces_errors():
+    writer = BackgroundWriter()
+    writer.submit(lambda: 1 / 0)
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    writer.close()
+    with pytest.raises(ValueError):
+        AsyncCheckpointCallback(writer, "unused")
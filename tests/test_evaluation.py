@@ -0,0 +1,97 @@
+import argparse
+import json
+
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from utils.evaluation import (
+    OUTCOMES, add_image_env_args, classify, evaluate, image_env_kwargs, make_eval_env, run_episodes, summarize
+)
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("eval") / "ppo_feature"
+    PPO("MlpPolicy", ParkingFeature(), n_steps=64, batch_size=64, n_epochs=1, seed=0).learn(64).save(path)
+    return str(path) + ".zip"
+
+def test_results_depend_only_on_seeds(model_path):
+    serial = evaluate("feature", "PPO", model_path, n_episodes=12, seed=3, n_envs=1, max_steps=40)
+    batched = evaluate("feature", "PPO", model_path, n_episodes=12, seed=3, n_envs=5, max_steps=40)
+    pooled = evaluate("feature", "PPO", model_path, n_episodes=12, seed=3, n_envs=4, processes=2, max_steps=40)
+    assert serial == batched == pooled
+    assert [episode["seed"] for episode in serial["episodes"]] == list(range(3, 15))
+    summary = serial["summary"]
+    assert summary["episodes"] == summary["agents"] == 12
+    assert sum(summary[f"{outcome}_rate"] for outcome in OUTCOMES) == pytest.approx(1)
+    assert summary["episode_length"]["max"] <= 40
+    json.dumps(serial)
+
+def test_image_results_do_not_depend_on_env_count():
+    def predict(obs):
+        # Deterministic in the observation alone, so any difference comes from the envs
+        return obs.reshape(len(obs), -1).sum(axis=1, dtype=np.int64) % 5
+
+    kwargs = dict(resolution=90, grayscale=True, channel_first=True)
+    serial = run_episodes([make_eval_env("image", **kwargs)], predict, range(12), max_steps=60)
+    batched = run_episodes([make_eval_env("image", **kwargs) for _ in range(4)], predict, range(12), max_steps=60)
+    assert serial == batched
+
+def test_multi_agent_outcomes_cover_every_agent():
+    envs = [ParkingMultiEnv(obs_mode="grid") for _ in range(3)]
+    rng = np.random.default_rng(0)
+    episodes = run_episodes(envs, lambda obs: rng.integers(0, 5, len(obs)), range(6), max_steps=30, multi_agent=True)
+    assert len(episodes) == 6
+    for episode in episodes:
+        assert sum(episode["outcomes"].values()) == envs[0].n_agents
+        assert 1 <= episode["length"] <= 30
+    assert summarize(episodes)["agents"] == 6 * envs[0].n_agents
+
+def test_classify_and_env_factory():
+    assert classify(2000, True) == "success"
+    assert classify(-1000, True) == "collision"
+    assert classify(-1, False) == "timeout"
+    env = make_eval_env("image", resolution=90, grayscale=True, channel_first=True, frame_stack=2)
+    assert env.observation_space.shape == (2, 90, 90)
+    with pytest.raises(ValueError):
+        make_eval_env("unknown")
+
+def test_image_env_args_default_to_the_training_observations():
+    parser = argparse.ArgumentParser()
+    add_image_env_args(parser)
+    env = make_eval_env("image", **image_env_kwargs(parser.parse_args([])))
+    # train_rl.py's defaults: 90x90 grayscale, channel first, no stacking
+    assert env.observation_space.shape == (1, 90, 90)
+    assert image_env_kwargs(parser.parse_args(["--color", "--frame_stack", "4"]))["grayscale"] is False
+
+def test_checkpoint_results_are_cached_by_content(model_path, tmp_path):
+    import shutil
+    from scripts.rank_checkpoints import find_checkpoints, format_table, ranked
+    from utils.evaluation import evaluate_checkpoints
+    from utils.rollout_cache import RolloutCache
+
+    checkpoints = tmp_path / "checkpoint"
+    checkpoints.mkdir()
+    second = PPO.load(model_path, env=ParkingFeature()).learn(64)
+    shutil.copy(model_path, checkpoints / "ppo_1000_steps.zip")
+    second.save(checkpoints / "ppo_200_steps")
+    paths = find_checkpoints([str(checkpoints)])
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["ppo_200_steps.zip", "ppo_1000_steps.zip"]
+
+    cache = RolloutCache(str(tmp_path / "cache"))
+    settings = dict(n_episodes=6, seed=100, n_envs=3, max_steps=30, cache=cache)
+    first = evaluate_checkpoints(paths, "feature", "PPO", processes=2, **settings)
+    assert not any(result["cached"] for result in first.values())
+    # A renamed copy hits the cache; different settings do not
+    shutil.copy(paths[0], checkpoints / "ppo_300_steps.zip")
+    again = evaluate_checkpoints(find_checkpoints([str(checkpoints)]), "feature", "PPO", **settings)
+    assert all(result["cached"] for result in again.values())
+    assert again[paths[1]]["summary"] == first[paths[1]]["summary"]
+    changed = evaluate_checkpoints(paths[:1], "feature", "PPO", **{**settings, "seed": 101})
+    assert not changed[paths[0]]["cached"]
+
+    rows = ranked(again)
+    assert len(rows) == 3
+    assert len(format_table(rows).splitlines()) == 4
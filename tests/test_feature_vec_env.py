@@ -0,0 +1,66 @@
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.feature_based.parking_feature_vec_env import ParkingFeatureVec
+from utils.layout_bank import single_layout_dtype, write_layout_bank
+from utils.utils import make_prng
+
+def test_vec_reset_and_step():
+    env = ParkingFeatureVec(num_envs=8, max_episode_steps=20)
+    assert isinstance(env, VecEnv)
+    obs = env.reset()
+    assert obs.shape == (8, 13)
+    assert obs.dtype == np.int32
+    for _ in range(50):
+        actions = np.array([env.action_space.sample() for _ in range(8)])
+        obs, rewards, dones, infos = env.step(actions)
+        assert obs.shape == (8, 13)
+        assert rewards.shape == (8,)
+        for done, info in zip(dones, infos):
+            if done:
+                assert "terminal_observation" in info
+
+def test_vec_matches_scalar_env():
+    n, seed = 6, 123
+    vec_env = ParkingFeatureVec(num_envs=n)
+    vec_env.seed(seed)
+    vec_obs = vec_env.reset()
+    envs = []
+    for idx in range(n):
+        env = ParkingFeature()
+        obs, _ = env.reset(seed=seed + idx)
+        assert np.array_equal(obs, vec_obs[idx])
+        envs.append(env)
+    # Replay identical action sequences through both and compare every transition
+    rng = np.random.default_rng(0)
+    alive = np.ones(n, dtype=bool)
+    for _ in range(60):
+        actions = rng.integers(0, 5, size=n)
+        vec_obs, vec_rewards, vec_dones, infos = vec_env.step(actions)
+        for idx in np.flatnonzero(alive):
+            obs, reward, terminated, _, _ = envs[idx].step(actions[idx])
+            expected_obs = infos[idx]["terminal_observation"] if vec_dones[idx] else vec_obs[idx]
+            assert np.array_equal(obs, expected_obs)
+            assert reward == vec_rewards[idx]
+            assert terminated == vec_dones[idx]
+            if terminated:
+                alive[idx] = False
+
+def test_indices_and_options(tmp_path):
+    bank = write_layout_bank(str(tmp_path / "bank.npy"), single_layout_dtype(), 16, seed=0)
+    env = ParkingFeatureVec(num_envs=3, layout_bank=bank)
+    env.reset()
+    assert env.get_attr("car_x", [1]) == [env.car_x[1]]
+    assert len(env.get_attr("max_episode_steps", [0, 2])) == 2
+    env.set_attr("episode_steps", 7, indices=[2])
+    assert env.episode_steps.tolist() == [0, 0, 7]
+    assert env.env_method("seed_prng", 5, indices=[0]) == [None]
+    assert env.get_attr("prng", [0])[0].random() == make_prng(5).random()
+    assert len(env.env_method("profile_stats", indices=[1])) == 1
+
+    env.set_options({"layout_index": 3})
+    # Every lot reset onto bank row 3
+    obs = env.reset()
+    assert (obs == obs[0]).all()
+    assert env._options == [{}, {}, {}]
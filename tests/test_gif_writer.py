@@ -0,0 +1,70 @@
+import numpy as np
+from PIL import Image, ImageSequence
+
+from envs.image_based.parking_image_env import ParkingImage
+from utils.gif_writer import StreamingGifWriter
+
+
+def read_frames(path):
+    with Image.open(path) as gif:
+        return [
+            (np.array(frame.convert("RGB")), frame.info.get("duration"))
+            for frame in ImageSequence.Iterator(gif)
+        ]
+
+
+def flat_frames():
+    rng = np.random.default_rng(0)
+    colors = rng.integers(0, 256, size=(6, 3), dtype=np.uint8)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:] = colors[0]
+    frames = []
+    for i in range(8):
+        frame = frame.copy()
+        if i != 3:  # frame 3 repeats frame 2
+            y, x = rng.integers(0, 40), rng.integers(0, 56)
+            frame[y:y + 8, x:x + 8] = colors[1 + i % 5]
+        frames.append(frame)
+    return frames
+
+
+def test_optimized_gif_round_trips_and_merges_repeats(tmp_path):
+    path = str(tmp_path / "demo.gif")
+    frames = flat_frames()
+    with StreamingGifWriter(path, duration=0.1) as writer:
+        for frame in frames:
+            writer.append_data(frame)
+    decoded = read_frames(path)
+    expected = frames[:3] + frames[4:]
+    assert len(decoded) == len(expected)
+    for (image, _), frame in zip(decoded, expected):
+        assert np.array_equal(image, frame)
+    assert decoded[2][1] == 200
+
+
+def test_plain_gif_writes_every_frame(tmp_path):
+    path = str(tmp_path / "demo.gif")
+    frames = flat_frames()
+    with StreamingGifWriter(path, optimize=False) as writer:
+        for frame in frames:
+            writer.append_data(frame)
+    decoded = read_frames(path)
+    assert len(decoded) == len(frames)
+    assert all(np.array_equal(image, frame) for (image, _), frame in zip(decoded, frames))
+
+
+def test_env_recording_stays_close_to_frames(tmp_path):
+    path = str(tmp_path / "demo.gif")
+    env = ParkingImage(render_mode="rgb_array", obs_mode="grid")
+    env.reset(seed=0)
+    frames = [env.render()]
+    with StreamingGifWriter(path) as writer:
+        writer.append_data(frames[0])
+        for action in [3, 1, 3, 3, 2, 3]:
+            env.step(action)
+            frames.append(env.render())
+            writer.append_data(frames[-1])
+    decoded = read_frames(path)
+    assert len(decoded) == len(frames)
+    for (image, _), frame in zip(decoded, frames):
+        assert np.abs(image.astype(int) - frame).mean() < 2
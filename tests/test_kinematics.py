@@ -0,0 +1,38 @@
+import numpy as np
+import pygame
+
+from utils.kinematics import clip_arrays, clip_rect, move, move_arrays, move_rect
+from utils.utils import CAR_SPEED, ORIENTATIONS, STATE_WIDTH, STATE_HEIGHT, TILE_SIZE
+
+def test_move_matches_named_orientations():
+    up, down, left, right = (ORIENTATIONS.index(name) for name in ["up", "down", "left", "right"])
+    assert move(100, 100, up, 3) == (100, 100 - CAR_SPEED, up)
+    assert move(100, 100, right, 4) == (100 - CAR_SPEED, 100, right)
+    assert move(100, 100, up, 1) == (100, 100, left)
+    assert move(100, 100, left, 1) == (100, 100, down)
+    assert move(100, 100, down, 2) == (100, 100, left)
+    assert move(100, 100, right, 2) == (100, 100, down)
+    assert move(100, 100, down, 0) == (100, 100, down)
+
+def test_rect_and_array_paths_agree():
+    rng = np.random.default_rng(0)
+    n = 64
+    x = rng.integers(0, STATE_WIDTH // TILE_SIZE, n).astype(np.int32) * TILE_SIZE
+    y = rng.integers(0, STATE_HEIGHT // TILE_SIZE, n).astype(np.int32) * TILE_SIZE
+    orientation = rng.integers(0, 4, n).astype(np.int32)
+    rects = [pygame.Rect(int(x[i]), int(y[i]), TILE_SIZE, TILE_SIZE) for i in range(n)]
+    orientations = orientation.tolist()
+    for _ in range(30):
+        actions = rng.integers(0, 5, n)
+        move_arrays(x, y, orientation, actions)
+        clip_arrays(x, y, STATE_WIDTH, STATE_HEIGHT, TILE_SIZE)
+        for i, rect in enumerate(rects):
+            orientations[i] = move_rect(rect, orientations[i], actions[i])
+            clip_rect(rect, STATE_WIDTH, STATE_HEIGHT)
+        assert [(rect.x, rect.y) for rect in rects] == list(zip(x.tolist(), y.tolist()))
+        assert orientations == orientation.tolist()
+
+def test_clip_rect_keeps_car_on_board():
+    rect = pygame.Rect(STATE_WIDTH - 20, -30, TILE_SIZE, TILE_SIZE)
+    clip_rect(rect, STATE_WIDTH, STATE_HEIGHT)
+    assert (rect.right, rect.top) == (STATE_WIDTH, 0)
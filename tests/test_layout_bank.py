@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.feature_based.parking_feature_vec_env import ParkingFeatureVec
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from utils.layout_bank import (
+    LayoutBank, generate_layouts, multi_layout_dtype, single_layout_dtype, write_layout_bank
+)
+from utils.utils import GRID_WIDTH, NO_OF_OBSTACLES, rect_tile
+
+
+def test_generated_layouts_are_distinct_and_reproducible():
+    layouts = generate_layouts(single_layout_dtype(), 500, seed=7)
+    assert np.array_equal(layouts, generate_layouts(single_layout_dtype(), 500, seed=7))
+    tiles = np.concatenate([layouts["car"][:, None], layouts["lot"][:, None], layouts["obstacles"]], axis=1)
+    cells = tiles[..., 1].astype(int) * GRID_WIDTH + tiles[..., 0]
+    assert all(len(set(row)) == len(row) for row in cells.tolist())
+
+
+def test_feature_env_resets_from_memmapped_bank(tmp_path):
+    path = tmp_path / "single.npy"
+    bank = write_layout_bank(path, single_layout_dtype(), 100, seed=1)
+    env = ParkingFeature(layout_bank=str(path), layout_range=(10, 20))
+    assert isinstance(env.layout_bank.layouts, np.memmap)
+    env.reset(options={"layout_index": 3})
+    row = bank[13]
+    assert rect_tile(env.car_rect) == tuple(row["car"])
+    assert rect_tile(env.parking_rect) == tuple(row["lot"])
+    assert [rect_tile(rect) for rect in env.obstacle_rects] == [tuple(tile) for tile in row["obstacles"]]
+    assert env.car_orientation == row["orientation"]
+
+    env.reset(seed=0)
+    assert any(rect_tile(env.car_rect) == tuple(bank[i]["car"]) for i in range(10, 20))
+
+
+def test_vec_env_draws_from_bank():
+    bank = generate_layouts(single_layout_dtype(), 1, seed=2)
+    env = ParkingFeatureVec(4, layout_bank=bank)
+    obs = env.reset()
+    assert (obs[:, 0] // 60 == bank[0]["car"][0]).all()
+
+
+def test_multi_env_resets_from_bank():
+    bank = generate_layouts(multi_layout_dtype(3, 2, NO_OF_OBSTACLES), 5, seed=3)
+    env = ParkingMultiEnv(n_agents=3, n_lots=2, obs_mode="grid", layout_bank=bank)
+    env.reset(options={"layout_index": 4})
+    assert [rect_tile(env.agent_rects[agent]) for agent in env.agents] == [tuple(t) for t in bank[4]["agents"]]
+    assert [rect_tile(rect) for rect in env.parking_rects] == [tuple(t) for t in bank[4]["lots"]]
+
+
+def test_bank_rejects_mismatched_layout():
+    with pytest.raises(ValueError):
+        ParkingMultiEnv(n_agents=2, layout_bank=generate_layouts(multi_layout_dtype(3, 2, 4), 5))
+    with pytest.raises(ValueError):
+        LayoutBank(generate_layouts(single_layout_dtype(), 5), layout_range=(3, 9))
+    # Tiles beyond the env's grid
+    big = generate_layouts(multi_layout_dtype(3, 2, 4), 5, grid_width=24, grid_height=24)
+    with pytest.raises(ValueError):
+        ParkingMultiEnv(n_agents=3, n_lots=2, n_obstacles=4, layout_bank=big)
+    ParkingMultiEnv(n_agents=3, n_lots=2, n_obstacles=4, grid_width=24, grid_height=24, layout_bank=big)
+
+
+def test_layout_index_stays_in_range():
+    bank = LayoutBank(generate_layouts(single_layout_dtype(), 10), layout_range=(2, 6))
+    assert bank.draw(3) == bank.layouts[5]
+    for index in (-1, 4, 9):
+        with pytest.raises(IndexError):
+            bank.draw(index)
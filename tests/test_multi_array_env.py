@@ -0,0 +1,83 @@
+import numpy as np
+
+from envs.grid_obs import CH_OTHER, rect_to_tile
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv, MAX_EPISODE_LENGTH
+from envs.multi_agent.parking_multi_array_env import ParkingMultiArrayEnv
+
+def test_dict_api_reset_and_step():
+    env = ParkingMultiArrayEnv()
+    obs, info = env.reset(seed=0)
+    assert set(obs) == set(env.possible_agents)
+    for _ in range(20):
+        actions = {agent: env.action_space(agent).sample() for agent in env.agents}
+        obs, rewards, terms, trunc, info = env.step(actions)
+        assert set(rewards) == set(actions)
+        for agent, agent_obs in obs.items():
+            assert env.observation_space(agent).contains(agent_obs)
+        if not env.agents:
+            break
+
+def test_single_agent_matches_sequential_env():
+    rng = np.random.default_rng(0)
+    for seed in range(10):
+        env = ParkingMultiEnv(obs_mode="grid", n_agents=1)
+        array_env = ParkingMultiArrayEnv(n_agents=1)
+        obs, _ = env.reset(seed=seed)
+        array_obs, _ = array_env.reset(seed=seed)
+        assert np.array_equal(obs["player_0"], array_obs["player_0"])
+        # The sequential env drops everyone without observations at the time limit, so stop before it
+        for _ in range(MAX_EPISODE_LENGTH - 1):
+            if not env.agents:
+                break
+            actions = {"player_0": int(rng.integers(0, 5))}
+            obs, rewards, terms, _, _ = env.step(actions)
+            array_obs, array_rewards, array_terms, _, _ = array_env.step(actions)
+            assert np.array_equal(obs["player_0"], array_obs["player_0"])
+            assert rewards == array_rewards
+            assert terms == array_terms
+        assert env.agents == array_env.agents
+
+def test_swapping_cars_collide():
+    env = ParkingMultiArrayEnv(n_agents=2, n_lots=0, n_obstacles=0)
+    env.reset_array(seed=0)
+    env.car_x[:] = [0, 60]
+    env.car_y[:] = [0, 0]
+    env.orientation[:] = [3, 2]  # facing each other: right, left
+    obs, rewards, terminated, truncated = env.step_array(np.array([3, 3]))
+    assert terminated.all()
+    assert (rewards == -501).all()
+
+def test_array_api_large_fleet():
+    env = ParkingMultiArrayEnv(n_agents=400, n_lots=50, n_obstacles=50, grid_width=30, grid_height=30)
+    obs = env.reset_array(seed=1)
+    assert obs.shape == (400, 30, 30, 7)
+    for _ in range(10):
+        obs, rewards, terminated, truncated = env.step_array(np.random.randint(0, 5, size=400))
+        assert rewards.shape == (400,)
+
+def test_parking_agent_does_not_see_itself_as_another_car():
+    env = ParkingMultiArrayEnv()
+    rng = np.random.default_rng(0)
+    checked = 0
+    for seed in range(20):
+        env.reset_array(seed=seed)
+        while env.alive.any():
+            obs, rewards, _, _ = env.step_array(rng.integers(0, 5, size=env.n_agents))
+            parked_tiles = [rect_to_tile(rect) for rect, _ in env.successfully_parked]
+            for i in np.flatnonzero(rewards == 1999):  # parked without hitting anyone
+                (row, col), = np.argwhere(obs[i][..., :4].sum(axis=-1))
+                # Alone on the lot unless an earlier car already parked there
+                assert obs[i][row, col, CH_OTHER] == (parked_tiles.count((row, col)) > 1)
+                checked += 1
+    assert checked > 0
+
+def test_pixel_observations_survive_the_next_step():
+    env = ParkingMultiArrayEnv(obs_mode="pixels", render_backend="numpy")
+    obs = env.reset_array(seed=0)
+    kept = obs.copy()
+    assert not np.shares_memory(obs, env.image)
+    obs_after, _, _, _ = env.step_array(np.full(env.n_agents, 1))
+    assert (obs == kept).all()
+    assert not (obs_after == kept).all()
+    shared = ParkingMultiArrayEnv(obs_mode="pixels", render_backend="numpy", reuse_obs_buffer=True)
+    assert np.shares_memory(shared.reset_array(seed=0), shared.image)
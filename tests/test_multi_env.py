@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+from envs.grid_obs import CH_OTHER, rect_to_tile
 from envs.multi_agent.parking_multi_env import ParkingMultiEnv
 
 def test_env_reset_and_step():
@@ -22,3 +24,73 @@ def test_render_runs():
     actions = {agent: env.action_space(agent).sample() for agent in agents}
     obs, rewards, terms, trunc, info = env.step(actions)
     assert isinstance(obs, dict)
+
+def test_grid_obs_mode():
+    env = ParkingMultiEnv(obs_mode="grid")
+    obs, info = env.reset(seed=0)
+    for agent, agent_obs in obs.items():
+        assert env.observation_space(agent).contains(agent_obs)
+        assert agent_obs[..., :4].sum() == 1
+        assert agent_obs[..., 6].sum() == len(env.agents) - 1
+    assert env.image is None
+
+def test_large_fleet():
+    env = ParkingMultiEnv(obs_mode="grid", n_agents=300, n_lots=40, n_obstacles=40, grid_width=24, grid_height=24)
+    obs, info = env.reset(seed=0)
+    assert len(obs) == 300
+    assert len({tuple(rect) for rect in env.agent_rects.values()}) == 300
+    for _ in range(10):
+        actions = {agent: env.action_space(agent).sample() for agent in env.agents}
+        obs, rewards, terms, trunc, info = env.step(actions)
+        # The occupancy index must mirror the surviving agents' rects
+        assert env.occupancy.car_tiles.keys() == set(env.agents)
+        if not env.agents:
+            break
+
+def test_layout_must_fit():
+    with pytest.raises(ValueError):
+        ParkingMultiEnv(n_agents=140, n_lots=4, n_obstacles=4)
+
+def test_multi_seeded_reset_sequence_is_reproducible():
+    first, second = ParkingMultiEnv(obs_mode="grid"), ParkingMultiEnv(obs_mode="grid")
+    first.reset(seed=11)
+    second.reset(seed=11)
+    for _ in range(3):
+        first.reset()
+        second.reset()
+        assert first.agent_rects == second.agent_rects
+        assert first.parking_rects == second.parking_rects
+
+def test_rgb_array_render_without_display():
+    env = ParkingMultiEnv(render_mode="rgb_array", obs_mode="grid")
+    env.reset(seed=1)
+    env.step({agent: 3 for agent in env.agents})
+    frame = env.render()
+    assert frame.shape == (env.screen_height, env.screen_width, 3)
+    assert env.window is None
+
+def test_pixel_observations_survive_the_next_step():
+    env = ParkingMultiEnv()
+    obs, _ = env.reset(seed=0)
+    agent = env.agents[0]
+    kept = obs[agent].copy()
+    env.step({agent: 1 for agent in env.agents})
+    assert (obs[agent] == kept).all()
+
+def test_parking_agent_does_not_see_itself_as_another_car():
+    env = ParkingMultiEnv(obs_mode="grid")
+    rng = np.random.default_rng(0)
+    checked = 0
+    for seed in range(20):
+        env.reset(seed=seed)
+        while env.agents:
+            obs, rewards, _, _, _ = env.step({agent: int(rng.integers(0, 5)) for agent in env.agents})
+            parked_tiles = [rect_to_tile(rect) for rect, _ in env.successfully_parked]
+            for agent, reward in rewards.items():
+                if reward != 1999:  # parked without hitting anyone
+                    continue
+                (row, col), = np.argwhere(obs[agent][..., :4].sum(axis=-1))
+                # Alone on the lot unless an earlier car already parked there
+                assert obs[agent][row, col, CH_OTHER] == (parked_tiles.count((row, col)) > 1)
+                checked += 1
+    assert checked > 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import torch as th
+from stable_baselines3 import PPO
+
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.image_based.parking_image_env import ParkingImage
+from utils.evaluation import evaluate
+from utils.numpy_policy import NumpyPolicy, export_policy
+
+def observations(space, n=512):
+    space.seed(0)
+    return np.stack([space.sample() for _ in range(n)])
+
+@pytest.mark.parametrize("policy_kwargs", [None, {"net_arch": [32, 16, 8], "activation_fn": th.nn.ReLU}])
+def test_matches_ppo_predict(tmp_path, policy_kwargs):
+    model = PPO("MlpPolicy", ParkingFeature(), policy_kwargs=policy_kwargs, seed=0)
+    export_policy(model, tmp_path / "policy.npz")
+    policy = NumpyPolicy.load(tmp_path / "policy.npz")
+    obs = observations(model.observation_space)
+    with th.no_grad():
+        features = model.policy.extract_features(model.policy.obs_to_tensor(obs)[0], model.policy.pi_features_extractor)
+        logits = model.policy.action_net(model.policy.mlp_extractor.forward_actor(features)).numpy()
+    assert np.allclose(policy.action_logits(obs), logits, atol=1e-4)
+    assert (policy.predict(obs)[0] == model.predict(obs, deterministic=True)[0]).all()
+    action, _ = policy.predict(obs[0])
+    assert action.shape == () and action == model.predict(obs[0], deterministic=True)[0]
+    with pytest.raises(ValueError):
+        policy.predict(obs, deterministic=False)
+
+def test_image_observations_are_normalized_like_sb3(tmp_path):
+    env = ParkingImage(resolution=24, grayscale=True, channel_first=True)
+    model = PPO("MlpPolicy", env, n_steps=64, batch_size=64, n_epochs=1, seed=0).learn(64)
+    export_policy(model, tmp_path / "policy.npz")
+    policy = NumpyPolicy.load(tmp_path / "policy.npz")
+    obs = observations(model.observation_space)
+    with th.no_grad():
+        features = model.policy.extract_features(model.policy.obs_to_tensor(obs)[0], model.policy.pi_features_extractor)
+        logits = model.policy.action_net(model.policy.mlp_extractor.forward_actor(features)).numpy()
+    assert np.allclose(policy.action_logits(obs), logits, atol=1e-4)
+    assert (policy.predict(obs)[0] == model.predict(obs, deterministic=True)[0]).all()
+    # Without SB3's image scaling the observations go through unscaled
+    raw = PPO("MlpPolicy", env, policy_kwargs={"normalize_images": False}, seed=0)
+    export_policy(raw, tmp_path / "raw.npz")
+    assert NumpyPolicy.load(tmp_path / "raw.npz").obs_divisor == 1
+
+def test_evaluates_like_the_saved_model(tmp_path):
+    model = PPO("MlpPolicy", ParkingFeature(), n_steps=64, batch_size=64, n_epochs=1, seed=0).learn(64)
+    model.save(tmp_path / "model")
+    export_policy(model, tmp_path / "model.npz")
+    settings = dict(n_episodes=8, n_envs=4, max_steps=40)
+    assert (evaluate("feature", "PPO", str(tmp_path / "model.npz"), **settings)
+            == evaluate("feature", "PPO", str(tmp_path / "model.zip"), **settings))
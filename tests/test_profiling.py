@@ -0,0 +1,77 @@
+from gymnasium.wrappers import TimeLimit
+from stable_baselines3.common.env_util import make_vec_env
+
+from envs.base_env import BaseParkingEnv
+from envs.feature_based.parking_feature_env import ParkingFeature
+from envs.feature_based.parking_feature_vec_env import ParkingFeatureVec
+from envs.image_based.parking_image_env import ParkingImage
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from utils.profiling import set_vec_profiling, vec_profile_stats
+
+
+def run_steps(env, actions):
+    env.reset(seed=0)
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+
+
+def test_feature_env_profiles_each_phase_and_switches_off():
+    env = ParkingFeature()
+    env.enable_profiling()
+    run_steps(env, [1, 3, 3, 2, 3])
+    stats = env.profile_stats()
+    assert stats["step"]["calls"] == 5
+    assert stats["move"]["calls"] == stats["collide"]["calls"] == 5
+    assert "render" not in stats
+    assert stats["step"]["total_ms"] >= stats["move"]["total_ms"]
+
+    env.enable_profiling(False)
+    assert "step" not in vars(env)
+    run_steps(env, [3])
+    assert env.profile_stats()["step"]["calls"] == 5
+
+    # Switching back on resumes the same counters
+    env.enable_profiling()
+    env.enable_profiling()
+    run_steps(env, [3])
+    assert env.profile_stats()["step"]["calls"] == 6
+    assert BaseParkingEnv.__doc__.strip().startswith("Common functionality")
+
+
+def test_image_env_profiles_render_copy_and_downsample():
+    env = ParkingImage(resolution=90, grayscale=True)
+    env.enable_profiling()
+    run_steps(env, [3, 1, 3])
+    stats = env.profile_stats()
+    for phase in ["render", "copy", "downsample", "obs"]:
+        assert stats[phase]["calls"] >= 1
+
+
+def test_multi_env_profiles_per_agent_phases():
+    env = ParkingMultiEnv(obs_mode="grid")
+    env.enable_profiling()
+    env.reset(seed=0)
+    moved = len(env.agents)
+    env.step({agent: 1 for agent in env.agents})
+    stats = env.profile_stats()
+    assert stats["move"]["calls"] == stats["collide"]["calls"] == moved
+    assert stats["obs"]["calls"] == 2
+
+
+def test_stats_aggregate_across_vec_workers():
+    vec_env = make_vec_env(lambda: TimeLimit(ParkingFeature(), 150), n_envs=3)
+    set_vec_profiling(vec_env)
+    vec_env.reset()
+    for _ in range(4):
+        vec_env.step([1, 2, 1])
+    stats = vec_profile_stats(vec_env)
+    assert stats["step"]["calls"] == 12
+    assert stats["step"]["mean_us"] > 0
+
+    batched = ParkingFeatureVec(8)
+    set_vec_profiling(batched)
+    batched.reset()
+    batched.step([1] * 8)
+    assert vec_profile_stats(batched)["step"]["calls"] == 1
@@ -0,0 +1,87 @@
+import numpy as np
+import pygame
+
+from envs.image_based.parking_image_env import ParkingImage
+from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+from utils.utils import STATE_WIDTH, STATE_HEIGHT, GRAY, YELLOW
+
+def full_redraw_image(env):
+    surface = pygame.Surface((STATE_WIDTH, STATE_HEIGHT))
+    surface.fill(GRAY)
+    surface.blit(env.car_images[env.car_orientation], env.car_rect)
+    for obstacle_rect in env.obstacle_rects:
+        surface.blit(env.obstacle_image, obstacle_rect)
+    pygame.draw.rect(surface, (100, 100, 100), env.parking_rect)
+    return pygame.surfarray.array3d(surface)
+
+def full_redraw_multi(env):
+    surface = pygame.Surface((STATE_WIDTH, STATE_HEIGHT))
+    surface.fill(GRAY)
+    for rect in env.parking_rects:
+        pygame.draw.rect(surface, YELLOW, rect)
+    for rect in env.obstacle_rects:
+        surface.blit(env.obstacle_image, rect)
+    for agent in env.agents:
+        surface.blit(env.car_images[env.agent_orientations[agent]], env.agent_rects[agent])
+    for parked_rect, orientation in env.successfully_parked:
+        surface.blit(env.car_images[orientation], parked_rect)
+    return pygame.surfarray.array3d(surface)
+
+def test_image_dirty_render_matches_full_redraw():
+    env = ParkingImage()
+    obs, info = env.reset()
+    assert np.array_equal(obs, full_redraw_image(env))
+    for _ in range(200):
+        obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+        assert np.array_equal(obs, full_redraw_image(env))
+        if terminated or truncated:
+            obs, info = env.reset()
+            assert np.array_equal(obs, full_redraw_image(env))
+
+def test_multi_dirty_render_matches_full_redraw():
+    env = ParkingMultiEnv()
+    fill_surface = env.fill_surface
+    mismatches = []
+
+    def checked_fill_surface(bake=False):
+        fill_surface(bake=bake)
+        if not np.array_equal(env.image, full_redraw_multi(env)):
+            mismatches.append(env.time_step)
+
+    env.fill_surface = checked_fill_surface
+    for seed in range(5):
+        env.reset(seed=seed)
+        for _ in range(30):
+            actions = {agent: env.action_space(agent).sample() for agent in env.agents}
+            env.step(actions)
+            if not env.agents:
+                break
+    assert not mismatches
+
+def test_numpy_backend_matches_pygame_backend():
+    pygame_env = ParkingImage()
+    numpy_env = ParkingImage(render_backend="numpy")
+    for seed in range(5):
+        expected, _ = pygame_env.reset(seed=seed)
+        obs, _ = numpy_env.reset(seed=seed)
+        assert np.array_equal(obs, expected)
+        for action in [3, 1, 3, 3, 2, 4, 3, 0, 2, 3, 3, 1, 4, 4]:
+            expected, _, terminated, _, _ = pygame_env.step(action)
+            obs, _, _, _, _ = numpy_env.step(action)
+            assert np.array_equal(obs, expected)
+            if terminated:
+                break
+
+def test_numpy_backend_matches_pygame_backend_multi():
+    pygame_env = ParkingMultiEnv()
+    numpy_env = ParkingMultiEnv(render_backend="numpy")
+    rng = np.random.default_rng(0)
+    for seed in range(5):
+        pygame_env.reset(seed=seed)
+        numpy_env.reset(seed=seed)
+        assert np.array_equal(numpy_env.image, pygame_env.image)
+        while pygame_env.agents:
+            actions = {agent: int(rng.integers(0, 5)) for agent in pygame_env.agents}
+            pygame_env.step(actions)
+            numpy_env.step(actions)
+            assert np.array_equal(numpy_env.image, pygame_env.image)
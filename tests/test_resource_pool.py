@@ -0,0 +1,55 @@
+import os
+import threading
+
+from utils.resource_pool import EnvPool, ModelCache
+
+
+class FakeEnv:
+    def __init__(self, key):
+        self.key = key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_env_pool_reuses_and_isolates_envs():
+    pool = EnvPool({"a": lambda: FakeEnv("a"), "b": lambda: FakeEnv("b")})
+    pool.warm("a")
+    with pool.lease("a") as first, pool.lease("a") as second:
+        assert first is not second
+    with pool.lease("a") as again:
+        assert again in (first, second)
+
+
+def test_env_pool_evicts_least_recently_used_key():
+    pool = EnvPool({"a": lambda: FakeEnv("a"), "b": lambda: FakeEnv("b")}, max_idle=2)
+    pool.warm("a", 2)
+    old = list(pool.idle["a"])
+    pool.warm("b")
+    assert sum(env.closed for env in old) == 1
+    assert len(pool.idle["b"]) == 1
+
+
+def test_model_cache_reloads_changed_files(tmp_path):
+    path = tmp_path / "model.txt"
+    path.write_text("v1")
+    loads = []
+
+    def loader(p):
+        loads.append(p)
+        with open(p) as f:
+            return f.read()
+
+    cache = ModelCache(loader, max_models=1)
+    threads = [threading.Thread(target=cache.get, args=(str(path),)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    path.write_text("v2!")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache.get(str(path)) == "v2!"
+    assert len(loads) == 2
@@ -0,0 +1,86 @@
+import os
+
+from utils.rollout_cache import RolloutCache, file_digest, rollout_key
+
+
+def stage_entry(cache, payload):
+    staged = cache.stage()
+    with open(os.path.join(staged, "demo.gif"), "wb") as f:
+        f.write(payload)
+    return staged
+
+
+def test_rollout_key_depends_on_every_field():
+    base = dict(env="feature-based", policy="random", seed=0, episodes=1, steps=30)
+    assert rollout_key(**base) == rollout_key(**dict(reversed(list(base.items()))))
+    for field, value in [("seed", 1), ("episodes", 2), ("steps", 31), ("policy", "abc"), ("env", "multi-agent")]:
+        assert rollout_key(**{**base, field: value}) != rollout_key(**base)
+
+
+def test_put_then_get_round_trips(tmp_path):
+    cache = RolloutCache(str(tmp_path))
+    key = rollout_key(seed=3)
+    assert cache.get(key) is None
+    record = cache.put(key, {"rewards": [1.0], "video": "demo.gif"}, stage_entry(cache, b"gif"))
+    assert record["rewards"] == [1.0]
+    with open(os.path.join(record["dir"], record["video"]), "rb") as f:
+        assert f.read() == b"gif"
+    # A second commit of the same key keeps the first entry
+    cache.put(key, {"rewards": [2.0], "video": "demo.gif"}, stage_entry(cache, b"other"))
+    assert cache.get(key)["rewards"] == [1.0]
+    assert os.listdir(cache.staging) == []
+
+
+def test_evicts_least_recently_read_entries(tmp_path):
+    cache = RolloutCache(str(tmp_path), max_bytes=2500)
+    keys = [rollout_key(seed=i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, {"video": "demo.gif"}, stage_entry(cache, b"x" * 1000))
+        os.utime(os.path.join(cache.entry_dir(key), "rollout.json"), (i, i))
+    cache.get(keys[0])
+    cache.put(keys[2], {"video": "demo.gif"}, stage_entry(cache, b"x" * 1000))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_file_digest_tracks_content(tmp_path):
+    path = tmp_path / "model.zip"
+    path.write_bytes(b"a")
+    first = file_digest(str(path))
+    path.write_bytes(b"bb")
+    assert file_digest(str(path)) != first
+
+
+def test_failed_rollout_leaves_no_staging_dir(tmp_path):
+    cache = RolloutCache(str(tmp_path))
+    try:
+        with cache.staged() as staged:
+            assert os.path.isdir(staged)
+            raise RuntimeError("rollout failed")
+    except RuntimeError:
+        pass
+    assert os.listdir(cache.staging) == []
+
+
+def test_concurrent_eviction_tolerates_vanished_entries(tmp_path):
+    import threading
+    cache = RolloutCache(str(tmp_path), max_bytes=0)
+    for i in range(20):
+        os.makedirs(cache.entry_dir(str(i)))
+        with open(os.path.join(cache.entry_dir(str(i)), "rollout.json"), "w") as f:
+            f.write("{}")
+    errors = []
+
+    def evict():
+        try:
+            cache.evict()
+        except OSError as error:
+            errors.append(error)
+    threads = [threading.Thread(target=evict) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # A second cache on the same directory (another process) sees entries vanish mid-scan
+    RolloutCache(str(tmp_path), max_bytes=0).evict()
+    assert errors == [] and os.listdir(tmp_path) == [".staging"]
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import gymnasium as gym
+import numpy as np
+import pytest
+from gymnasium.wrappers import TimeLimit
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from envs.image_based.parking_image_env import ParkingImage
+from envs.shm_vec_env import SharedMemoryVecEnv, available_cpus
+
+def make_image_env():
+    return TimeLimit(ParkingImage(resolution=90, grayscale=True, channel_first=True), 15)
+
+def test_matches_dummy_vec_env():
+    shm_env = make_vec_env(
+        make_image_env, n_envs=3, seed=7, vec_env_cls=SharedMemoryVecEnv, vec_env_kwargs={"cpu_affinity": "auto"}
+    )
+    dummy_env = make_vec_env(make_image_env, n_envs=3, seed=7, vec_env_cls=DummyVecEnv)
+    try:
+        assert (shm_env.reset() == dummy_env.reset()).all()
+        rng = np.random.default_rng(0)
+        for _ in range(40):
+            actions = rng.integers(0, 5, 3)
+            obs_a, rewards_a, dones_a, infos_a = shm_env.step(actions)
+            obs_b, rewards_b, dones_b, infos_b = dummy_env.step(actions)
+            assert (obs_a == obs_b).all()
+            assert (rewards_a == rewards_b).all() and (dones_a == dones_b).all()
+            for info_a, info_b, done in zip(infos_a, infos_b, dones_a):
+                if done:
+                    assert (info_a["terminal_observation"] == info_b["terminal_observation"]).all()
+                    assert info_a["TimeLimit.truncated"] == info_b["TimeLimit.truncated"]
+        assert shm_env.get_attr("obs_mode") == ["pixels"] * 3
+        assert len(shm_env.env_method("get_state")) == 3
+    finally:
+        shm_env.close()
+        dummy_env.close()
+
+def test_available_cpus_and_box_only():
+    assert len(available_cpus()) >= 1
+    with pytest.raises(ValueError):
+        SharedMemoryVecEnv([lambda: gym.make("FrozenLake-v1")], start_method="fork")
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver", "spawn"])
+def test_close_leaves_nothing_for_the_resource_tracker(start_method):
+    # The tracker reports at interpreter exit, so run the env in a fresh interpreter and read its stderr
+    script = (
+        "from tests.test_shm_vec_env import make_image_env\n"
+        "from envs.shm_vec_env import SharedMemoryVecEnv\n"
+        f"env = SharedMemoryVecEnv([make_image_env] * 2, start_method={start_method!r})\n"
+        "env.reset()\n"
+        "env.step([0, 1])\n"
+        "env.close()\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "resource_tracker" not in result.stderr and "Traceback" not in result.stderr
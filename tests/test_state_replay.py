@@ -0,0 +1,65 @@
+import pickle
+
+import numpy as np
+import pytest
+from stable_baselines3.common.env_util import make_vec_env
+from gymnasium.wrappers import TimeLimit
+
+from envs.image_based.parking_image_env import ParkingImage, STATE_SIZE
+from envs.state_replay import StateReplayBuffer
+
+IMAGE_KWARGS = dict(resolution=90, grayscale=True, channel_first=True)
+
+def fill_buffer(n_envs=2, steps=60):
+    vec_env = make_vec_env(
+        lambda: TimeLimit(ParkingImage(**IMAGE_KWARGS, record_states=True), 20), n_envs=n_envs, seed=0
+    )
+    buffer = StateReplayBuffer(
+        1000, vec_env.observation_space, vec_env.action_space, device="cpu", n_envs=n_envs,
+        env_kwargs=IMAGE_KWARGS
+    )
+    frames = []
+    obs = vec_env.reset()
+    rng = np.random.default_rng(0)
+    for _ in range(steps):
+        actions = rng.integers(0, 5, n_envs)
+        next_obs, rewards, dones, infos = vec_env.step(actions)
+        real_next = next_obs.copy()
+        for i, done in enumerate(dones):
+            if done:
+                real_next[i] = infos[i]["terminal_observation"]
+        buffer.add(obs, real_next, actions, rewards, dones, infos)
+        frames.append((obs.copy(), real_next))
+        obs = next_obs
+    vec_env.close()
+    return buffer, frames
+
+def test_rendered_transitions_match_the_env_frames():
+    buffer, frames = fill_buffer()
+    steps, n_envs = len(frames), buffer.n_envs
+    batch_inds = np.repeat(np.arange(steps), n_envs)
+    env_inds = np.tile(np.arange(n_envs), steps)
+    obs, next_obs = buffer.render_transitions(
+        buffer.states[batch_inds, env_inds], buffer.next_states[batch_inds, env_inds]
+    )
+    expected_obs = np.stack([frames[b][0][e] for b, e in zip(batch_inds, env_inds)])
+    expected_next = np.stack([frames[b][1][e] for b, e in zip(batch_inds, env_inds)])
+    assert (obs == expected_obs).all()
+    assert (next_obs == expected_next).all()
+
+def test_samples_and_pickles_compactly():
+    buffer, _ = fill_buffer()
+    samples = buffer.sample(16)
+    assert tuple(samples.observations.shape) == (16, 1, 90, 90)
+    assert buffer.states.shape[-1] == STATE_SIZE
+    assert not hasattr(buffer, "observations")
+    restored = pickle.loads(pickle.dumps(buffer))
+    assert restored.render_env is None
+    assert (restored.states == buffer.states).all()
+    restored.sample(4)
+
+def test_rejects_optimize_memory_usage():
+    env = ParkingImage(**IMAGE_KWARGS)
+    with pytest.raises(ValueError):
+        StateReplayBuffer(10, env.observation_space, env.action_space, optimize_memory_usage=True,
+                          handle_timeout_termination=False)
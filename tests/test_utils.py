@@ -0,0 +1,18 @@
+import random
+
+import pytest
+
+from utils.utils import GRID_WIDTH, GRID_HEIGHT, sample_free_tiles
+
+def test_sample_free_tiles_fills_whole_grid():
+    occupied = [(0, 0), (5, 5)]
+    tiles = sample_free_tiles(GRID_WIDTH * GRID_HEIGHT - 2, occupied, prng=random.Random(0))
+    assert len(set(tiles)) == len(tiles)
+    assert not set(tiles) & set(occupied)
+
+def test_sample_free_tiles_is_seeded():
+    assert sample_free_tiles(10, prng=random.Random(3)) == sample_free_tiles(10, prng=random.Random(3))
+
+def test_sample_free_tiles_rejects_overfull_layout():
+    with pytest.raises(ValueError):
+        sample_free_tiles(GRID_WIDTH * GRID_HEIGHT + 1)
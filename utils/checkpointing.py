@@ -0,0 +1,268 @@
+"""
+Checkpoints and log flushes written on a background thread.
+
+The training thread only takes snapshots: model parameters, optimizer state and
+attributes are copied into memory, and the writer thread serializes them to
+disk. A bounded queue gives backpressure if the disk falls behind, and one
+writer keeps writes in submission order.
+"""
+import copy
+import os
+import pickle
+import queue
+import threading
+import time
+
+import numpy as np
+import torch as th
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.logger import DISABLED, KVWriter, Logger, SeqWriter
+from stable_baselines3.common.save_util import save_to_pkl, save_to_zip_file
+from stable_baselines3.common.utils import safe_mean
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Runs submitted jobs in order on one daemon thread; a failed job re-raises on the next call."""
+
+    def __init__(self, max_pending=4):
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is _STOP:
+                    return
+                if self.error is None:
+                    job()
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.jobs.task_done()
+
+    def _raise_pending_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("background write failed") from error
+
+    def submit(self, job):
+        self._raise_pending_error()
+        self.jobs.put(job)
+
+    def flush(self):
+        """Block until everything submitted so far is on disk."""
+        self.jobs.join()
+        self._raise_pending_error()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.jobs.put(_STOP)
+            self.thread.join()
+        self._raise_pending_error()
+
+
+class BackgroundLogger(Logger):
+    """
+    SB3 Logger whose `dump` and `log` hand a copy of their values to a BackgroundWriter,
+    so every output format is written from the writer thread alone.
+    """
+
+    def __init__(self, folder, output_formats, writer):
+        super().__init__(folder, output_formats)
+        self.writer = writer
+
+    @classmethod
+    def wrap(cls, logger, writer):
+        background = cls(logger.get_dir(), logger.output_formats, writer)
+        background.set_level(logger.level)
+        return background
+
+    def dump(self, step=0):
+        if self.level == DISABLED:
+            return
+        values, excluded = dict(self.name_to_value), dict(self.name_to_excluded)
+        formats = [f for f in self.output_formats if isinstance(f, KVWriter)]
+        self.writer.submit(lambda: [f.write(values, excluded, step) for f in formats])
+        self.name_to_value.clear()
+        self.name_to_count.clear()
+        self.name_to_excluded.clear()
+
+    def _do_log(self, args):
+        sequence = list(map(str, args))
+        formats = [f for f in self.output_formats if isinstance(f, SeqWriter)]
+        self.writer.submit(lambda: [f.write_sequence(sequence) for f in formats])
+
+    def close(self):
+        self.writer.flush()
+        super().close()
+
+
+def _copy_tensors(value):
+    """CPU copy of every tensor in a (nested) state dict, so the optimizer can keep updating the originals."""
+    if isinstance(value, th.Tensor):
+        return value.detach().to("cpu", copy=True)
+    if isinstance(value, dict):
+        return {key: _copy_tensors(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_copy_tensors(item) for item in value)
+    return value
+
+
+def snapshot_model(model):
+    """The arguments `model.save` would pass to save_to_zip_file, detached from the live model."""
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dicts_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    data = copy.deepcopy({key: value for key, value in model.__dict__.items() if key not in exclude})
+    pytorch_variables = {}
+    for name in torch_variable_names:
+        owner = model
+        for part in name.split("."):
+            owner = getattr(owner, part)
+        pytorch_variables[name] = _copy_tensors(owner)
+    return data, _copy_tensors(model.get_parameters()), pytorch_variables
+
+
+def _copy_rows(value, filled, buffer_size):
+    """Copy the first `filled` rows of every buffer-length array; a closure re-pads them to full size."""
+    if isinstance(value, np.ndarray) and value.shape[:1] == (buffer_size,):
+        rows, shape, dtype = value[:filled].copy(), value.shape, value.dtype
+
+        def pad():
+            full = np.zeros(shape, dtype=dtype)
+            full[:filled] = rows
+            return full
+        return pad
+    if isinstance(value, dict):
+        items = {key: _copy_rows(item, filled, buffer_size) for key, item in value.items()}
+        return lambda: {key: item() for key, item in items.items()}
+    value = copy.deepcopy(value)
+    return lambda: value
+
+
+def snapshot_buffer(buffer):
+    """
+    Snapshot of a replay buffer that copies only its filled rows, and returns a
+    function rebuilding the full buffer. A deepcopy would touch every page of a
+    mostly empty buffer on the training thread.
+    """
+    filled = buffer.buffer_size if buffer.full else buffer.pos
+    state = {key: _copy_rows(value, filled, buffer.buffer_size) for key, value in buffer.__getstate__().items()}
+
+    def restore():
+        clone = object.__new__(type(buffer))
+        clone.__dict__.update({key: value() for key, value in state.items()})
+        return clone
+    return restore
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """
+    Checkpoints every `save_every_steps` total env steps and/or `save_every_seconds`
+    of wall-clock time, serialized on `writer` instead of the training thread.
+
+    Retention keeps the `keep_last` newest checkpoints plus the `keep_best` with the
+    highest mean episode reward at save time; older files are deleted after each
+    write, and keep_last=None keeps everything. File names match SB3's CheckpointCallback.
+    """
+
+    def __init__(
+        self, writer, save_path, name_prefix="rl_model", save_every_steps=None, save_every_seconds=None,
+        keep_last=3, keep_best=1, save_replay_buffer=False, save_vecnormalize=False, verbose=0
+    ):
+        super().__init__(verbose)
+        if save_every_steps is None and save_every_seconds is None:
+            raise ValueError("Set save_every_steps, save_every_seconds or both")
+        self.writer = writer
+        self.save_path = save_path
+        self.name_prefix = name_prefix
+        self.save_every_steps = save_every_steps
+        self.save_every_seconds = save_every_seconds
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.save_replay_buffer = save_replay_buffer
+        self.save_vecnormalize = save_vecnormalize
+        self.last_save_step = 0
+        self.last_save_time = None
+        # (num_timesteps, mean episode reward, files) of every checkpoint still on disk
+        self.checkpoints = []
+
+    def _init_callback(self):
+        os.makedirs(self.save_path, exist_ok=True)
+        self.last_save_time = time.monotonic()
+        self.last_save_step = self.num_timesteps
+
+    def checkpoint_path(self, checkpoint_type="", extension="zip"):
+        return os.path.join(self.save_path, f"{self.name_prefix}_{checkpoint_type}{self.num_timesteps}_steps.{extension}")
+
+    def due(self):
+        if self.save_every_steps is not None and self.num_timesteps - self.last_save_step >= self.save_every_steps:
+            return True
+        return self.save_every_seconds is not None and time.monotonic() - self.last_save_time >= self.save_every_seconds
+
+    def _on_step(self):
+        if self.due():
+            self.save()
+        return True
+
+    def _on_training_end(self):
+        self.writer.flush()
+
+    def save(self):
+        self.last_save_step = self.num_timesteps
+        self.last_save_time = time.monotonic()
+        # Snapshot on the training thread; everything below the submit runs on the writer
+        jobs = []
+        model_path = self.checkpoint_path()
+        data, params, pytorch_variables = snapshot_model(self.model)
+        jobs.append(lambda: save_to_zip_file(model_path, data=data, params=params, pytorch_variables=pytorch_variables))
+        files = [model_path]
+        if self.save_replay_buffer and getattr(self.model, "replay_buffer", None) is not None:
+            buffer_path = self.checkpoint_path("replay_buffer_", "pkl")
+            restore_buffer = snapshot_buffer(self.model.replay_buffer)
+            jobs.append(lambda: save_to_pkl(buffer_path, restore_buffer()))
+            files.append(buffer_path)
+        vec_normalize = self.model.get_vec_normalize_env()
+        if self.save_vecnormalize and vec_normalize is not None:
+            vec_normalize_path = self.checkpoint_path("vecnormalize_", "pkl")
+            # VecNormalize pickles only its statistics, which are small
+            payload = pickle.dumps(vec_normalize)
+            jobs.append(lambda: _write_bytes(vec_normalize_path, payload))
+            files.append(vec_normalize_path)
+
+        episode_rewards = [info["r"] for info in self.model.ep_info_buffer or []]
+        score = safe_mean(episode_rewards) if episode_rewards else -np.inf
+        self.checkpoints.append((self.num_timesteps, score, files))
+        stale = self.expired()
+        if self.verbose >= 2:
+            print(f"Saving model checkpoint to {model_path}")
+
+        def write():
+            for job in jobs:
+                job()
+            for path in stale:
+                if os.path.exists(path):
+                    os.remove(path)
+        self.writer.submit(write)
+
+    def expired(self):
+        """Drop checkpoints outside the retention policy and return their files."""
+        if self.keep_last is None:
+            return []
+        newest = sorted(self.checkpoints, key=lambda c: c[0])[-self.keep_last:] if self.keep_last else []
+        best = sorted(self.checkpoints, key=lambda c: c[1])[-self.keep_best:] if self.keep_best else []
+        keep = {c[0] for c in newest + best}
+        stale = [path for c in self.checkpoints if c[0] not in keep for path in c[2]]
+        self.checkpoints = [c for c in self.checkpoints if c[0] in keep]
+        return stale
+
+
+def _write_bytes(path, payload):
+    with open(path, "wb") as f:
+        f.write(payload)
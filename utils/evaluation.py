@@ -0,0 +1,261 @@
+"""
+Headless policy evaluation over a set of seeded episodes.
+
+Each episode is identified by its reset seed, so a result depends only on the
+policy and the seed list, not on how many envs or processes ran it. Every step,
+the observations of all live envs (and, for the multi-agent env, all live
+agents) go through the policy as one batch.
+"""
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.rollout_cache import file_digest, rollout_key
+
+OUTCOMES = ("success", "collision", "timeout")
+# Step limits train_rl.py wraps each env in; the multi env also ends itself after MAX_EPISODE_LENGTH
+DEFAULT_MAX_STEPS = {"feature": 150, "image": 400, "multi": 150}
+# Image env observation side train_rl.py uses unless told otherwise
+DEFAULT_RESOLUTION = 90
+
+
+def add_image_env_args(parser):
+    """Image env options for scripts loading what train_rl.py trained; the defaults match its own."""
+    parser.add_argument(
+        "--resolution", type=int, default=DEFAULT_RESOLUTION, help="Image env observation side, as trained"
+    )
+    parser.add_argument("--color", action="store_true", help="Image env trained on RGB observations")
+    parser.add_argument("--frame_stack", type=int, default=1)
+
+
+def image_env_kwargs(args):
+    """make_eval_env kwargs from the options of `add_image_env_args`."""
+    return dict(resolution=args.resolution, grayscale=not args.color, channel_first=True, frame_stack=args.frame_stack)
+
+
+def make_eval_env(env_name, render_mode=None, frame_stack=1, **env_kwargs):
+    """An unwrapped env of `env_name`; step limits are enforced by the evaluator."""
+    if env_name == "feature":
+        from envs.feature_based.parking_feature_env import ParkingFeature
+        return ParkingFeature(render_mode=render_mode, **env_kwargs)
+    if env_name == "image":
+        from envs.image_based.parking_image_env import ParkingImage
+        env = ParkingImage(render_mode=render_mode, **env_kwargs)
+        if frame_stack > 1:
+            from envs.pixel_obs import SharedFrameStack
+            env = SharedFrameStack(env, n_stack=frame_stack)
+        return env
+    if env_name == "multi":
+        from envs.multi_agent.parking_multi_env import ParkingMultiEnv
+        return ParkingMultiEnv(render_mode=render_mode, **env_kwargs)
+    raise ValueError(f"Unknown env {env_name!r}")
+
+
+def load_policy(algo, model_path):
+    """
+    Deterministic batch predictor of a saved model: (n, *obs_shape) -> (n,) actions.
+    An .npz from scripts/export_policy.py runs without torch.
+    """
+    if model_path.endswith(".npz"):
+        from utils.numpy_policy import NumpyPolicy
+        policy = NumpyPolicy.load(model_path)
+        return lambda obs: policy.predict(obs)[0]
+    from stable_baselines3 import DQN, PPO
+    model = {"PPO": PPO, "DQN": DQN}[algo].load(model_path, device="cpu")
+    return lambda obs: model.predict(obs, deterministic=True)[0]
+
+
+def classify(reward, terminated):
+    """Outcome of an agent from its final step: parking pays, crashing costs, anything else ran out of time."""
+    if not terminated:
+        return "timeout"
+    return "success" if reward > 0 else "collision"
+
+
+def _new_episode(env, seed):
+    obs, _ = env.reset(seed=seed)
+    return {"seed": seed, "obs": obs, "length": 0, "reward": 0.0, "outcomes": dict.fromkeys(OUTCOMES, 0)}
+
+
+def _finish(episode):
+    return {key: episode[key] for key in ("seed", "length", "reward", "outcomes")}
+
+
+def run_episodes(envs, predict, seeds, max_steps, multi_agent=False):
+    """
+    Play one episode per seed across `envs`, handing the next seed to whichever env
+    finishes first. Returns per-episode records (seed, length, reward, outcome
+    counts per agent) sorted by seed.
+    """
+    pending = list(seeds)[::-1]
+    episodes = [None] * len(envs)
+    results = []
+
+    def start(i):
+        episodes[i] = _new_episode(envs[i], pending.pop()) if pending else None
+        if multi_agent and episodes[i] is not None:
+            episodes[i]["live"] = set(envs[i].agents)
+
+    for i in range(len(envs)):
+        start(i)
+    while True:
+        live = [i for i, episode in enumerate(episodes) if episode is not None]
+        if not live:
+            break
+        if multi_agent:
+            keys = [(i, agent) for i in live for agent in envs[i].agents]
+            actions = predict(np.stack([episodes[i]["obs"][agent] for i, agent in keys])) if keys else []
+            per_env = {i: {} for i in live}
+            for (i, agent), action in zip(keys, actions):
+                per_env[i][agent] = action
+        else:
+            per_env = dict(zip(live, predict(np.stack([episodes[i]["obs"] for i in live]))))
+
+        for i in live:
+            episode = episodes[i]
+            episode["length"] += 1
+            if multi_agent:
+                obs, rewards, terminated, _, _ = envs[i].step(per_env[i])
+                episode["reward"] += float(sum(rewards.values()))
+                for agent, done in terminated.items():
+                    if done and agent in episode["live"]:
+                        episode["outcomes"][classify(rewards[agent], True)] += 1
+                        episode["live"].discard(agent)
+                done = not envs[i].agents
+            else:
+                obs, reward, terminated, truncated, _ = envs[i].step(per_env[i])
+                episode["reward"] += float(reward)
+                done = terminated or truncated
+                if done or episode["length"] >= max_steps:
+                    episode["outcomes"][classify(reward, terminated)] += 1
+            episode["obs"] = obs
+            if done or episode["length"] >= max_steps:
+                if multi_agent:
+                    episode["outcomes"]["timeout"] += len(episode["live"])
+                results.append(_finish(episode))
+                start(i)
+    return sorted(results, key=lambda episode: episode["seed"])
+
+
+def distribution(values):
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return {}
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        "mean": float(values.mean()), "std": float(values.std()), "min": float(values.min()),
+        "p25": float(p25), "median": float(median), "p75": float(p75), "max": float(values.max()),
+    }
+
+
+def summarize(episodes):
+    """Rates are per agent (one per episode for the single-agent envs); lengths and rewards per episode."""
+    counts = {outcome: sum(episode["outcomes"][outcome] for episode in episodes) for outcome in OUTCOMES}
+    agents = sum(counts.values())
+    summary = {"episodes": len(episodes), "agents": agents}
+    for outcome in OUTCOMES:
+        summary[f"{outcome}_rate"] = counts[outcome] / agents if agents else 0.0
+    summary["episode_length"] = distribution([episode["length"] for episode in episodes])
+    summary["episode_reward"] = distribution([episode["reward"] for episode in episodes])
+    return summary
+
+
+def _init_worker():
+    # One torch thread per worker (read when torch is first imported); the pool supplies the parallelism
+    os.environ["OMP_NUM_THREADS"] = "1"
+
+
+def make_pool(processes):
+    """Worker pool for evaluations; fresh interpreters, since the parent may already run torch threads."""
+    start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(processes, mp_context=mp.get_context(start_method), initializer=_init_worker)
+
+
+def _evaluate_seeds(env_name, algo, model_path, seeds, n_envs, max_steps, env_kwargs):
+    predict = load_policy(algo, model_path)
+    envs = [make_eval_env(env_name, **env_kwargs) for _ in range(max(min(n_envs, len(seeds)), 1))]
+    try:
+        return run_episodes(envs, predict, seeds, max_steps, multi_agent=env_name == "multi")
+    finally:
+        for env in envs:
+            env.close()
+
+
+def evaluate(
+    env_name, algo, model_path, n_episodes=100, seed=0, n_envs=8, processes=1, max_steps=None, env_kwargs=None
+):
+    """
+    Evaluate a saved model on seeds [seed, seed + n_episodes). `processes` > 1 splits
+    the seeds over a process pool, each worker running `n_envs` envs. Returns
+    {"summary": ..., "episodes": [...]}.
+    """
+    seeds = list(range(seed, seed + n_episodes))
+    max_steps = max_steps or DEFAULT_MAX_STEPS[env_name]
+    env_kwargs = env_kwargs or {}
+    processes = max(min(processes, n_episodes), 1)
+    if processes == 1:
+        episodes = _evaluate_seeds(env_name, algo, model_path, seeds, n_envs, max_steps, env_kwargs)
+    else:
+        chunks = [seeds[i::processes] for i in range(processes)]
+        with make_pool(processes) as pool:
+            futures = [
+                pool.submit(_evaluate_seeds, env_name, algo, os.path.abspath(model_path), chunk, n_envs, max_steps,
+                            env_kwargs)
+                for chunk in chunks
+            ]
+            episodes = sorted(
+                (episode for future in futures for episode in future.result()), key=lambda episode: episode["seed"]
+            )
+    return {"summary": summarize(episodes), "episodes": episodes}
+
+
+def evaluate_checkpoints(
+    paths, env_name, algo, n_episodes=100, seed=0, n_envs=8, processes=1, max_steps=None, env_kwargs=None, cache=None
+):
+    """
+    Summaries of several saved models on the same seeds, one checkpoint per pool task.
+
+    With a RolloutCache, results are stored under the checkpoint's content hash plus
+    the evaluation settings, so only checkpoints never scored under those settings
+    are evaluated; renamed or copied files hit the cache. Returns
+    {path: {"summary": ..., "cached": bool}}.
+    """
+    seeds = list(range(seed, seed + n_episodes))
+    max_steps = max_steps or DEFAULT_MAX_STEPS[env_name]
+    env_kwargs = env_kwargs or {}
+    results, missing = {}, {}
+    for path in paths:
+        key = rollout_key(
+            kind="checkpoint_eval", model=file_digest(path), env=env_name, algo=algo, seed=seed,
+            episodes=n_episodes, steps=max_steps, env_kwargs=env_kwargs
+        )
+        record = cache.get(key) if cache is not None else None
+        if record is not None:
+            results[path] = {"summary": record["summary"], "cached": True}
+        else:
+            missing[path] = key
+
+    def store(path, episodes):
+        summary = summarize(episodes)
+        if cache is not None:
+            with cache.staged() as staged:
+                cache.put(missing[path], {"summary": summary}, staged)
+        results[path] = {"summary": summary, "cached": False}
+
+    processes = max(min(processes, len(missing)), 1)
+    if processes == 1:
+        for path in missing:
+            store(path, _evaluate_seeds(env_name, algo, path, seeds, n_envs, max_steps, env_kwargs))
+    else:
+        with make_pool(processes) as pool:
+            futures = {
+                pool.submit(_evaluate_seeds, env_name, algo, os.path.abspath(path), seeds, n_envs, max_steps,
+                            env_kwargs): path
+                for path in missing
+            }
+            # Store as workers finish, so an interrupted run keeps what it already scored
+            for future in as_completed(futures):
+                store(futures[future], future.result())
+    return {path: results[path] for path in paths}
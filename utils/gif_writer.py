@@ -0,0 +1,136 @@
+"""
+Streaming animated GIF writer for demo recordings.
+
+Frames are encoded and written as they arrive, so memory stays at one frame
+no matter how long the recording is. Pillow encodes each frame's pixels; this
+module only assembles the GIF container around them.
+"""
+import io
+import struct
+
+import numpy as np
+from PIL import Image
+
+
+def _skip_sub_blocks(data, pos):
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def encode_gif_image(image):
+    """
+    Encode a P-mode PIL image with Pillow and return (color_table, table_bits, lzw_data),
+    where lzw_data is the min-code-size byte plus data sub-blocks of the single image.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="GIF", interlace=False)
+    data = buffer.getvalue()
+    flags = data[10]
+    pos = 13
+    color_table, table_bits = None, 0
+    if flags & 0x80:
+        table_bits = flags & 0x07
+        size = 3 << (table_bits + 1)
+        color_table = data[pos:pos + size]
+        pos += size
+    while data[pos] == 0x21:
+        pos = _skip_sub_blocks(data, pos + 2)
+    assert data[pos] == 0x2C, "Pillow wrote an unexpected GIF block"
+    flags = data[pos + 9]
+    pos += 10
+    if flags & 0x80:
+        table_bits = flags & 0x07
+        size = 3 << (table_bits + 1)
+        color_table = data[pos:pos + size]
+        pos += size
+    end = _skip_sub_blocks(data, pos + 1)
+    return color_table, table_bits, data[pos:end]
+
+
+class StreamingGifWriter:
+    """
+    Appends (height, width, rgb) uint8 frames to an animated GIF as they are produced.
+
+    Every written rectangle carries its own palette, trimmed to the colours it
+    uses. With `optimize`, only the bounding box that changed since the previous
+    frame is written, so a step that moves one car costs a car-sized block, and
+    unchanged frames just extend the previous frame's delay. Otherwise each
+    frame is written in full.
+
+    Exposes `append_data`/`close` like an imageio writer so callers can swap the two.
+    """
+
+    def __init__(self, file, duration=0.15, loop=0, optimize=True):
+        self.file = open(file, "wb") if isinstance(file, str) else file
+        self.owns_file = isinstance(file, str)
+        self.delay = max(1, round(duration * 100))
+        self.loop = loop
+        self.optimize = optimize
+        self.previous = None
+        self.pending = None
+        self.pending_delay = 0
+        self.size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_header(self, width, height):
+        self.size = (width, height)
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+
+    def _flush_pending(self):
+        if self.pending is None:
+            return
+        # Graphic control: leave the frame in place so the next sub-rectangle draws over it
+        self.file.write(b"\x21\xF9\x04\x04" + struct.pack("<H", self.pending_delay) + b"\x00\x00")
+        self.file.write(self.pending)
+        self.pending = None
+
+    def _encode(self, frame, left, top):
+        height, width = frame.shape[:2]
+        image = Image.fromarray(np.ascontiguousarray(frame), "RGB").quantize(colors=256)
+        color_table, table_bits, lzw_data = encode_gif_image(image)
+        descriptor = struct.pack("<BHHHHB", 0x2C, left, top, width, height, 0x80 | table_bits)
+        return descriptor + color_table + lzw_data
+
+    def append_data(self, frame):
+        frame = np.asarray(frame, dtype=np.uint8)
+        if self.size is None:
+            self._write_header(frame.shape[1], frame.shape[0])
+        if self.optimize and self.previous is not None:
+            changed = np.any(frame != self.previous, axis=-1)
+            rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if not len(rows):
+                self.pending_delay += self.delay
+                return
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            block = self._encode(frame[top:bottom, left:right], int(left), int(top))
+        else:
+            block = self._encode(frame, 0, 0)
+        self._flush_pending()
+        self.pending, self.pending_delay = block, self.delay
+        if self.optimize:
+            self.previous = frame.copy()
+
+    def close(self):
+        if self.file is None:
+            return
+        self._flush_pending()
+        if self.size is not None:
+            self.file.write(b"\x3B")
+        if self.owns_file:
+            self.file.close()
+        self.file = None
+
+
+def open_demo_writer(path, fps=1 / 0.15, optimize=True):
+    """Streaming writer for `path`: StreamingGifWriter for .gif, imageio's ffmpeg writer for .mp4."""
+    if path.endswith(".mp4"):
+        import imageio
+        return imageio.get_writer(path, fps=fps)
+    return StreamingGifWriter(path, duration=1 / fps, optimize=optimize)
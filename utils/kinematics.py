@@ -0,0 +1,61 @@
+"""
+Car kinematics shared by every env and game.
+
+Orientations are indices into ORIENTATIONS (0 up, 1 down, 2 left, 3 right) and
+actions are the env action ids (0 stay, 1 turn left, 2 turn right, 3 straight,
+4 backwards). A move is a lookup into tables indexed [action][orientation], so
+the scalar and vectorized entry points agree by construction.
+"""
+import numpy as np
+
+from utils.utils import CAR_SPEED, ORIENTATIONS
+
+# Unit travel of a car facing each orientation
+HEADING_DX = (0, 0, -1, 1)
+HEADING_DY = (-1, 1, 0, 0)
+# Travel along the heading for each action: straight +1, backwards -1
+ACTION_DIRECTION = (0, 0, 0, 1, -1)
+
+KEEP = tuple(range(len(ORIENTATIONS)))
+LEFT_OF = (2, 3, 1, 0)
+RIGHT_OF = (3, 2, 0, 1)
+NEXT_ORIENTATION = (KEEP, LEFT_OF, RIGHT_OF, KEEP, KEEP)
+
+MOVE_DX = tuple(tuple(d * dx * CAR_SPEED for dx in HEADING_DX) for d in ACTION_DIRECTION)
+MOVE_DY = tuple(tuple(d * dy * CAR_SPEED for dy in HEADING_DY) for d in ACTION_DIRECTION)
+
+# Same tables as arrays for the batched envs
+MOVE_DX_TABLE = np.array(MOVE_DX, dtype=np.int32)
+MOVE_DY_TABLE = np.array(MOVE_DY, dtype=np.int32)
+NEXT_ORIENTATION_TABLE = np.array(NEXT_ORIENTATION, dtype=np.int32)
+
+
+def move(x, y, orientation, action):
+    """Pose (x, y, orientation) after `action`, before clipping."""
+    return x + MOVE_DX[action][orientation], y + MOVE_DY[action][orientation], NEXT_ORIENTATION[action][orientation]
+
+
+def move_rect(rect, orientation, action):
+    """Apply `action` to a pygame rect in place and return the new orientation."""
+    rect.x += MOVE_DX[action][orientation]
+    rect.y += MOVE_DY[action][orientation]
+    return NEXT_ORIENTATION[action][orientation]
+
+
+def clip_rect(rect, width, height):
+    """Keep a rect on a width x height board."""
+    rect.x = min(max(rect.x, 0), width - rect.width)
+    rect.y = min(max(rect.y, 0), height - rect.height)
+
+
+def move_arrays(x, y, orientation, actions):
+    """Vectorized `move` over int32 pose arrays, updated in place. Every action must be a valid id."""
+    x += MOVE_DX_TABLE[actions, orientation]
+    y += MOVE_DY_TABLE[actions, orientation]
+    orientation[:] = NEXT_ORIENTATION_TABLE[actions, orientation]
+
+
+def clip_arrays(x, y, width, height, size):
+    """Vectorized `clip_rect` for size x size cars."""
+    np.clip(x, 0, width - size, out=x)
+    np.clip(y, 0, height - size, out=y)
@@ -0,0 +1,130 @@
+"""
+Pre-generated layout banks.
+
+A bank is a .npy file holding a structured uint8 array with one row per layout,
+opened memory-mapped so an env reset is a single indexed read instead of a
+round of sampling. Single-car rows (feature/image envs) hold the car tile,
+orientation, lot tile and obstacle tiles; multi-agent rows hold lot, obstacle
+and agent tiles plus agent orientations. Tiles are (x, y) grid coordinates and
+orientations index ORIENTATIONS.
+"""
+import numpy as np
+
+from utils.utils import GRID_WIDTH, GRID_HEIGHT, NO_OF_OBSTACLES, ORIENTATIONS
+
+CHUNK_SIZE = 65536
+
+
+def single_layout_dtype(n_obstacles=NO_OF_OBSTACLES):
+    return np.dtype([
+        ("car", np.uint8, (2,)), ("orientation", np.uint8), ("lot", np.uint8, (2,)),
+        ("obstacles", np.uint8, (n_obstacles, 2)),
+    ])
+
+
+def multi_layout_dtype(n_agents, n_lots, n_obstacles):
+    return np.dtype([
+        ("lots", np.uint8, (n_lots, 2)), ("obstacles", np.uint8, (n_obstacles, 2)),
+        ("agents", np.uint8, (n_agents, 2)), ("orientations", np.uint8, (n_agents,)),
+    ])
+
+
+def sample_tile_rows(rng, count, k, grid_width, grid_height):
+    """`count` rows of k distinct (x, y) tiles, drawn by taking the k smallest of random keys per cell."""
+    keys = rng.random((count, grid_width * grid_height))
+    cells = np.argpartition(keys, k - 1, axis=1)[:, :k] if k else np.zeros((count, 0), dtype=np.int64)
+    return np.stack([cells % grid_width, cells // grid_width], axis=-1).astype(np.uint8)
+
+
+def generate_layouts(dtype, count, seed=0, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, out=None):
+    """
+    Fill `out` (or a new array) with `count` layouts of the given bank dtype.
+    Chunk c is drawn from its own child of SeedSequence(seed), so a bank is
+    reproducible from its seed and count alone.
+    """
+    if max(grid_width, grid_height) > 256:
+        raise ValueError("Layout banks store tiles as uint8 and support grids up to 256x256")
+    out = np.empty(count, dtype=dtype) if out is None else out
+    n_chunks = -(-count // CHUNK_SIZE)
+    for chunk, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        rng = np.random.default_rng(child)
+        rows = out[chunk * CHUNK_SIZE:(chunk + 1) * CHUNK_SIZE]
+        n = len(rows)
+        if "car" in dtype.names:
+            n_obstacles = dtype["obstacles"].shape[0]
+            tiles = sample_tile_rows(rng, n, 2 + n_obstacles, grid_width, grid_height)
+            rows["car"] = tiles[:, 0]
+            rows["lot"] = tiles[:, 1]
+            rows["obstacles"] = tiles[:, 2:]
+            rows["orientation"] = rng.integers(0, len(ORIENTATIONS), size=n)
+        else:
+            n_lots, n_obstacles = dtype["lots"].shape[0], dtype["obstacles"].shape[0]
+            n_agents = dtype["agents"].shape[0]
+            tiles = sample_tile_rows(rng, n, n_lots + n_obstacles + n_agents, grid_width, grid_height)
+            rows["lots"] = tiles[:, :n_lots]
+            rows["obstacles"] = tiles[:, n_lots:n_lots + n_obstacles]
+            rows["agents"] = tiles[:, n_lots + n_obstacles:]
+            rows["orientations"] = rng.integers(0, len(ORIENTATIONS), size=(n, n_agents))
+    return out
+
+
+def write_layout_bank(path, dtype, count, seed=0, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """Generate a bank straight into a memory-mapped .npy file and return it."""
+    bank = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(count,))
+    generate_layouts(dtype, count, seed, grid_width, grid_height, out=bank)
+    bank.flush()
+    return bank
+
+
+def load_layout_bank(bank):
+    """Open a bank file read-only and memory-mapped; arrays are passed through."""
+    if isinstance(bank, np.ndarray):
+        return bank
+    return np.load(bank, mmap_mode="r")
+
+
+class LayoutBank:
+    """
+    Read side of a bank for one env. `layout_range` restricts draws to rows
+    [start, stop), which is how train and held-out evaluation splits are kept apart.
+    """
+
+    def __init__(self, bank, layout_range=None, expected_dtype=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.layouts = load_layout_bank(bank)
+        if expected_dtype is not None and self.layouts.dtype != expected_dtype:
+            raise ValueError(f"Layout bank rows are {self.layouts.dtype}, this env needs {expected_dtype}")
+        self.start, self.stop = layout_range or (0, len(self.layouts))
+        if not 0 <= self.start < self.stop <= len(self.layouts):
+            raise ValueError(f"Layout range {layout_range} is outside the bank's {len(self.layouts)} rows")
+        width, height = self.grid_size()
+        if width > grid_width or height > grid_height:
+            raise ValueError(
+                f"Layout bank places tiles on a grid of at least {width}x{height}, this env is {grid_width}x{grid_height}"
+            )
+
+    def grid_size(self):
+        """Smallest (width, height) grid holding every tile of the range, scanned a chunk at a time."""
+        width = height = 0
+        tile_fields = [name for name in self.layouts.dtype.names if self.layouts.dtype[name].shape[-1:] == (2,)]
+        for start in range(self.start, self.stop, CHUNK_SIZE):
+            rows = self.layouts[start:min(start + CHUNK_SIZE, self.stop)]
+            for name in tile_fields:
+                tiles = rows[name].reshape(-1, 2)
+                if len(tiles):
+                    width = max(width, int(tiles[:, 0].max()) + 1)
+                    height = max(height, int(tiles[:, 1].max()) + 1)
+        return width, height
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def draw(self, index=None, prng=None):
+        """Row `index` of the range, or a random one drawn with `prng` (a random.Random or numpy Generator)."""
+        if index is not None and not 0 <= index < len(self):
+            raise IndexError(f"Layout index {index} is outside this range of {len(self)} layouts")
+        if index is None:
+            if hasattr(prng, "integers"):
+                index = int(prng.integers(len(self)))
+            else:
+                index = prng.randrange(len(self))
+        return self.layouts[self.start + index]
@@ -0,0 +1,96 @@
+"""
+Torch-free inference for PPO MlpPolicy agents with discrete actions.
+
+`export_policy` (needs torch and stable-baselines3) writes the actor half of a
+trained policy to an .npz of float32 weights; `NumpyPolicy` (needs only NumPy)
+loads it and returns the same deterministic actions as `model.predict`, so the
+demo and eval paths can run a policy without importing torch. Image observations
+are divided by 255 first whenever SB3 normalizes them for the policy.
+"""
+import numpy as np
+
+# Version 2 added obs_divisor; version 1 files never scaled observations
+FORMAT_VERSION = 2
+ACTIVATIONS = {
+    "tanh": lambda x: np.tanh(x, out=x),
+    "relu": lambda x: np.maximum(x, 0, out=x),
+}
+
+
+def export_policy(model, path):
+    """Write the actor of a PPO MlpPolicy (Box observations, Discrete actions) to `path` (.npz)."""
+    from gymnasium import spaces
+    from stable_baselines3.common.preprocessing import is_image_space
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+    from torch import nn
+
+    policy = model.policy
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError("Only MlpPolicy (flattened observations) can be exported")
+    if not isinstance(model.action_space, spaces.Discrete):
+        raise ValueError(f"Only Discrete action spaces can be exported, got {model.action_space}")
+    activation_names = {nn.Tanh: "tanh", nn.ReLU: "relu"}
+    arrays, activations = {}, []
+    layers = list(policy.mlp_extractor.policy_net) + [policy.action_net]
+    for layer in layers:
+        if isinstance(layer, nn.Linear):
+            index = len(arrays) // 2
+            arrays[f"weight_{index}"] = np.ascontiguousarray(layer.weight.detach().cpu().numpy().T, dtype=np.float32)
+            arrays[f"bias_{index}"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+            activations.append("")
+        elif type(layer) in activation_names:
+            activations[-1] = activation_names[type(layer)]
+        else:
+            raise ValueError(f"Cannot export layer {layer}")
+    # Mirrors SB3's preprocess_obs, which scales image Box observations to [0, 1]
+    obs_divisor = 255.0 if is_image_space(model.observation_space) and policy.normalize_images else 1.0
+    np.savez(
+        path, version=np.array(FORMAT_VERSION), activations=np.array(activations),
+        obs_shape=np.array(model.observation_space.shape), obs_divisor=np.array(obs_divisor, dtype=np.float32),
+        **arrays
+    )
+
+
+class NumpyPolicy:
+    """Deterministic actions of an exported policy; `predict` mirrors SB3's signature."""
+
+    def __init__(self, weights, biases, activations, obs_shape, obs_divisor=1.0):
+        self.weights = weights
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] if name else None for name in activations]
+        self.obs_shape = tuple(obs_shape)
+        self.obs_divisor = np.float32(obs_divisor)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version not in (1, FORMAT_VERSION):
+                raise ValueError(f"{path} is format version {version}, expected {FORMAT_VERSION}")
+            activations = [str(name) for name in data["activations"]]
+            weights = [data[f"weight_{i}"] for i in range(len(activations))]
+            biases = [data[f"bias_{i}"] for i in range(len(activations))]
+            obs_divisor = data["obs_divisor"] if version >= 2 else 1.0
+            return cls(weights, biases, activations, data["obs_shape"], obs_divisor)
+
+    def action_logits(self, obs):
+        """(n, n_actions) logits for a batch of observations."""
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, int(np.prod(self.obs_shape)))
+        if self.obs_divisor != 1:
+            x = x / self.obs_divisor
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            x = x @ weight
+            x += bias
+            if activation is not None:
+                x = activation(x)
+        return x
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        """Argmax actions: shape () for one observation, (n,) for a batch. Returns (actions, None) like SB3."""
+        if not deterministic:
+            raise ValueError("NumpyPolicy only computes deterministic actions")
+        observation = np.asarray(observation)
+        actions = self.action_logits(observation).argmax(axis=1)
+        if observation.shape == self.obs_shape:
+            return actions[0], None
+        return actions, None
@@ -0,0 +1,91 @@
+"""
+Switchable per-phase timing for env internals.
+
+Profiling works by shadowing the methods that make up a step with timed
+wrappers on the instance, so a disabled env runs its normal methods with no
+added checks. Phases nest: "step" includes the time of every phase it calls.
+"""
+import functools
+import time
+from collections import defaultdict
+
+_MISSING = object()
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.patched = []
+
+    def wrap(self, name, method):
+        calls, seconds, clock = self.calls, self.seconds, time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        return timed
+
+    def instrument(self, root, phases):
+        """
+        Time each phase in `phases` (name -> method path such as "fill_surface" or
+        "renderer.update", relative to `root`). Paths whose owner is absent are skipped.
+        """
+        for name, path in phases.items():
+            *owner_path, attr = path.split(".")
+            owner = root
+            for part in owner_path:
+                owner = getattr(owner, part, None)
+            if owner is None or not hasattr(owner, attr):
+                continue
+            self.patched.append((owner, attr, vars(owner).get(attr, _MISSING)))
+            setattr(owner, attr, self.wrap(name, getattr(owner, attr)))
+
+    def uninstrument(self):
+        for owner, attr, original in reversed(self.patched):
+            if original is _MISSING:
+                delattr(owner, attr)
+            else:
+                setattr(owner, attr, original)
+        self.patched = []
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+
+    def stats(self):
+        return {
+            name: {"calls": self.calls[name], "total_ms": self.seconds[name] * 1000}
+            for name in self.calls
+        }
+
+
+def merge_stats(all_stats):
+    """Sum per-phase stats from several envs (e.g. the workers of a VecEnv) and add per-call means."""
+    merged = defaultdict(lambda: {"calls": 0, "total_ms": 0.0})
+    for stats in all_stats:
+        for name, phase in stats.items():
+            merged[name]["calls"] += phase["calls"]
+            merged[name]["total_ms"] += phase["total_ms"]
+    for phase in merged.values():
+        phase["mean_us"] = phase["total_ms"] * 1000 / phase["calls"] if phase["calls"] else 0.0
+    return dict(merged)
+
+
+def set_vec_profiling(vec_env, enabled=True):
+    """Switch profiling in every worker of a VecEnv, or in a batched env that profiles itself."""
+    if hasattr(vec_env, "enable_profiling"):
+        vec_env.enable_profiling(enabled)
+    else:
+        vec_env.env_method("enable_profiling", enabled)
+
+
+def vec_profile_stats(vec_env):
+    if hasattr(vec_env, "profile_stats"):
+        return merge_stats([vec_env.profile_stats()])
+    return merge_stats(vec_env.env_method("profile_stats"))
@@ -0,0 +1,106 @@
+"""
+Process-wide pools for long-lived, expensive-to-build objects (envs, loaded policies)
+shared by concurrent Streamlit sessions.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def file_signature(path):
+    """(mtime, size) of `path`; a cached object built from the file is stale once this changes."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class EnvPool:
+    """
+    Pre-warmed envs keyed by name. `lease(key)` hands out an env for exclusive use
+    and puts it back afterwards, so two sessions never step the same env.
+
+    At most `max_idle` envs are kept idle across all keys; when a returned env
+    would exceed that, idle envs of the least recently used key are closed first.
+    """
+
+    def __init__(self, factories, max_idle=8):
+        self.factories = factories
+        self.max_idle = max_idle
+        self.idle = OrderedDict()
+        self.lock = threading.Lock()
+
+    def warm(self, key, count=1):
+        for _ in range(count):
+            self.release(key, self.factories[key]())
+
+    def acquire(self, key):
+        with self.lock:
+            envs = self.idle.get(key)
+            if envs:
+                self.idle.move_to_end(key)
+                return envs.pop()
+        return self.factories[key]()
+
+    def release(self, key, env):
+        evicted = []
+        with self.lock:
+            self.idle.setdefault(key, []).append(env)
+            self.idle.move_to_end(key)
+            while sum(len(envs) for envs in self.idle.values()) > self.max_idle:
+                oldest = next(iter(self.idle))
+                evicted.append(self.idle[oldest].pop(0))
+                if not self.idle[oldest]:
+                    del self.idle[oldest]
+        for stale in evicted:
+            stale.close()
+
+    @contextmanager
+    def lease(self, key):
+        env = self.acquire(key)
+        try:
+            yield env
+        finally:
+            self.release(key, env)
+
+    def close(self):
+        with self.lock:
+            envs = [env for idle in self.idle.values() for env in idle]
+            self.idle.clear()
+        for env in envs:
+            env.close()
+
+
+class ModelCache:
+    """
+    Loaded models keyed by file path, reloaded when the file's mtime or size
+    changes and evicted least-recently-used beyond `max_models`.
+
+    Loads run outside the cache lock, under a per-path lock, so a slow
+    deserialization only blocks sessions waiting for that same model.
+    """
+
+    def __init__(self, loader, max_models=4):
+        self.loader = loader
+        self.max_models = max_models
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+        self.path_locks = {}
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            path_lock = self.path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            signature = file_signature(path)
+            with self.lock:
+                cached = self.models.get(path)
+                if cached is not None and cached[0] == signature:
+                    self.models.move_to_end(path)
+                    return cached[1]
+            model = self.loader(path)
+            with self.lock:
+                self.models[path] = (signature, model)
+                self.models.move_to_end(path)
+                while len(self.models) > self.max_models:
+                    self.models.popitem(last=False)
+            return model
@@ -0,0 +1,137 @@
+"""
+Content-addressed on-disk cache of demo rollouts.
+
+Each entry is a directory named by the hash of everything that determines the
+rollout (env, policy or model digest, seed, episode count, step limit, output
+format). It holds `rollout.json` with the per-step actions and per-episode
+results plus any files the rollout produced, such as the encoded GIF.
+Entries are built in a staging directory and renamed into place, so readers
+never see a partial entry, and the oldest-read entries are evicted once the
+cache outgrows `max_bytes`.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from utils.resource_pool import file_signature
+
+CACHE_VERSION = 1
+RECORD_FILE = "rollout.json"
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """sha256 of a file, remembered until its mtime or size changes."""
+    path = os.path.abspath(path)
+    signature = file_signature(path)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    with _digests_lock:
+        _digests[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def rollout_key(**fields):
+    """Stable hex key for a rollout configuration."""
+    payload = json.dumps({"version": CACHE_VERSION, **fields}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _dir_size(path):
+    return sum(_file_size(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+class RolloutCache:
+    def __init__(self, root, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.staging = os.path.join(root, ".staging")
+        os.makedirs(self.staging, exist_ok=True)
+        # Serializes commits and eviction between sessions sharing this cache
+        self.lock = threading.Lock()
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """Cached record for `key` (with "dir" pointing at its files), or None on a miss."""
+        record_path = os.path.join(self.entry_dir(key), RECORD_FILE)
+        try:
+            with open(record_path) as f:
+                record = json.load(f)
+            # Reads refresh the entry's place in the LRU order
+            os.utime(record_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        record["dir"] = self.entry_dir(key)
+        return record
+
+    def stage(self):
+        """Fresh directory for a rollout to write its files into before `put`."""
+        return tempfile.mkdtemp(dir=self.staging)
+
+    @contextmanager
+    def staged(self):
+        """`stage()` that removes the directory again if the rollout filling it raises."""
+        staged_dir = self.stage()
+        try:
+            yield staged_dir
+        except BaseException:
+            shutil.rmtree(staged_dir, ignore_errors=True)
+            raise
+
+    def put(self, key, record, staged_dir):
+        """Commit a staged directory as the entry for `key` and return the stored record."""
+        with open(os.path.join(staged_dir, RECORD_FILE), "w") as f:
+            json.dump(record, f)
+        with self.lock:
+            try:
+                os.rename(staged_dir, self.entry_dir(key))
+            except OSError:
+                # Another session committed the same rollout first; theirs is identical
+                shutil.rmtree(staged_dir, ignore_errors=True)
+            self._evict(keep=key)
+        return self.get(key)
+
+    def evict(self, keep=None):
+        with self.lock:
+            self._evict(keep)
+
+    def _evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.root):
+            if name in (".staging", keep):
+                continue
+            try:
+                mtime = os.path.getmtime(os.path.join(self.root, name, RECORD_FILE))
+            except FileNotFoundError:
+                # Not an entry, or removed by another process sharing the directory
+                continue
+            entries.append((mtime, _dir_size(self.entry_dir(name)), name))
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.isdir(self.entry_dir(keep)):
+            total += _dir_size(self.entry_dir(keep))
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self.entry_dir(name), ignore_errors=True)
+            total -= size
@@ -1,3 +1,4 @@
+import os
 import random
 
 STATE_WIDTH = 720
@@ -15,6 +16,15 @@ CAR_SPEED = 60
 NUMBER_OF_ACTIONS = 5
 NO_OF_OBSTACLES = 4
 ORIENTATIONS = ["up", "down", "left", "right"]
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+def make_prng(seed=None, worker_index=0):
+    """
+    Independent random.Random for one env instance. Seeded streams use seed + worker_index,
+    the same offset SB3 gives the i-th env of a seeded VecEnv; unseeded streams draw fresh
+    OS entropy, so workers forked from one parent never share a layout sequence.
+    """
+    return random.Random(None if seed is None else seed + worker_index)
 
 def grid_to_pixels(x, y):
     return x * TILE_SIZE, y * TILE_SIZE
@@ -29,18 +39,36 @@ def get_random_grid_tile(prng=None):
     prng = prng or random
     return prng.randint(0, GRID_WIDTH - 1), prng.randint(0, GRID_HEIGHT - 1)
 
-def get_random_rect(prng=None, occupied_rects=None):
+def rect_tile(rect):
+    """Grid tile (x, y) of a rect placed by tile_rect or grid_to_pixels."""
+    return rect.x // TILE_SIZE, rect.y // TILE_SIZE
+
+def sample_free_tiles(k, occupied_tiles=(), prng=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """
+    Draw k distinct (x, y) tiles that are not in occupied_tiles.
+    Samples straight from the free list, so the cost does not grow as the lot fills up.
+    """
+    prng = prng or random
+    occupied_tiles = set(occupied_tiles)
+    free_tiles = [(x, y) for y in range(grid_height) for x in range(grid_width) if (x, y) not in occupied_tiles]
+    if k > len(free_tiles):
+        raise ValueError(
+            f"Cannot place {k} objects: only {len(free_tiles)} of {grid_width * grid_height} tiles are free"
+        )
+    return prng.sample(free_tiles, k)
+
+def tile_rect(x, y):
     import pygame
-    occupied_rects = occupied_rects or []
-    while True:
-        x, y = get_random_grid_tile(prng)
-        rect = pygame.Rect(grid_to_pixels(x, y), (TILE_SIZE, TILE_SIZE))
-        rect.x += (TILE_SIZE - CAR_WIDTH) // 2
-        rect.y += (TILE_SIZE - CAR_HEIGHT) // 2
-        if not any(rect.colliderect(obj) for obj in occupied_rects):
-            return rect
-
-def load_car_images(asset_folder="../assets"):
+    rect = pygame.Rect(grid_to_pixels(x, y), (TILE_SIZE, TILE_SIZE))
+    rect.x += (TILE_SIZE - CAR_WIDTH) // 2
+    rect.y += (TILE_SIZE - CAR_HEIGHT) // 2
+    return rect
+
+def get_random_rect(prng=None, occupied_rects=None):
+    occupied_tiles = [rect_tile(rect) for rect in occupied_rects or []]
+    return tile_rect(*sample_free_tiles(1, occupied_tiles, prng=prng)[0])
+
+def load_car_images(asset_folder=ASSETS_DIR):
     import pygame
     return [
         pygame.image.load(f"{asset_folder}/car-up.png"),
@@ -49,6 +77,6 @@ def load_car_images(asset_folder="../assets"):
         pygame.image.load(f"{asset_folder}/car-right.png")
     ]
 
-def load_obstacle_image(asset_folder="../assets"):
+def load_obstacle_image(asset_folder=ASSETS_DIR):
     import pygame
     return pygame.image.load(f"{asset_folder}/obstacle.png")